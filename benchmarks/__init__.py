@@ -0,0 +1 @@
+"""Benchmarks of the bot. Run them from the project's root, like ``python -m benchmarks.collector_scaling``."""
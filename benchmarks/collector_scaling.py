@@ -0,0 +1,94 @@
+"""Benchmark of :mod:`pinger_bot.collector`: how throughput scales with the number of processes.
+
+It creates a temporary SQLite database with ``--servers`` servers, all pointing to local fake servers
+(see :mod:`tests.fake_servers`), and runs one collector's tick with every number of processes from
+``--processes``, printing how many servers per second were pinged and written.
+
+Measured time includes start of the processes, so use enough servers for it to not dominate.
+
+Example:
+    .. code-block:: bash
+
+        python -m benchmarks.collector_scaling --servers 5000 --processes 1 2 4 8
+"""
+import argparse
+import asyncio
+import os
+import pathlib
+import tempfile
+import time
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", type=int, default=2000, help="Number of tracked servers.")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4], help="Numbers of processes to try.")
+    parser.add_argument("--fake-processes", type=int, default=2, help="Number of processes for fake servers.")
+    parser.add_argument("--port", type=int, default=None, help="Port for fake servers.")
+    return parser.parse_args()
+
+
+async def prepare_database(hosts: list, port: int) -> None:
+    """Create tables and add servers to the database."""
+    import alembic.command
+    import alembic.config
+    import sqlalchemy
+
+    from pinger_bot import models
+
+    alembic_cfg = alembic.config.Config("pinger_bot/migrations/alembic.ini")
+    alembic_cfg.set_section_option("logger_alembic", "level", "ERROR")
+    await asyncio.get_running_loop().run_in_executor(None, alembic.command.upgrade, alembic_cfg, "head")
+
+    async with models.db.session() as session:
+        await session.execute(
+            sqlalchemy.insert(models.Server),
+            [{"host": host, "port": port, "max": 0, "owner": 1, "java": True} for host in hosts],
+        )
+        await session.commit()
+
+
+async def count_and_clear_pings() -> int:
+    """Count pings, written by the collector, and delete them for the next run."""
+    import sqlalchemy
+
+    from pinger_bot import models
+
+    async with models.db.session() as session:
+        count = (await session.execute(sqlalchemy.select(sqlalchemy.func.count(models.Ping.id)))).scalar_one()
+        await session.execute(sqlalchemy.delete(models.Ping))
+        await session.commit()
+    return int(count)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    args = parse_args()
+    directory = tempfile.mkdtemp(prefix="pinger-bot-benchmark-")
+    # must be set before `pinger_bot` is imported, spawned processes inherit them
+    os.environ["DB_URI"] = f"sqlite+aiosqlite:///{pathlib.Path(directory) / 'db.sqlite3'}"
+    os.environ.setdefault("VERBOSE", "false")
+
+    from pinger_bot import collector
+    from tests import fake_servers
+
+    port = args.port if args.port is not None else fake_servers.DEFAULT_PORT
+    hosts = fake_servers.hosts(args.servers)
+    asyncio.run(prepare_database(hosts, port))
+    fake = fake_servers.start(args.fake_processes, port)
+
+    print(f"{'processes':>9} | {'seconds':>8} | {'pings':>6} | {'servers/s':>9}")
+    try:
+        for processes in args.processes:
+            start = time.perf_counter()
+            collector.run(processes, once=True)
+            elapsed = time.perf_counter() - start
+            pings = asyncio.run(count_and_clear_pings())
+            print(f"{processes:>9} | {elapsed:>8.2f} | {pings:>6} | {pings / elapsed:>9.0f}")
+    finally:
+        collector.stop(fake)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Benchmark of compressed blocks of pings (:mod:`pinger_bot.ping_blocks`) versus rows of a partition.
+
+It creates a temporary SQLite database with ``--servers`` servers and ``--pings`` pings of every server
+(one per minute, online players mostly stay the same) in one closed partition. Then it measures bytes per ping
+(growth of the file after ``VACUUM``) and time of reading pings of one server, first from the partition, then
+after packing it into blocks. Decoding alone is measured too.
+
+Example:
+    .. code-block:: bash
+
+        python -m benchmarks.ping_blocks --servers 1000 --pings 360
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import pathlib
+import random
+import sqlite3
+import tempfile
+import time
+import typing
+
+START = datetime.datetime(2024, 1, 1)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", type=int, default=1000, help="Number of servers.")
+    parser.add_argument("--pings", type=int, default=360, help="Number of pings of every server, one per minute.")
+    parser.add_argument("--queries", type=int, default=200, help="Number of measured reads.")
+    return parser.parse_args()
+
+
+def size(path: pathlib.Path) -> int:
+    """Size of the database after ``VACUUM``."""
+    with sqlite3.connect(path) as connection:
+        connection.execute("VACUUM")
+    return path.stat().st_size
+
+
+def online(pings: int) -> typing.List[int]:
+    """Random online players, which change in every 5th ping on average."""
+    players, result = random.randint(0, 200), []
+    for _ in range(pings):
+        if random.random() < 0.2:
+            players = max(0, players + random.randint(-5, 5))
+        result.append(players)
+    return result
+
+
+async def measure_reads(read: typing.Callable[[int], typing.Awaitable[typing.Any]], args: argparse.Namespace) -> float:
+    """Average time of reading pings of a random server, in milliseconds."""
+    servers = [random.randint(1, args.servers) for _ in range(args.queries)]
+    start = time.perf_counter()
+    for server in servers:
+        await read(server)
+    return (time.perf_counter() - start) / args.queries * 1000
+
+
+async def run(path: pathlib.Path, args: argparse.Namespace) -> None:
+    """Fill the database and measure both storages."""
+    import alembic.command
+    import alembic.config
+    import sqlalchemy
+
+    from pinger_bot import models, ping_blocks, ping_storage
+
+    alembic_cfg = alembic.config.Config("pinger_bot/migrations/alembic.ini")
+    alembic_cfg.set_section_option("logger_alembic", "level", "ERROR")
+    await asyncio.get_running_loop().run_in_executor(None, alembic.command.upgrade, alembic_cfg, "head")
+
+    async with models.db.session() as session:
+        await session.execute(
+            sqlalchemy.insert(models.Server),
+            [
+                {"id": i, "host": f"server{i}.example", "port": 25565, "max": 0, "owner": 1}
+                for i in range(1, args.servers + 1)
+            ],
+        )
+        await session.commit()
+    empty = size(path)
+
+    async with models.db.session() as session:
+        for server_id in range(1, args.servers + 1):
+            await ping_storage.storage.write(
+                session,
+                [
+                    {"server_id": server_id, "time": START + datetime.timedelta(minutes=minute), "players": players}
+                    for minute, players in enumerate(online(args.pings))
+                ],
+            )
+        await session.commit()
+    samples = args.servers * args.pings
+    until = START + datetime.timedelta(minutes=args.pings)
+
+    async def read(server_id: int) -> ping_storage.Series:
+        async with models.db.session() as session:
+            return await ping_blocks.store.read(session, server_id, since=START, until=until)
+
+    print(f"{'storage':>9} | {'bytes/ping':>10} | {'read, ms':>8}")
+    table_read = await measure_reads(read, args)
+    print(f"{'partition':>9} | {(size(path) - empty) / samples:>10.2f} | {table_read:>8.2f}")
+
+    async with models.db.session() as session:
+        await ping_blocks.store.pack_closed(session, now=until + datetime.timedelta(days=1))
+        await session.commit()
+        blocks = (await session.scalars(sqlalchemy.select(models.PingBlock.data))).all()
+    blocks_read = await measure_reads(read, args)
+    print(f"{'blocks':>9} | {(size(path) - empty) / samples:>10.2f} | {blocks_read:>8.2f}")
+
+    start = time.perf_counter()
+    for data in blocks:
+        ping_blocks.decode(data)
+    decode = time.perf_counter() - start
+    print(f"Decoded {samples} pings in {decode * 1000:.1f} ms ({samples / decode / 1e6:.1f}M pings/s).")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    args = parse_args()
+    path = pathlib.Path(tempfile.mkdtemp(prefix="pinger-bot-benchmark-")) / "db.sqlite3"
+    # must be set before `pinger_bot` is imported
+    os.environ["DB_URI"] = f"sqlite+aiosqlite:///{path}"
+    os.environ.setdefault("VERBOSE", "false")
+
+    asyncio.run(run(path, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark of the compact layout of pings (revision ``d8f1a6b3c920``): size of the database and time of reads.
+
+It creates a temporary SQLite database in the layout before the revision, with ``--servers`` servers and
+``--pings`` pings of every server in one partition. Then it measures the size of the file (after ``VACUUM``) and
+the average time of the ``/statistic`` query (pings of one server in the last day), upgrades the database
+to the compact layout (timing the migration) and measures everything again.
+
+Example:
+    .. code-block:: bash
+
+        python -m benchmarks.ping_layout --servers 1000 --pings 288
+"""
+import argparse
+import datetime
+import os
+import pathlib
+import random
+import sqlite3
+import tempfile
+import time
+import typing
+
+PARTITION = "pb_pings_2024010100_24h"
+"""One partition for all pings, so the query reads one table in both layouts."""
+START = datetime.datetime(2024, 1, 1)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", type=int, default=1000, help="Number of servers.")
+    parser.add_argument("--pings", type=int, default=288, help="Number of pings of every server (288 is every 5m).")
+    parser.add_argument("--queries", type=int, default=200, help="Number of measured queries.")
+    return parser.parse_args()
+
+
+def fill(connection: sqlite3.Connection, servers: int, pings: int) -> None:
+    """Add servers and pings in the old layout."""
+    connection.executemany(
+        "INSERT INTO pb_servers (id, host, port, max, owner) VALUES (?, ?, 25565, 0, 1)",
+        [(i, f"server{i}.example") for i in range(1, servers + 1)],
+    )
+    connection.execute(
+        f"CREATE TABLE {PARTITION} (id INTEGER PRIMARY KEY, host VARCHAR(256) NOT NULL, port INTEGER NOT NULL,"
+        " time DATETIME NOT NULL, players INTEGER NOT NULL)"
+    )
+    step = datetime.timedelta(days=1) / pings
+    # pings come tick by tick, so rows of one server are spread over the whole table, like in reality
+    connection.executemany(
+        f"INSERT INTO {PARTITION} (host, port, time, players) VALUES (?, 25565, ?, ?)",
+        (
+            (f"server{server}.example", str(START + step * tick), random.randint(0, 500))
+            for tick in range(pings)
+            for server in range(1, servers + 1)
+        ),
+    )
+    connection.commit()
+
+
+def measure(
+    path: pathlib.Path,
+    query: str,
+    params: typing.Callable[[int], typing.Tuple[typing.Any, ...]],
+    args: argparse.Namespace,
+) -> str:
+    """Get size of the database and average time of the query for random servers."""
+    with sqlite3.connect(path) as connection:
+        connection.execute("VACUUM")
+        servers = [random.randint(1, args.servers) for _ in range(args.queries)]
+        start = time.perf_counter()
+        for server in servers:
+            connection.execute(query, params(server)).fetchall()
+        elapsed = (time.perf_counter() - start) / args.queries
+    return f"{path.stat().st_size / 2**20:>8.1f} MiB | {elapsed * 1000:>8.2f} ms"
+
+
+def main() -> None:
+    """Run the benchmark."""
+    args = parse_args()
+    path = pathlib.Path(tempfile.mkdtemp(prefix="pinger-bot-benchmark-")) / "db.sqlite3"
+    # must be set before `pinger_bot` is imported
+    os.environ["DB_URI"] = f"sqlite+aiosqlite:///{path}"
+    os.environ.setdefault("VERBOSE", "false")
+
+    import alembic.command
+    import alembic.config
+
+    alembic_cfg = alembic.config.Config("pinger_bot/migrations/alembic.ini")
+    alembic_cfg.set_section_option("logger_alembic", "level", "ERROR")
+    alembic.command.upgrade(alembic_cfg, "c4a9e3f7d218")
+    with sqlite3.connect(path) as connection:
+        fill(connection, args.servers, args.pings)
+
+    since, until = START, START + datetime.timedelta(days=1)
+    print(f"{'layout':>7} | {'size':>12} | {'query':>11}")
+    old = measure(
+        path,
+        f"SELECT time, players FROM {PARTITION} WHERE host = ? AND port = 25565 AND time >= ? AND time < ?"
+        " ORDER BY time",
+        lambda server: (f"server{server}.example", str(since), str(until)),
+        args,
+    )
+    print(f"{'old':>7} | {old}")
+
+    start = time.perf_counter()
+    alembic.command.upgrade(alembic_cfg, "d8f1a6b3c920")
+    migration = time.perf_counter() - start
+
+    seconds = datetime.timedelta(seconds=1)
+    epoch = datetime.datetime(2000, 1, 1)
+    compact = measure(
+        path,
+        f"SELECT time, players FROM {PARTITION} WHERE server_id = ? AND time >= ? AND time < ? ORDER BY time",
+        lambda server: (server, (since - epoch) // seconds, (until - epoch) // seconds),
+        args,
+    )
+    print(f"{'compact':>7} | {compact}")
+    print(f"Migration of {args.servers * args.pings} pings took {migration:.2f} seconds.")
+
+
+if __name__ == "__main__":
+    main()
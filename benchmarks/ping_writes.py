@@ -0,0 +1,121 @@
+"""Benchmark of writing collector's results to SQLite: ORM objects versus :class:`~pinger_bot.ext.scheduling.TickBatch`.
+
+It creates a temporary SQLite database with ``--servers`` servers and writes one tick of results for all of them
+(a ping for every server, and a new record of players for every ``--record-every`` server) in two ways:
+
+* ``orm`` - how it was done before: ``session.add`` of :class:`~pinger_bot.models.Ping` objects and an ``UPDATE``
+  per server;
+* ``bulk`` - :meth:`.TickBatch.write`: one ``executemany`` insert and one ``executemany`` update.
+
+Example:
+    .. code-block:: bash
+
+        python -m benchmarks.ping_writes --servers 10000 --repeat 3
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import pathlib
+import tempfile
+import time
+import typing
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", type=int, default=5000, help="Number of servers (and pings per tick).")
+    parser.add_argument("--record-every", type=int, default=10, help="Every N-th server gets a new record.")
+    parser.add_argument("--repeat", type=int, default=3, help="How many ticks to write with every method.")
+    return parser.parse_args()
+
+
+async def prepare_database(servers: int) -> typing.List[typing.Tuple[int, str, int]]:
+    """Create tables and add servers to the database.
+
+    Returns:
+        ``(id, host, port)`` of every added server.
+    """
+    import alembic.command
+    import alembic.config
+    import sqlalchemy
+
+    from pinger_bot import models
+
+    alembic_cfg = alembic.config.Config("pinger_bot/migrations/alembic.ini")
+    alembic_cfg.set_section_option("logger_alembic", "level", "ERROR")
+    await asyncio.get_running_loop().run_in_executor(None, alembic.command.upgrade, alembic_cfg, "head")
+
+    async with models.db.session() as session:
+        await session.execute(
+            sqlalchemy.insert(models.Server),
+            [{"host": f"server{i}.example", "port": 25565, "max": 0, "owner": 1} for i in range(servers)],
+        )
+        await session.commit()
+        rows = (
+            await session.execute(sqlalchemy.select(models.Server.id, models.Server.host, models.Server.port))
+        ).all()
+    return [tuple(row) for row in rows]  # type: ignore[misc] # rows are tuples of 3 items
+
+
+async def write_orm(servers: typing.List[typing.Tuple[int, str, int]], record_every: int, players: int) -> None:
+    """Write one tick with ORM objects and an ``UPDATE`` per server."""
+    import sqlalchemy
+
+    from pinger_bot import models
+
+    async with models.db.session() as session:
+        now = datetime.datetime.now()
+        session.add_all(models.Ping(server_id=server_id, time=now, players=players) for server_id, _, _ in servers)
+        for server_id, _, _ in servers[::record_every]:
+            await session.execute(
+                sqlalchemy.update(models.Server).where(models.Server.id == server_id).values(max=players)
+            )
+        await session.commit()
+
+
+async def write_bulk(servers: typing.List[typing.Tuple[int, str, int]], record_every: int, players: int) -> None:
+    """Write one tick with :meth:`.TickBatch.write`."""
+    from pinger_bot import models
+    from pinger_bot.ext import scheduling
+
+    now = datetime.datetime.now()
+    batch = scheduling.TickBatch(
+        pings=[{"server_id": server_id, "time": now, "players": players} for server_id, _, _ in servers],
+        maxes={server_id: players for server_id, _, _ in servers[::record_every]},
+    )
+    async with models.db.session() as session:
+        await batch.write(session)
+        await session.commit()
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Prepare the database and measure both methods."""
+    servers = await prepare_database(args.servers)
+    rows_per_tick = len(servers) + len(servers[:: args.record_every])
+
+    print(f"{'method':>6} | {'rows':>7} | {'seconds':>8} | {'rows/s':>9}")
+    for name, write in (("orm", write_orm), ("bulk", write_bulk)):
+        elapsed = 0.0
+        for tick in range(args.repeat):
+            start = time.perf_counter()
+            await write(servers, args.record_every, players=(tick + 1) * 10)
+            elapsed += time.perf_counter() - start
+        rows = rows_per_tick * args.repeat
+        print(f"{name:>6} | {rows:>7} | {elapsed:>8.2f} | {rows / elapsed:>9.0f}")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    args = parse_args()
+    directory = tempfile.mkdtemp(prefix="pinger-bot-benchmark-")
+    # must be set before `pinger_bot` is imported
+    os.environ["DB_URI"] = f"sqlite+aiosqlite:///{pathlib.Path(directory) / 'db.sqlite3'}"
+    os.environ.setdefault("VERBOSE", "false")
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
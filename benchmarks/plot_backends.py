@@ -0,0 +1,102 @@
+"""Benchmark of plot backends (see :data:`pinger_bot.plots.BACKENDS`): import time, render time, memory and size.
+
+Every backend is measured in its own fresh process, so imports and memory of one don't affect another. Memory
+is the growth of the peak resident set size after :mod:`pinger_bot.plots` is imported, so it is what the backend
+itself adds. Plots are like the real ones: ``--points`` points of the day, with the area between minimal and
+maximal online.
+
+Example:
+    .. code-block:: bash
+
+        python -m benchmarks.plot_backends --points 300 10000
+"""
+import argparse
+import importlib
+import json
+import resource
+import subprocess
+import sys
+import time
+import typing
+
+MODULES = {"sparkline": "pinger_bot.sparkline", "matplotlib": "matplotlib.figure"}
+"""Modules, which every backend imports on first use."""
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, nargs="+", default=[300, 10000], help="Numbers of points of plots.")
+    parser.add_argument("--renders", type=int, default=20, help="Number of measured renders of every plot.")
+    parser.add_argument("--backend", help=argparse.SUPPRESS)  # measure one backend in this process
+    return parser.parse_args()
+
+
+def max_rss() -> int:
+    """Peak resident set size of this process, in KiB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(backend: str, args: argparse.Namespace) -> typing.Dict[str, typing.Any]:
+    """Measure one backend in this process."""
+    import numpy
+
+    from pinger_bot import plots
+
+    baseline = max_rss()
+    start = time.perf_counter()
+    importlib.import_module(MODULES[backend])
+    result: typing.Dict[str, typing.Any] = {"import_ms": (time.perf_counter() - start) * 1000, "plots": {}}
+
+    for points in args.points:
+        players = 50 + 30 * numpy.sin(numpy.linspace(0, 12, points)) + numpy.random.randint(0, 5, points)
+        plot = plots.Plot(
+            times=numpy.datetime64("2024-01-01T00:00", "s") + numpy.linspace(0, 86400, points).astype("timedelta64[s]"),
+            players=players,
+            title="mc.example.com statistic",
+            xlabel="Time",
+            ylabel="Players online",
+            date_format="%H:%M",
+            min=players - 5,
+            max=players + 8,
+        )
+        image = plots.create_plot(plot, backend)  # the first one also loads fonts
+        start = time.perf_counter()
+        for _ in range(args.renders):
+            plots.create_plot(plot, backend)
+        result["plots"][points] = {
+            "render_ms": (time.perf_counter() - start) / args.renders * 1000,
+            "bytes": len(image),
+        }
+    result["memory_mib"] = (max_rss() - baseline) / 1024
+    return result
+
+
+def main() -> None:
+    """Run the benchmark."""
+    args = parse_args()
+    if args.backend:
+        print(json.dumps(measure(args.backend, args)))
+        return
+
+    print(
+        f"{'backend':>10} | {'import, ms':>10} | {'memory, MiB':>11} | {'points':>6} | {'render, ms':>10} | {'PNG, KiB':>8}"
+    )
+    for backend in MODULES:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.plot_backends", "--backend", backend, "--renders", str(args.renders)]
+            + ["--points", *map(str, args.points)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+        for points, plot in result["plots"].items():
+            print(
+                f"{backend:>10} | {result['import_ms']:>10.0f} | {result['memory_mib']:>11.1f} | {points:>6} |"
+                f" {plot['render_ms']:>10.1f} | {plot['bytes'] / 1024:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark of startup: time-to-ready of the bot and the collector, and import time of every module.
+
+Every target is started ``--runs`` times in a fresh interpreter, and time-to-ready is the median time from
+starting the interpreter to the moment, when the target is ready:
+
+* ``bot`` - everything :meth:`pinger_bot.bot.PingerBot.run` does before connecting to Discord: the bot object
+  is created and extensions are loaded;
+* ``collector`` - a process of ``python -m pinger_bot collector`` (see :mod:`pinger_bot.collector`) is ready
+  for its first tick;
+* ``cli`` - ``python -m pinger_bot`` parsed its arguments, before it runs anything.
+
+Then every target is started once more with ``python -X importtime``, and modules with the biggest cumulative
+import time (including their own imports) are printed, like in the output of ``-X importtime``. Only packages
+and modules of ``pinger_bot`` are shown, so the same time isn't repeated for every submodule.
+
+Example:
+    .. code-block:: bash
+
+        python -m benchmarks.startup --runs 5 --top 15
+"""
+import argparse
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+
+TARGETS = {
+    "bot": (
+        "import pathlib\n"
+        "from pinger_bot import bot\n"
+        "instance = bot.PingerBot()\n"
+        "instance.load_extensions_from(pathlib.Path(bot.__file__).parent / 'ext', recursive=True)\n"
+    ),
+    "collector": (
+        "from pinger_bot import collector, config\n"
+        "from pinger_bot.ext import scheduling\n"
+        "config.setup_logging()\n"
+    ),
+    "cli": "from pinger_bot import __main__\n__main__.parse_args(['collector'])\n",
+}
+"""Code, which makes every target ready."""
+
+
+class Import(typing.NamedTuple):
+    """One line of ``-X importtime`` output."""
+
+    self_ms: float
+    """Time of the module itself."""
+    cumulative_ms: float
+    """Time of the module with its imports."""
+    name: str
+    """Name of the module."""
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="*", choices=[[], *TARGETS], help="What to start. Default to all.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of measured starts of every target.")
+    parser.add_argument("--top", type=int, default=15, help="Number of the slowest modules to show.")
+    return parser.parse_args()
+
+
+def start(target: str, *options: str) -> typing.Tuple[float, str]:
+    """Start the target in a fresh interpreter.
+
+    Returns:
+        Time-to-ready in milliseconds and ``stderr`` of the interpreter.
+    """
+    # the ready moment is printed by the target itself, so exit of the interpreter isn't measured
+    code = TARGETS[target] + "import time\nprint(time.time())\n"
+    started = time.time()
+    process = subprocess.run(
+        [sys.executable, *options, "-c", code], check=True, capture_output=True, text=True, env=os.environ
+    )
+    return (float(process.stdout.splitlines()[-1]) - started) * 1000, process.stderr
+
+
+def parse_importtime(stderr: str) -> typing.List[Import]:
+    """Parse lines like ``import time:       426 |     344514 |   hikari``, times are in microseconds."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        imports.append(Import(int(self_us) / 1000, int(cumulative_us) / 1000, name.strip()))
+    return imports
+
+
+def main() -> None:
+    """Run the benchmark."""
+    args = parse_args()
+    path = pathlib.Path(tempfile.mkdtemp(prefix="pinger-bot-benchmark-")) / "db.sqlite3"
+    # must be set before `pinger_bot` is imported
+    os.environ["DB_URI"] = f"sqlite+aiosqlite:///{path}"
+    os.environ.setdefault("VERBOSE", "false")
+    os.environ.setdefault("DISCORD_TOKEN", "benchmark")  # the bot is not connected, but the token is required
+
+    for target in args.targets or TARGETS:
+        ready = [start(target)[0] for _ in range(args.runs)]
+        imports = parse_importtime(start(target, "-X", "importtime")[1])
+        print(
+            f"{target}: ready in {statistics.median(ready):.0f} ms (from {min(ready):.0f} to {max(ready):.0f} ms),"
+            f" {len(imports)} modules imported"
+        )
+        print(f"{'self, ms':>10} | {'cumulative, ms':>14} | module")
+        slowest = sorted(
+            (module for module in imports if "." not in module.name or module.name.startswith("pinger_bot")),
+            key=lambda module: module.cumulative_ms,
+            reverse=True,
+        )
+        for module in slowest[: args.top]:
+            print(f"{module.self_ms:>10.1f} | {module.cumulative_ms:>14.1f} | {module.name}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
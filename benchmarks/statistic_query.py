@@ -0,0 +1,120 @@
+"""Benchmark of queries of ``/statistic``: all pings of the window versus downsampled series and the nearest ping.
+
+It creates a temporary SQLite database with ``--servers`` servers, and adds history of pings (one per minute)
+step by step, up to ``--hours`` hours. After every step it measures the average time of reading pings of
+one server for ``/statistic``: all pings of the retention window, with the yesterday's ping found in Python
+(like before), and ``--points`` points of the last 24 hours averaged in the database, with the yesterday's ping
+from its own query (:meth:`pinger_bot.ping_storage.PingStorage.read_plot` and
+:meth:`pinger_bot.ping_storage.PingStorage.nearest`).
+
+Example:
+    .. code-block:: bash
+
+        python -m benchmarks.statistic_query --servers 200 --hours 48
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import pathlib
+import random
+import tempfile
+import time
+import typing
+
+START = datetime.datetime(2024, 1, 1)
+STEP_HOURS = 12
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", type=int, default=200, help="Number of servers.")
+    parser.add_argument("--hours", type=int, default=48, help="Hours of history, one ping per minute.")
+    parser.add_argument("--points", type=int, default=300, help="Points of the downsampled series.")
+    parser.add_argument("--queries", type=int, default=100, help="Number of measured queries.")
+    return parser.parse_args()
+
+
+async def measure(query: typing.Callable[[int], typing.Awaitable[typing.Any]], args: argparse.Namespace) -> float:
+    """Average time of the query for a random server, in milliseconds."""
+    servers = [random.randint(1, args.servers) for _ in range(args.queries)]
+    start = time.perf_counter()
+    for server in servers:
+        await query(server)
+    return (time.perf_counter() - start) / args.queries * 1000
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Fill the database step by step and measure both ways."""
+    import alembic.command
+    import alembic.config
+    import sqlalchemy
+
+    from pinger_bot import config, models, ping_storage
+
+    alembic_cfg = alembic.config.Config("pinger_bot/migrations/alembic.ini")
+    alembic_cfg.set_section_option("logger_alembic", "level", "ERROR")
+    await asyncio.get_running_loop().run_in_executor(None, alembic.command.upgrade, alembic_cfg, "head")
+
+    async with models.db.session() as session:
+        await session.execute(
+            sqlalchemy.insert(models.Server),
+            [
+                {"id": i, "host": f"server{i}.example", "port": 25565, "max": 0, "owner": 1}
+                for i in range(1, args.servers + 1)
+            ],
+        )
+        await session.commit()
+
+    print(f"{'history':>7} | {'pings':>5} | {'all, ms':>7} | {'downsampled, ms':>15}")
+    for step in range(0, args.hours, STEP_HOURS):
+        async with models.db.session() as session:
+            await ping_storage.storage.write(
+                session,
+                [
+                    {"server_id": server_id, "time": START + datetime.timedelta(minutes=minute), "players": minute % 50}
+                    for minute in range(step * 60, (step + STEP_HOURS) * 60)
+                    for server_id in range(1, args.servers + 1)
+                ],
+            )
+            await session.commit()
+        now = START + datetime.timedelta(hours=step + STEP_HOURS)
+        since = now - datetime.timedelta(hours=24)
+        tolerance = datetime.timedelta(hours=1)
+
+        async def read_all(server_id: int) -> None:
+            async with models.db.session() as session:
+                rows = await ping_storage.storage.read(
+                    session,
+                    server_id,
+                    since=now - datetime.timedelta(hours=config.config.ping_retention_hours),
+                    until=now,
+                )
+            ping_storage.nearest(ping_storage.Series.from_rows(rows), since, tolerance)
+
+        async def read_plot(server_id: int) -> None:
+            async with models.db.session() as session:
+                await ping_storage.storage.read_plot(session, server_id, since=since, until=now, points=args.points)
+                await ping_storage.storage.nearest(session, server_id, since, tolerance=tolerance)
+
+        pings = min(step + STEP_HOURS, config.config.ping_retention_hours) * 60
+        print(
+            f"{step + STEP_HOURS:>6}h | {pings:>5} | {await measure(read_all, args):>7.2f} |"
+            f" {await measure(read_plot, args):>15.2f}"
+        )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    args = parse_args()
+    path = pathlib.Path(tempfile.mkdtemp(prefix="pinger-bot-benchmark-")) / "db.sqlite3"
+    # must be set before `pinger_bot` is imported
+    os.environ["DB_URI"] = f"sqlite+aiosqlite:///{path}"
+    os.environ.setdefault("VERBOSE", "false")
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
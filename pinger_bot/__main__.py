@@ -1,16 +1,62 @@
 """Main CLI entrypoint."""
+import argparse
+import typing
+
 from structlog import stdlib as structlog
 
-from pinger_bot import bot
+from pinger_bot import config
 from pinger_bot.config import gettext as _
 
 log = structlog.get_logger()
 
 
-def main() -> None:
-    """Run the bot."""
+def parse_args(argv: typing.Optional[typing.Sequence[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments.
+
+    Args:
+        argv: Arguments to parse, default to :data:`sys.argv`.
+
+    Returns:
+        Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="pinger_bot", description=_("Simple discord bot for tracking your Minecraft servers.")
+    )
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("bot", help=_("Run the bot (default)."))
+
+    collector_parser = commands.add_parser(
+        "collector", help=_("Run only the collector of statistic, without connecting to Discord.")
+    )
+    collector_parser.add_argument(
+        "--processes",
+        type=int,
+        default=config.config.collector_processes,
+        help=_("Number of collector's processes. Default to `collector_processes` from the config."),
+    )
+    collector_parser.add_argument("--once", action="store_true", help=_("Collect statistic once and exit."))
+
+    return parser.parse_args(argv)
+
+
+def main(argv: typing.Optional[typing.Sequence[str]] = None) -> None:
+    """Run the bot, or only the collector (``python -m pinger_bot collector``).
+
+    Args:
+        argv: Command line arguments, default to :data:`sys.argv`.
+    """
+    args = parse_args(argv)
     log.info(_("Hello World!"))
-    bot.PingerBot.run()
+
+    # import only what the command needs: the bot imports `hikari`, the collector - database and pinging modules
+    if args.command == "collector":
+        from pinger_bot import collector
+
+        collector.main(args.processes, once=args.once)
+    else:
+        from pinger_bot import bot
+
+        bot.PingerBot.run()
 
 
 if __name__ == "__main__":
@@ -1,12 +1,10 @@
 """Main file to initialise bot object."""
-import logging
 import os
 import pathlib
 
 import hikari
 import lightbulb
 import structlog.stdlib
-from honeybadger import honeybadger
 
 from pinger_bot import config
 from pinger_bot.config import gettext as _
@@ -66,13 +64,8 @@ class PingerBot(lightbulb.BotApp):
 
     @staticmethod
     def handle_debug_options() -> None:
-        """Handle and activate some debug options."""
-        logging.basicConfig(level=logging.DEBUG if config.config.debug else logging.WARNING, force=True)
-        structlog.configure(
-            wrapper_class=structlog.make_filtering_bound_logger(
-                logging.DEBUG if config.config.verbose else logging.INFO
-            )
-        )
+        """Handle and activate some debug options. See :func:`pinger_bot.config.setup_logging`."""
+        config.setup_logging()
 
         # debug-log after configuring logger
         log.debug("PingerBot.handle_debug_options", debug=config.config.debug, verbose=config.config.verbose)
@@ -89,6 +82,9 @@ class PingerBot(lightbulb.BotApp):
         )
 
         if config.config.honeybadger_token is not None:
+            # import it only when it is configured
+            from honeybadger import honeybadger
+
             honeybadger.configure(
                 api_key=config.config.honeybadger_token,
                 environment="production" if is_production else "development",
@@ -0,0 +1,214 @@
+"""Collector, which is split between several processes, to use all CPU cores.
+
+It can run inside the bot (see :attr:`~pinger_bot.config.Config.collector_processes`), or standalone, without
+connecting to Discord, with ``python -m pinger_bot collector`` (see :func:`.main`).
+
+Servers are split by ID (``id % processes``), so every server is always pinged by the same process, and its
+in-memory state (learned protocol, backoff, caches) stays there. Every process has its own event loop, loads
+only its part of :data:`pinger_bot.registry.servers` and writes its own pings to the database.
+
+If :attr:`~pinger_bot.config.Config.collector_leases` is enabled, servers are split by leases in the database
+instead (see :mod:`pinger_bot.leases`), so several collectors on different machines can share them too.
+"""
+import asyncio
+import functools
+import multiprocessing
+import multiprocessing.process
+import typing
+
+from apscheduler.schedulers import asyncio as apscheduler_asyncio
+from structlog import stdlib as structlog
+
+from pinger_bot import config, leases, registry
+from pinger_bot.config import gettext as _
+
+log = structlog.get_logger()
+
+
+async def load(index: int, shards: int, *, sync: bool = True) -> None:
+    """Reload this process' part of :data:`pinger_bot.registry.servers`.
+
+    Servers are reloaded periodically, so added by commands in the bot's process are also pinged.
+
+    Args:
+        index: Index of the process, from ``0`` to ``shards - 1``.
+        shards: Number of the processes.
+        sync: With :attr:`~pinger_bot.config.Config.collector_leases`, renew leases before loading. Otherwise,
+            partitions from the last sync are loaded.
+    """
+    if config.config.collector_leases:
+        owned = await leases.manager.sync() if sync else leases.manager.partitions
+        await registry.servers.load(partitions=(owned, config.config.lease_partitions))
+    else:
+        await registry.servers.load(shard=(index, shards))
+    log.info(_("Loaded servers in process {}/{}.").format(index + 1, shards), servers=len(registry.servers))
+
+
+async def renew(index: int, shards: int) -> None:
+    """Renew leases, and reload servers right away, if leased partitions changed.
+
+    So servers of partitions, which are taken over from a dead collector, are pinged from the next slot,
+    not from the next :attr:`~pinger_bot.config.Config.ping_interval`.
+
+    Args:
+        index: Index of the process, from ``0`` to ``shards - 1``.
+        shards: Number of the processes.
+    """
+    partitions = leases.manager.partitions
+    if await leases.manager.sync() != partitions:
+        await load(index, shards, sync=False)
+
+
+async def tick(index: int, shards: int, *, slots: typing.Optional[typing.Collection[int]] = None) -> None:
+    """One run of the collector in one process.
+
+    Servers are reloaded (see :func:`.load`) before the whole run and before the first slot of the interval,
+    so once per :attr:`~pinger_bot.config.Config.ping_interval`.
+
+    Args:
+        index: Index of the process, from ``0`` to ``shards - 1``.
+        shards: Number of the processes.
+        slots: Absolute numbers of :class:`~pinger_bot.ext.scheduling.TimingWheel` slots to run. :obj:`None` to
+            ping all servers.
+    """
+    # it imports SQLAlchemy, numpy and mcstatus, which the parent process doesn't need, so import it only when needed
+    from pinger_bot.ext import scheduling
+
+    if slots is None or any(slot % config.config.ping_slots == 0 for slot in slots):
+        await load(index, shards)
+
+    if config.config.collector_leases:
+        # leases can change between reloads, so servers of lost partitions are not pinged twice
+        partitions = (leases.manager.partitions, config.config.lease_partitions)
+        await scheduling.collect_info_for_statistic(partitions=partitions, slots=slots)
+    else:
+        # old pings are deleted once, not by every process
+        await scheduling.collect_info_for_statistic(cleanup=index == 0, slots=slots)
+
+
+async def run_shard(index: int, shards: int, *, once: bool = False) -> None:
+    """Run the collector for one part of the servers.
+
+    Args:
+        index: Index of the process, from ``0`` to ``shards - 1``.
+        shards: Number of the processes.
+        once: Ping all servers once and exit, instead of running :class:`~pinger_bot.ext.scheduling.TimingWheel`.
+    """
+    if once:
+        await tick(index, shards)
+        return
+
+    from pinger_bot.ext import scheduling  # for the same reason, as in `tick`
+
+    await load(index, shards)
+    wheel = scheduling.TimingWheel(functools.partial(tick, index, shards))
+    scheduler = apscheduler_asyncio.AsyncIOScheduler()
+    scheduler.add_job(
+        wheel.advance,
+        "interval",
+        seconds=scheduling.TimingWheel.slot_length(),
+        start_date=scheduling.TimingWheel.start_date(),
+        max_instances=config.config.ping_slots,
+    )
+    if config.config.collector_leases:
+        scheduler.add_job(renew, "interval", args=(index, shards), seconds=config.config.lease_ttl / 3)
+    scheduler.start()
+    try:
+        await asyncio.Event().wait()  # run forever, scheduler does the job
+    finally:
+        scheduler.shutdown()
+        await scheduling.writer.close()
+        if config.config.collector_leases:  # let other collectors take our servers right away
+            await leases.manager.release()
+
+
+def _process_main(index: int, shards: int, once: bool) -> None:
+    """Entrypoint of one collector's process.
+
+    Args:
+        index: Index of the process, from ``0`` to ``shards - 1``.
+        shards: Number of the processes.
+        once: Run only one tick and exit.
+    """
+    config.setup_logging()
+    try:
+        asyncio.run(run_shard(index, shards, once=once))
+    except KeyboardInterrupt:
+        pass
+
+
+def start(processes: int, *, once: bool = False) -> typing.List[multiprocessing.process.BaseProcess]:
+    """Start collector's processes.
+
+    They are started with ``spawn`` method, so they don't inherit event loop and connections of the parent.
+
+    Args:
+        processes: Number of the processes.
+        once: Run only one tick in every process and exit.
+
+    Returns:
+        Started processes, you can wait them with :func:`.join`.
+    """
+    log.info(_("Starting {} collector processes.").format(processes))
+    context = multiprocessing.get_context("spawn")
+    started: typing.List[multiprocessing.process.BaseProcess] = []
+    for index in range(processes):
+        process = context.Process(  # type: ignore[attr-defined] # mypy doesn't know about context's attributes
+            target=_process_main, args=(index, processes, once), name=f"collector-{index}", daemon=True
+        )
+        process.start()
+        started.append(process)
+    return started
+
+
+def join(processes: typing.Iterable[multiprocessing.process.BaseProcess]) -> None:
+    """Wait for the processes to finish. If waiting is interrupted, terminate them.
+
+    Args:
+        processes: Processes from :func:`.start`.
+    """
+    processes = list(processes)
+    try:
+        for process in processes:
+            process.join()
+    finally:
+        stop(processes)
+
+
+def stop(processes: typing.Iterable[multiprocessing.process.BaseProcess]) -> None:
+    """Terminate processes, which are still running.
+
+    Args:
+        processes: Processes from :func:`.start`.
+    """
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+
+def run(processes: int, *, once: bool = False) -> None:
+    """Start collector's processes and wait for them.
+
+    Args:
+        processes: Number of the processes.
+        once: Run only one tick in every process and exit.
+    """
+    join(start(processes, once=once))
+
+
+def main(processes: int, *, once: bool = False) -> None:
+    """Entrypoint of the standalone collector (``python -m pinger_bot collector``).
+
+    It doesn't connect to Discord, so it can be scaled, restarted and profiled independently of the bot.
+    Disable :attr:`~pinger_bot.config.Config.run_collector` in the bot, so servers are not pinged twice.
+
+    Args:
+        processes: Number of the processes. If it is ``1``, the collector runs in the current process.
+        once: Run only one tick and exit.
+    """
+    log.info(_("Running standalone collector."), processes=processes, once=once)
+    if processes > 1:
+        run(processes, once=once)
+    else:
+        _process_main(0, 1, once)
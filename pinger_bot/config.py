@@ -1,11 +1,13 @@
 """File for the Config dataclass."""
 import dataclasses
 import gettext as gettext_orig
+import logging
 import os
 import pathlib
 import typing as t
 
 import omegaconf
+import structlog
 from omegaconf import dictconfig
 
 BASE_DIR = pathlib.Path(__file__).parent.parent
@@ -34,6 +36,136 @@ class Config:
     """DB_URI to connect."""
     ping_interval: int = 5
     """Interval between pings, for collecting statistic of the server. In minutes."""
+    ping_slots: int = 60
+    """Into how many slots :attr:`.ping_interval` is split. Every server is pinged in its own slot, so pings are spread
+    over the interval instead of coming all at once. ``1`` pings all servers at the same time."""
+    adaptive_intervals: bool = False
+    """Adapt interval between pings of every online server, to how much its online players change.
+
+    Volatile or popular servers are pinged more often (up to :attr:`.ping_interval_min`), and ones where
+    nothing changes less often (up to :attr:`.ping_interval_max`). If disabled, every server is pinged every
+    :attr:`.ping_interval`. Disabled by default, so updating the bot doesn't change how often servers are pinged.
+    """
+    ping_interval_min: float = 1.0
+    """Minimal interval between pings of a volatile or popular server, with :attr:`.adaptive_intervals`. In minutes."""
+    ping_interval_max: float = 30.0
+    """Maximal interval between pings of a server without changes, with :attr:`.adaptive_intervals`. In minutes."""
+    adaptive_volatility: float = 0.1
+    """Relative change of online players between two pings, from which the server is pinged twice as often.
+
+    Server without any change is pinged twice as rarely.
+    """
+    adaptive_popular_players: int = 100
+    """Servers with at least this many online players are never pinged less often than :attr:`.ping_interval`."""
+    ping_changes_only: bool = False
+    """Store a ping only when online players changed, or :attr:`.ping_heartbeat` passed since the last stored one.
+
+    Most servers keep the same online for a long time, so this stores much less pings. Plots stay the same,
+    but averages of rollups (see :mod:`pinger_bot.rollups`) are then taken over stored pings only.
+    """
+    ping_heartbeat: float = 30.0
+    """With :attr:`.ping_changes_only`, the ping is stored at least this often, even without changes. In minutes."""
+    ping_workers: int = 100
+    """How many servers can be pinged at the same time, while collecting statistic."""
+    write_batch_size: int = 500
+    """After how many pinged servers their results are written to the database, in one short transaction."""
+    write_flush_interval: float = 1.0
+    """Results are written at least this often, even if :attr:`.write_batch_size` is not reached. In seconds."""
+    write_queue_size: int = 5000
+    """How many pinged servers can wait for writing. If the database is slower, pings wait for it."""
+    ping_partition_hours: int = 6
+    """Length of one partition of pings, in hours. See :mod:`pinger_bot.ping_storage`."""
+    ping_retention_hours: int = 26
+    """For how long pings are stored, in hours. Expired pings are dropped with their whole partition."""
+    ping_blocks: bool = False
+    """Pack closed partitions of pings into compressed blocks, one per server, and drop the partitions.
+
+    Blocks take a few bytes per ping instead of a row. See :mod:`pinger_bot.ping_blocks`.
+    """
+    rollup_hourly_retention_days: int = 35
+    """For how long hourly aggregates of pings are stored, in days. See :mod:`pinger_bot.rollups`."""
+    rollup_daily_retention_days: int = 400
+    """For how long daily aggregates of pings are stored, in days. See :mod:`pinger_bot.rollups`."""
+    plot_points: int = 300
+    """At most how many points are on the plot of raw pings in ``/statistic``. Pings are averaged in the database."""
+    plot_processes: int = 2
+    """How many processes render plots for ``/statistic``, so rendering doesn't block the bot. See :mod:`pinger_bot.plots`.
+
+    ``0`` renders them in a thread of the bot's process.
+    """
+    plot_backend: str = "sparkline"
+    """What draws plots: ``sparkline`` (fast and light, see :mod:`pinger_bot.sparkline`) or ``matplotlib``."""
+    plot_font: t.Optional[str] = None
+    """Path to TrueType font of text on plots of ``sparkline`` backend. It must have letters of your language.
+
+    Default to DejaVu Sans from data of matplotlib (which is installed anyway), it has Latin and Cyrillic letters.
+    """
+    plot_timeout: float = 10.0
+    """How long ``/statistic`` waits for the plot, including waiting for a free process. In seconds."""
+    plot_cache_bytes: int = 32 * 1024 * 1024
+    """How many bytes of rendered plots are cached, so the same plot is not rendered again until new pings come."""
+    plot_prerender: int = 0
+    """How many most requested plots are rendered again, right after their servers are pinged by the bot's collector.
+
+    So ``/statistic`` for them is answered from the cache. ``0`` to disable.
+    """
+    ping_chunk_size: int = 500
+    """How many servers are loaded from the database at once, while loading :data:`pinger_bot.registry.servers`."""
+    backoff_after: int = 3
+    """After how many failed pings in a row, the server is pinged less often (every 2nd, 4th, 8th... time)."""
+    backoff_max_ticks: int = 12
+    """Offline server is pinged at least every ``backoff_max_ticks`` time. With default ``ping_interval`` - hourly."""
+    failed_ping_cache_ttl: int = 30
+    """For how long failed ping is remembered, so commands against offline server answer instantly. In seconds."""
+    dns_max_in_flight: int = 64
+    """Maximum number of DNS queries, which are sent at the same time."""
+    dns_failure_ttl: int = 30
+    """For how long failed DNS query (like ``NXDOMAIN``) is cached. Successful ones are cached for their TTL."""
+    protocol_fallback_after: int = 3
+    """After how many failed pings in a row with known protocol, we again try both Java and Bedrock."""
+    protocol_head_start: float = 0.5
+    """How long the likely protocol of unknown server is pinged alone, before we also try another one. In seconds."""
+    status_fresh_for: float = 0
+    """How long a successful ping is reused for the same server, instead of pinging it again. In seconds.
+
+    Concurrent pings of the same server are always collapsed into one, this option also reuses the result a bit
+    after the ping finished. ``0`` to disable.
+    """
+    resolve_cache_size: t.Optional[int] = None
+    """How many resolved addresses of the tracked servers are cached.
+
+    ``None`` to size it automatically from the number of tracked servers.
+    """
+    resolve_hot_cache_size: int = 256
+    """How many resolved addresses of other servers (pinged by commands) are cached.
+
+    They are kept separately, so pinging all tracked servers can't evict them.
+    """
+    resolve_cache_ttl: int = 3600
+    """How long resolved addresses are cached. In seconds."""
+    run_collector: bool = True
+    """Collect statistic in the bot. Disable it, if you run ``python -m pinger_bot collector`` separately."""
+    collector_processes: int = 1
+    """How many processes collect statistic. If more than one, servers are split between them by ID.
+
+    Every process has its own event loop and writes its own pings to the database.
+    """
+    collector_leases: bool = False
+    """Share servers between several collectors (bot replicas, collector's processes) through leases in database.
+
+    Enable it, if you run more than one bot or ``python -m pinger_bot collector`` on the same database.
+    See :mod:`pinger_bot.leases`.
+    """
+    lease_partitions: int = 64
+    """Into how many partitions servers are split, when :attr:`.collector_leases` is enabled."""
+    lease_ttl: int = 90
+    """For how long a lease is valid, if it is not renewed. In seconds. Leases are renewed 3 times in this time."""
+    lease_max_partitions: t.Optional[int] = None
+    """How many partitions one collector can own at most, ``None`` for no limit.
+
+    Without it, the first collector owns everything, until others sync. Partitions over
+    ``lease_max_partitions * collectors`` are not pinged at all, so don't set it too low.
+    """
     honeybadger_token: t.Optional[str] = None
     """Token for Honeybadger.io. If you don't have it, just leave it as ``None``."""
 
@@ -41,7 +173,7 @@ class Config:
     def setup(cls) -> "Config":
         """Set up the config.
 
-        It is just load config from file, also it is rewrite config with merged data.
+        It is just load config from file, also it is rewrite config with merged data, if it differs from the file.
 
         Returns:
             :py:class:`.Config` instance.
@@ -53,8 +185,11 @@ class Config:
             loaded_config = omegaconf.OmegaConf.load(config_path)
             cfg = omegaconf.OmegaConf.merge(cfg, loaded_config)
 
-        with open(config_path, "w") as config_file:
-            omegaconf.OmegaConf.save(cfg, config_file)
+        # write only if something changed, so several processes (see :mod:`pinger_bot.collector`)
+        # don't rewrite the file, while others read it
+        merged_yaml = omegaconf.OmegaConf.to_yaml(cfg)
+        if not config_path.exists() or config_path.read_text() != merged_yaml:
+            config_path.write_text(merged_yaml)
 
         cls._handle_env_variables(cfg)
 
@@ -91,3 +226,14 @@ Examples:
 
     Will print ``Hello World!``, ``Привет Мир!`` or ``Привіт Світ!``, depending on :py:attr:`.Config.locale` option.
 """
+
+
+def setup_logging() -> None:
+    """Configure logging from :attr:`.Config.debug` and :attr:`.Config.verbose` options.
+
+    It doesn't need ``hikari``, so collector's processes (see :mod:`pinger_bot.collector`) call it directly.
+    """
+    logging.basicConfig(level=logging.DEBUG if config.debug else logging.WARNING, force=True)
+    structlog.configure(
+        wrapper_class=structlog.make_filtering_bound_logger(logging.DEBUG if config.verbose else logging.INFO)
+    )
@@ -0,0 +1,146 @@
+"""Shared DNS resolver with cache, which honours TTL of the records."""
+import asyncio
+import dataclasses
+import functools
+import time
+import typing
+
+import cachetools
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+from dns.rdatatype import RdataType as DNSRdataType
+from structlog import stdlib as structlog
+
+from pinger_bot import config
+
+log = structlog.get_logger()
+
+_Key = typing.Tuple[str, DNSRdataType]
+
+
+@dataclasses.dataclass
+class ResolverStats:
+    """Counters of the :class:`.CachingResolver`, so we can see how much queries were saved."""
+
+    hits: int = 0
+    """Answers (or failures) returned from the cache."""
+    misses: int = 0
+    """Queries actually sent to DNS server."""
+    coalesced: int = 0
+    """Queries which waited for the same query already in flight, instead of sending a new one."""
+    failures: int = 0
+    """Queries, which failed (``NXDOMAIN``, timeout etc.)."""
+
+
+@dataclasses.dataclass
+class _CacheEntry:
+    """One cached answer or failure."""
+
+    expires: float
+    """:func:`time.monotonic` time, when entry expires."""
+    answer: typing.Optional[dns.resolver.Answer] = None
+    """Answer, if query was successful."""
+    error: typing.Optional[dns.exception.DNSException] = None
+    """Exception, if query failed."""
+
+
+class CachingResolver:
+    """Async DNS resolver, shared by all pings.
+
+    - Answers are cached for their TTL, failures (like ``NXDOMAIN``) -
+      for :attr:`~pinger_bot.config.Config.dns_failure_ttl` seconds.
+    - Identical queries in flight are collapsed into one.
+    - No more than :attr:`~pinger_bot.config.Config.dns_max_in_flight` queries are sent at once.
+
+    Args:
+        max_entries: Maximum number of cached answers.
+    """
+
+    def __init__(self, max_entries: int = 16384) -> None:
+        self._cache: "cachetools.LRUCache[_Key, _CacheEntry]" = cachetools.LRUCache(max_entries)
+        self._in_flight: "typing.Dict[_Key, asyncio.Task[dns.resolver.Answer]]" = {}
+        self._semaphore: typing.Optional[asyncio.Semaphore] = None
+        self.stats = ResolverStats()
+        """Counters of the resolver."""
+
+    def clear(self) -> None:
+        """Clear the cache and reset counters.
+
+        The limit of queries in flight is also created again, as it is bound to the event loop, where it was used.
+        """
+        self._cache.clear()
+        self._semaphore = None
+        self.stats = ResolverStats()
+
+    async def resolve(self, name: str, rdtype: DNSRdataType) -> dns.resolver.Answer:
+        """Resolve the name, using cache if possible.
+
+        Args:
+            name: Domain to query.
+            rdtype: Type of the record, like ``A`` or ``SRV``.
+
+        Returns:
+            Answer from DNS server (maybe cached).
+
+        Raises:
+            dns.exception.DNSException: If query failed (maybe cached).
+        """
+        key = (name.lower().rstrip("."), rdtype)
+        entry = self._cache.get(key)
+        if entry is not None and entry.expires > time.monotonic():
+            self.stats.hits += 1
+            if entry.error is not None:
+                raise entry.error.with_traceback(None)
+            return typing.cast(dns.resolver.Answer, entry.answer)
+
+        task = self._in_flight.get(key)
+        if task is None:
+            self.stats.misses += 1
+            task = self._in_flight[key] = asyncio.create_task(self._query(key))
+            task.add_done_callback(functools.partial(self._forget, key))
+        else:
+            self.stats.coalesced += 1
+
+        # shield, so if one caller is cancelled, the query is still finished for others
+        return await asyncio.shield(task)
+
+    async def _query(self, key: _Key) -> dns.resolver.Answer:
+        """Actually send the query, and cache its result.
+
+        Args:
+            key: Normalized domain and type of the record.
+
+        Returns:
+            Answer from DNS server.
+        """
+        if self._semaphore is None:  # create it lazily, to be bound to the running event loop
+            self._semaphore = asyncio.Semaphore(config.config.dns_max_in_flight)
+
+        async with self._semaphore:
+            try:
+                answer = await dns.asyncresolver.resolve(*key)
+            except dns.exception.DNSException as exception:
+                log.debug("CachingResolver._query failed", name=key[0], rdtype=key[1], error=exception)
+                self.stats.failures += 1
+                self._cache[key] = _CacheEntry(time.monotonic() + config.config.dns_failure_ttl, error=exception)
+                raise
+
+        ttl = answer.rrset.ttl if answer.rrset is not None else config.config.dns_failure_ttl
+        self._cache[key] = _CacheEntry(time.monotonic() + ttl, answer=answer)
+        return answer
+
+    def _forget(self, key: _Key, task: "asyncio.Task[dns.resolver.Answer]") -> None:
+        """Remove finished query from in-flight ones.
+
+        Args:
+            key: Normalized domain and type of the record.
+            task: Finished task of the query.
+        """
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # mark exception as retrieved, even if all callers were cancelled
+
+
+resolver = CachingResolver()
+"""Initialized :class:`.CachingResolver` object."""
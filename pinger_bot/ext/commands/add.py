@@ -6,7 +6,7 @@ from lightbulb import commands
 from lightbulb.context import slash
 from structlog import stdlib as structlog
 
-from pinger_bot import bot, mc_api, models
+from pinger_bot import bot, mc_api, models, registry
 from pinger_bot.config import gettext as _
 from pinger_bot.ext import commands as pinger_commands
 
@@ -70,12 +70,16 @@ async def add(ctx: slash.SlashContext, ip: str) -> None:
 
     try:
         async with models.db.session() as session:
-            session.add(
-                models.Server(
-                    host=server.address.host, port=server.address.port, max=server.players.online, owner=ctx.author.id
-                )
+            db_server = models.Server(
+                host=server.address.host,
+                port=server.address.port,
+                max=server.players.online,
+                owner=ctx.author.id,
+                java=server.address.java,
             )
+            session.add(db_server)
             await session.commit()
+        registry.servers.add(registry.ServerRecord.from_model(db_server))
         log.debug(_("Added server {}").format(server.address.display_ip))
     except sqlalchemy.exc.IntegrityError:  # server already added
         log.debug(_("Server {} already added").format(server.address.display_ip))
@@ -6,7 +6,7 @@ from lightbulb import commands
 from lightbulb.context import slash
 from structlog import stdlib as structlog
 
-from pinger_bot import bot, mc_api, models
+from pinger_bot import bot, mc_api, models, registry
 from pinger_bot.config import gettext as _
 from pinger_bot.ext import commands as pinger_commands
 
@@ -105,13 +105,7 @@ async def alias_cmd(ctx: slash.SlashContext, ip: str, alias: str) -> None:
         log.debug(_("Failed ping for {}").format(server.address.display_ip))
         row = None
     else:
-        async with models.db.session() as session:
-            db_server = await session.execute(
-                sqlalchemy.select(models.Server.id, models.Server.owner)
-                .where(models.Server.host == server.address.host)
-                .where(models.Server.port == server.address.port)
-            )
-        row = db_server.first()
+        row = registry.servers.by_address(server.address.host, server.address.port)
         log.debug(_("Server {} in DB {}").format(server.address.display_ip, row))
 
     if row is None or isinstance(
@@ -134,6 +128,7 @@ async def alias_cmd(ctx: slash.SlashContext, ip: str, alias: str) -> None:
                 sqlalchemy.update(models.Server).where(models.Server.id == row.id).values(alias=alias)
             )
             await session.commit()
+        registry.servers.update(row.id, alias=alias)
         log.debug(_("Server {}'s alias changed to {}").format(server.address.display_ip, alias))
     except sqlalchemy.exc.IntegrityError:
         log.debug(_("Failed add alias for {}.").format(server.address.display_ip) + _("Alias already exists."))
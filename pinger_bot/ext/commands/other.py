@@ -21,7 +21,7 @@ from lightbulb import commands
 from lightbulb.context import slash
 from structlog import stdlib as structlog
 
-from pinger_bot import bot, mc_api, models
+from pinger_bot import bot, mc_api, models, registry
 from pinger_bot.config import gettext as _
 
 log = structlog.get_logger()
@@ -135,15 +135,7 @@ async def who_owner(ctx: slash.SlashContext, ip: str) -> None:
     else:
         address = await mc_api.Address.resolve(ip, java=True)
 
-    async with models.db.session() as session:
-        server = (
-            await session.scalars(
-                sqlalchemy.select(models.Server)
-                .where(models.Server.host == address.host)
-                .where(models.Server.port == address.port)
-            )
-        ).first()
-
+    server = registry.servers.by_address(address.host, address.port)
     if server is None:
         log.debug(_("Failed get server '{}' from database").format(address.display_ip))
         await ctx.respond(
@@ -252,6 +244,9 @@ async def sql_cmd(ctx: slash.SlashContext, sql: str, commit: str) -> None:
         if commit:
             await session.commit()
 
+    if commit:  # statement could change servers, so reload them
+        await registry.servers.load()
+
     try:
         message = "```json\n" + json.dumps([dict(row) for row in result.all()], indent=2) + "\n```"
     except sqlalchemy.exc.ResourceClosedError:
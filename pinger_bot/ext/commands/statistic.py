@@ -1,19 +1,28 @@
 """Module for the ``statistic`` command."""
+import asyncio
+import dataclasses
 import datetime
-import io
+import functools
 import typing
 
 import lightbulb
-import matplotlib.dates
-import matplotlib.figure
-import matplotlib.pyplot
 import sqlalchemy
-from hikari import embeds
+from hikari import embeds, files
 from lightbulb import commands
 from lightbulb.context import slash
+from sqlalchemy.ext import asyncio as sqlalchemy_asyncio
 from structlog import stdlib as structlog
 
-from pinger_bot import bot, mc_api, models
+from pinger_bot import (
+    bot,
+    config,
+    mc_api,
+    models,
+    ping_blocks,
+    ping_storage,
+    registry,
+    rollups,
+)
 from pinger_bot.config import gettext as _
 from pinger_bot.ext import commands as pinger_commands
 
@@ -23,6 +32,29 @@ plugin = lightbulb.Plugin("statistic")
 """:class:`lightbulb.Plugin <lightbulb.plugins.Plugin>` object."""
 
 
+@dataclasses.dataclass(frozen=True)
+class PlotRange:
+    """Time range of the plot, and where its points are taken from."""
+
+    length: datetime.timedelta
+    """How far back the plot goes."""
+    tier: typing.Optional[rollups.Tier]
+    """Rollups (see :mod:`pinger_bot.rollups`) for the plot, :obj:`None` for raw pings."""
+    date_format: str
+    """Format of labels on the time axis."""
+
+
+RANGES: typing.Dict[str, PlotRange] = {
+    "24h": PlotRange(datetime.timedelta(hours=24), None, "%H:%M"),
+    "7d": PlotRange(datetime.timedelta(days=7), rollups.HOURLY, "%d.%m"),
+    "30d": PlotRange(datetime.timedelta(days=30), rollups.HOURLY, "%d.%m"),
+    "365d": PlotRange(datetime.timedelta(days=365), rollups.DAILY, "%m.%Y"),
+}
+"""Choices of the ``range`` option. Long ranges are read from rollups, so they are a few hundred rows at most."""
+MIN_SAMPLES = 20
+"""Plot is drawn only if there are more pings (or rollups) than this."""
+
+
 async def get_not_in_db_embed(ip: str) -> embeds.Embed:
     """Get the embed when a server not in database.
 
@@ -42,106 +74,181 @@ async def get_not_in_db_embed(ip: str) -> embeds.Embed:
     return embed
 
 
-async def get_yesterday_ping(pings: typing.List[models.Ping]) -> typing.Optional[models.Ping]:
-    """Get the ping from yesterday.
+async def get_yesterday_online(session: sqlalchemy_asyncio.AsyncSession, server_id: int) -> typing.Optional[int]:
+    """Get online players from yesterday, in the same time.
 
-    Yesterday - it is period between 23-25 hours.
+    Pings are a step function: online players stay the same until the next ping (with
+    :attr:`~pinger_bot.config.Config.ping_changes_only` only changes are stored). So it is the last ping
+    before 24 hours ago, if it is not older than 25 hours, or else the first ping until 23 hours ago.
 
     Args:
-        pings: List of server's :class:`pings <pinger_bot.models.Ping>`.
+        session: Session to use.
+        server_id: :attr:`pinger_bot.models.Server.id` of the server.
 
     Returns:
-        :class:`~pinger_bot.models.Ping` or :obj:`None` if no yesterday ping.
+        Online players or :obj:`None` if no yesterday ping.
     """
-    yesterday_25h = datetime.datetime.now() - datetime.timedelta(hours=25)
-    yesterday_23h = datetime.datetime.now() - datetime.timedelta(hours=23)
-    yesterday_ping: typing.Optional[models.Ping] = None
-    for ping in pings:  # search pings in range 23-25 hours ago
-        if yesterday_23h > ping.time > yesterday_25h:
-            yesterday_ping = ping
-    return yesterday_ping
+    ping = await ping_blocks.store.nearest(
+        session,
+        server_id,
+        datetime.datetime.now() - datetime.timedelta(hours=24),
+        tolerance=datetime.timedelta(hours=1),
+    )
+    return ping[1] if ping is not None else None
+
 
+async def get_max_online(session: sqlalchemy_asyncio.AsyncSession, server: registry.ServerRecord) -> int:
+    """Get the record of online players from the database, and update it in the registry.
 
-async def create_plot(pings: typing.List[models.Ping], ip: str) -> matplotlib.figure.Figure:
-    """Create plot for the server.
+    Collectors in other processes (see :mod:`pinger_bot.collector`) update the record only in the database,
+    so the registry's copy can be outdated.
 
     Args:
-        pings: List of server's :class:`pings <pinger_bot.models.Ping>`.
-        ip: IP of the server, which referenced in text. Better set it to :attr:`~pinger_bot.mc_api.Address.display_ip`.
+        session: Session to use.
+        server: The server from :data:`pinger_bot.registry.servers`.
 
     Returns:
-        :class:`~matplotlib.figure.Figure` object.
+        Max online players of all time.
     """
-    online: typing.List[int] = []
-    time: typing.List[datetime.datetime] = []
-    for ping in pings:
-        online.append(ping.players)
-        time.append(ping.time)
+    max_players: typing.Optional[int] = await session.scalar(
+        sqlalchemy.select(models.Server.max).where(models.Server.id == server.id)
+    )
+    if max_players is None:  # removed in the meantime
+        return server.max
+    registry.servers.update(server.id, max=max_players)
+    return max_players
 
-    figure, axes = matplotlib.pyplot.subplots()
-    axes.xaxis.set_major_formatter(matplotlib.dates.DateFormatter("%H:%M"))
-    axes.plot(time, online)
 
-    axes.set_xlabel(_("Time"))
-    axes.set_ylabel(_("Players online"))
-    axes.set_title(_("{} statistic").format(ip))
+async def get_points(
+    session: sqlalchemy_asyncio.AsyncSession, server_id: int, plot_range: PlotRange
+) -> ping_storage.Series:
+    """Get points of the plot: downsampled pings (see :meth:`pinger_bot.ping_blocks.BlockStore.read_plot`) or rollups.
 
-    return figure
+    Args:
+        session: Session to use.
+        server_id: :attr:`pinger_bot.models.Server.id` of the server.
+        plot_range: Range of the plot.
+    """
+    since = datetime.datetime.now() - plot_range.length
+    if plot_range.tier is None:
+        return await ping_blocks.store.read_plot(session, server_id, since=since, points=config.config.plot_points)
+    return ping_storage.Series.from_rows(await rollups.read(session, server_id, plot_range.tier, since=since))
 
 
-async def transform_figure_to_bytes(figure: matplotlib.figure.Figure) -> io.BytesIO:
-    """Transform :class:`~matplotlib.figure.Figure` to :class:`~io.BytesIO`.
+async def create_plot(pings: ping_storage.Series, ip: str, plot_range: PlotRange = RANGES["24h"]) -> bytes:
+    """Create plot for the server. It is rendered in :data:`pinger_bot.plots.renderer`, outside of the event loop.
 
     Args:
-        figure: :class:`~matplotlib.figure.Figure` of the plot.
+        pings: Server's pings from :meth:`pinger_bot.ping_blocks.BlockStore.read_plot`, or rollups from
+            :func:`pinger_bot.rollups.read`, if ``plot_range`` uses them. For rollups, area between minimal and
+            maximal online is filled too.
+        ip: IP of the server, which referenced in text. Better set it to :attr:`~pinger_bot.mc_api.Address.display_ip`.
+        plot_range: Range of the plot.
 
     Returns:
-        :class:`~io.BytesIO` object.
+        PNG image.
+
+    Raises:
+        asyncio.TimeoutError: If the plot isn't rendered in :attr:`~pinger_bot.config.Config.plot_timeout`.
     """
-    buffer = io.BytesIO()
-    figure.savefig(buffer, format="png")
-    buffer.seek(0)
-    return buffer
+    from pinger_bot import plots  # see :func:`.get_plot`
+
+    return await plots.renderer.render(
+        plots.Plot(
+            times=pings.times,
+            players=pings.players,
+            min=pings.min,
+            max=pings.max,
+            title=_("{} statistic").format(ip),
+            xlabel=_("Time"),
+            ylabel=_("Players online"),
+            date_format=plot_range.date_format,
+        )
+    )
+
+
+async def get_plot(
+    points: ping_storage.Series, server_id: int, ip: str, range_name: str, *, request: bool = True
+) -> bytes:
+    """Get plot from :data:`pinger_bot.plots.cache`, or create it with :func:`.create_plot`.
+
+    Args:
+        points: Points from :func:`.get_points`, there must be at least one.
+        server_id: :attr:`pinger_bot.models.Server.id` of the server.
+        ip: IP of the server, which referenced in text.
+        range_name: Key of :data:`.RANGES`.
+        request: Count it as request of a user (see :attr:`pinger_bot.plots.PlotCache.requests`).
+
+    Returns:
+        PNG image.
+
+    Raises:
+        asyncio.TimeoutError: If the plot isn't rendered in :attr:`~pinger_bot.config.Config.plot_timeout`.
+    """
+    # imported on use, so loading of the extension doesn't wait for it, it is imported when the bot is started
+    from pinger_bot import plots
+
+    key = plots.PlotKey(server_id, ip, range_name, points.times[-1].item(), points.samples)
+    return await plots.cache.get(key, functools.partial(create_plot, points, ip, RANGES[range_name]), request=request)
+
+
+async def prerender(limit: int, *, due: typing.Callable[[int], bool] = lambda server_id: True) -> None:
+    """Render the most requested plots, so ``/statistic`` answers them from the cache.
+
+    Only changed plots are rendered, others are already in the cache.
+
+    Args:
+        limit: How many of the most requested plots to render.
+        due: Render only plots of servers, for which it returns :obj:`True` (like just pinged ones).
+    """
+    from pinger_bot import plots  # see :func:`.get_plot`
+
+    checked = 0
+    for server_id, ip, range_name in plots.cache.popular(limit):
+        if not due(server_id) or registry.servers.get(server_id) is None:
+            continue
+        checked += 1
+        async with models.db.session() as session:
+            points = await get_points(session, server_id, RANGES[range_name])
+        if points.samples <= MIN_SAMPLES:
+            continue
+        try:
+            await get_plot(points, server_id, ip, range_name, request=False)
+        except asyncio.TimeoutError:
+            log.debug("prerender timeout", server_id=server_id, range=range_name)
+    # it runs after every slot of the wheel, so it is not logged as info
+    log.debug("prerender", checked=checked, plot_cache=plots.cache.summary())
 
 
 @plugin.command
+@lightbulb.option("range", _("Time range of the plot."), type=str, choices=list(RANGES), default="24h")
 @lightbulb.option("ip", _("The IP address of the server."), type=str)
 @lightbulb.command("statistic", _("Some statistic about the server."), pass_options=True)
 @lightbulb.implements(commands.SlashCommand)
-async def statistic(ctx: slash.SlashContext, ip: str) -> None:
+async def statistic(ctx: slash.SlashContext, ip: str, range: str = "24h") -> None:  # skipcq: PYL-W0622
     """Some statistic about the server. It's working, even if server is offline.
 
     Args:
         ctx: The context of the command.
         ip: The IP address of the server.
+        range: Key of :data:`.RANGES`, time range of the plot.
     """
+    plot_range = RANGES[range]
     await pinger_commands.wait_please_message(ctx)
     server = await mc_api.MCServer.status(ip)
 
+    db_server = registry.servers.by_address(server.address.host, server.address.port)
+    if db_server is None:
+        log.debug(_("Server {} not found in database").format(server.address.display_ip))
+        await ctx.respond(
+            ctx.author.mention, embed=await get_not_in_db_embed(server.address.display_ip), user_mentions=True
+        )
+        return
+
     async with models.db.session() as session:
-        db_server: typing.Optional[models.Server] = (
-            await session.scalars(
-                sqlalchemy.select(models.Server)
-                .where(models.Server.host == server.address.host)
-                .where(models.Server.port == server.address.port)
-            )
-        ).first()
-
-        if db_server is None:
-            log.debug(_("Server {} not found in database").format(server.address.display_ip))
-            await ctx.respond(
-                ctx.author.mention, embed=await get_not_in_db_embed(server.address.display_ip), user_mentions=True
-            )
-            return
-
-        pings = (
-            await session.scalars(
-                sqlalchemy.select(models.Ping)
-                .where(models.Ping.host == db_server.host)
-                .where(models.Ping.port == db_server.port)
-            )
-        ).all()
-    yesterday_ping = await get_yesterday_ping(pings)
+        points = await get_points(session, db_server.id, plot_range)
+        yesterday_players = await get_yesterday_online(session, db_server.id)
+        max_players = await get_max_online(session, db_server)
 
     embed = embeds.Embed(
         title=_("{} statistic").format(server.address.display_ip),
@@ -153,16 +260,16 @@ async def statistic(ctx: slash.SlashContext, ip: str) -> None:
     )
 
     players = server.players if not isinstance(server, mc_api.FailedMCServer) else _("No info.")
-    yesterday_online = str(yesterday_ping.players) if yesterday_ping is not None else _("No info.")
+    yesterday_online = str(yesterday_players) if yesterday_players is not None else _("No info.")
 
     embed.add_field(name=_("Current online"), value=str(players), inline=True)
     embed.add_field(name=_("Yesterday online, in same time"), value=yesterday_online, inline=True)
     embed.add_field(
         name=_("Max online of all time"),
         value=str(
-            db_server.max
+            max_players
             if isinstance(server, mc_api.FailedMCServer)
-            else (server.players.online if server.players.online > db_server.max else db_server.max)
+            else (server.players.online if server.players.online > max_players else max_players)
         ),
         inline=True,
     )
@@ -172,12 +279,18 @@ async def statistic(ctx: slash.SlashContext, ip: str) -> None:
         _("For more information about the server, write: {}").format(f"'/ping {server.address.display_ip}'")
     )
 
-    if len(pings) <= 20:
+    if points.samples <= MIN_SAMPLES:
         await ctx.respond(ctx.author.mention + ", " + _("not enough info for a plot."), embed=embed, user_mentions=True)
         return
 
-    figure = await create_plot(pings, server.address.display_ip)
-    embed.set_image(await transform_figure_to_bytes(figure))
+    try:
+        image = await get_plot(points, db_server.id, server.address.display_ip, range)
+    except asyncio.TimeoutError:
+        log.warning(_("Plot for {} is not rendered in time").format(server.address.display_ip))
+        await ctx.respond(ctx.author.mention + ", " + _("plot is not ready in time."), embed=embed, user_mentions=True)
+        return
+
+    embed.set_image(files.Bytes(image, "statistic.png"))
     await ctx.respond(ctx.author.mention, embed=embed, user_mentions=True)
 
 
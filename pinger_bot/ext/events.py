@@ -1,10 +1,13 @@
 """Module for handling events."""
+import multiprocessing.process
+import typing
+
 import lightbulb
 from hikari.events import lifetime_events
 from lightbulb import events
 from structlog import stdlib as structlog
 
-from pinger_bot import bot
+from pinger_bot import bot, config, registry
 from pinger_bot.config import gettext as _
 from pinger_bot.ext import scheduling
 
@@ -12,6 +15,8 @@ log = structlog.get_logger()
 
 plugin = lightbulb.Plugin(name="events")
 """:class:`lightbulb.Plugin <lightbulb.plugins.Plugin>` object."""
+collector_processes: typing.List[multiprocessing.process.BaseProcess] = []
+"""Processes of :mod:`pinger_bot.collector`, if :attr:`~pinger_bot.config.Config.collector_processes` is more than 1."""
 
 
 class Events:
@@ -37,16 +42,44 @@ class Events:
     @staticmethod
     @plugin.listener(lifetime_events.StartedEvent)
     async def on_started(__: lifetime_events.StartedEvent) -> None:
-        """On-started hook. Just logs that the bot started and run scheduler."""
+        """On-started hook. Loads servers registry, warms up plots renderer, logs that the bot started and run scheduler.
+
+        If :attr:`~pinger_bot.config.Config.collector_processes` is more than 1, statistic is collected
+        by separate processes (see :mod:`pinger_bot.collector`) instead of the scheduler. If
+        :attr:`~pinger_bot.config.Config.run_collector` is disabled, the bot doesn't collect statistic at all.
+        The scheduler is started anyway, it reloads the registry (see :func:`pinger_bot.ext.scheduling.reload_servers`).
+        """
+        # imported only here, after the bot is ready: plots renderer imports numpy, and collector - multiprocessing
+        from pinger_bot import collector, plots
+
+        await registry.servers.load()
+        plots.renderer.start()
         log.info(_("Bot running! For stop it, use CTRL C."))
+        if not config.config.run_collector:
+            log.info(_("Collector is disabled in the bot, run it with `python -m pinger_bot collector`."))
+        elif config.config.collector_processes > 1:
+            collector_processes.extend(collector.start(config.config.collector_processes))
+        else:
+            scheduling.schedule_collector()
         scheduling.scheduler.start()
 
     @staticmethod
     @plugin.listener(lifetime_events.StoppingEvent)
     async def on_stopping(__: lifetime_events.StoppingEvent) -> None:
-        """On-started hook. Just logs that the bot stopping and stop scheduler."""
+        """On-started hook. Just logs that the bot stopping, stop scheduler and plots renderer."""
+        from pinger_bot import (  # already imported by :meth:`.on_started`
+            collector,
+            plots,
+        )
+
         log.info(_("Bot stopping. Bye!"))
-        scheduling.scheduler.shutdown()
+        plots.renderer.close()
+        if collector_processes:
+            collector.stop(collector_processes)
+            collector_processes.clear()
+        if scheduling.scheduler.running:
+            scheduling.scheduler.shutdown()
+            await scheduling.writer.close()
 
 
 def load(bot_obj: bot.PingerBot) -> None:
@@ -1,70 +1,816 @@
 """Module for scheduled jobs."""
 import asyncio
+import dataclasses
 import datetime
+import time
+import typing
 
 import sqlalchemy
 from apscheduler.schedulers import asyncio as apscheduler_asyncio
 from sqlalchemy.ext import asyncio as sqlalchemy_asyncio
 from structlog import stdlib as structlog
 
-from pinger_bot import bot, config, mc_api, models
+from pinger_bot import (
+    config,
+    dns_cache,
+    leases,
+    mc_api,
+    models,
+    ping_blocks,
+    ping_storage,
+    registry,
+    rollups,
+)
 from pinger_bot.config import gettext as _
 
+if typing.TYPE_CHECKING:  # it imports `hikari`, which collector's processes don't need
+    from pinger_bot import bot
+
 log = structlog.get_logger()
 scheduler = apscheduler_asyncio.AsyncIOScheduler()
 
 
-@scheduler.scheduled_job("interval", minutes=config.config.ping_interval)
-async def collect_info_for_statistic() -> None:
-    """Collect info for statistic plot."""
-    log.info(_("Collecting info for statistic plot."))
-    async with models.db.session() as session:
-        servers = (await session.scalars(sqlalchemy.select(models.Server))).all()
+@dataclasses.dataclass
+class ServerHealth:
+    """Failure state of the offline server, so we ping it less often (exponential backoff)."""
 
-        await asyncio.gather(*(handle_server(server, session) for server in servers), delete_old_pings(session))
+    failures: int = 0
+    """Number of failed pings in a row."""
+    skip: int = 0
+    """How many next ticks the server will be skipped."""
 
-        await session.commit()
-    log.debug(_("Collecting info ended!"))
 
+@dataclasses.dataclass
+class Sampling:
+    """How often the online server is pinged, adapted to changes of its online players."""
 
-async def handle_server(db_server: models.Server, session: sqlalchemy_asyncio.AsyncSession) -> None:
-    """One interaction for the servers in database.
+    period: int
+    """Number of :class:`.TimingWheel` slots between pings."""
+    players: int
+    """Online players on the last ping."""
 
-    Args:
-        db_server: :class:`pinger_bot.models.Server` object.
-        session: :class:`sqlalchemy.ext.asyncio.AsyncSession`, so every online server will not open new DB session.
+
+@dataclasses.dataclass
+class Recorded:
+    """The last stored ping of the online server, with :attr:`~pinger_bot.config.Config.ping_changes_only`."""
+
+    players: int
+    """Online players of the last stored ping."""
+    time: datetime.datetime
+    """Time of the last stored ping."""
+    pending: typing.Optional[typing.Dict[str, typing.Any]] = None
+    """The last skipped ping. It is stored, when players change or the server goes offline, so flat parts of
+    the plot end at the same place, as if all pings were stored."""
+
+
+@dataclasses.dataclass
+class TickStats:
+    """Statistic of one :func:`.collect_info_for_statistic` run, or of one rotation of :class:`.TimingWheel`."""
+
+    pinged: int = 0
+    """How many servers were pinged."""
+    online: int = 0
+    """How many of pinged servers were online."""
+    skipped: int = 0
+    """How many servers were skipped, because they are offline for a long time (see :class:`.ServerHealth`)."""
+    backing_off: int = 0
+    """How many servers are in backoff state after the tick."""
+
+    def add(self, other: "TickStats") -> None:
+        """Add counters of another run. :attr:`.backing_off` is not a counter, so it is taken from the other run.
+
+        Args:
+            other: Statistic of the later run.
+        """
+        self.pinged += other.pinged
+        self.online += other.online
+        self.skipped += other.skipped
+        self.backing_off = other.backing_off
+
+
+@dataclasses.dataclass
+class TickBatch:
+    """Results of pinged servers, which are written to the database at once.
+
+    Workers only fill it and pass to :data:`.writer`, so they never touch the database. It keeps plain rows
+    instead of ORM objects, so writing is a few ``executemany`` statements, without identity map and fetching
+    defaults back.
     """
-    log.debug("scheduling.handle_server", server=db_server, db_session=session)
-    server = await mc_api.MCServer.status(str(db_server.host) + ":" + str(db_server.port))
-    log.debug(_("Server offline?"), offline=isinstance(server, mc_api.FailedMCServer))
 
-    if not isinstance(server, mc_api.FailedMCServer):
-        session.add(models.Ping(host=db_server.host, port=db_server.port, players=server.players.online))
+    pings: typing.List[typing.Dict[str, typing.Any]] = dataclasses.field(default_factory=list)
+    """New pings of online servers, as rows of :class:`pinger_bot.models.Ping` (see :mod:`pinger_bot.ping_storage`)."""
+    maxes: typing.Dict[int, int] = dataclasses.field(default_factory=dict)
+    """New records of online players (``server's ID -> players``)."""
+    protocols: typing.Dict[int, bool] = dataclasses.field(default_factory=dict)
+    """Changed protocols of the servers (``server's ID -> java``)."""
+
+    def merge(self, other: "TickBatch") -> None:
+        """Add results from another batch to this one.
+
+        Args:
+            other: Batch to take results from.
+        """
+        self.pings.extend(other.pings)
+        for server_id, players in other.maxes.items():
+            self.maxes[server_id] = max(players, self.maxes.get(server_id, players))
+        self.protocols.update(other.protocols)
+
+    async def write(self, session: sqlalchemy_asyncio.AsyncSession) -> None:
+        """Write everything to the database. Doesn't commit.
+
+        Records of players are written with ``GREATEST``, so a bigger record, written by someone else
+        in the meantime, is never overwritten.
 
-        if server.players.online > db_server.max:
-            log.debug(
-                _("Update max players, in server {}").format(server.address.display_ip),
-                current=server.players.online,
-                old=db_server.max,
+        Args:
+            session: :class:`sqlalchemy.ext.asyncio.AsyncSession` to write with.
+        """
+        # Core tables instead of models, so it is a plain `executemany`, not the ORM's bulk operation
+        servers = models.Server.__table__
+        if self.pings:
+            await ping_storage.storage.write(session, self.pings)
+        if self.maxes:
+            await session.execute(
+                sqlalchemy.update(servers)
+                .where(servers.c.id == sqlalchemy.bindparam("server_id"))
+                .values(max=models.Greatest(servers.c.max, sqlalchemy.bindparam("players"))),
+                [{"server_id": server_id, "players": players} for server_id, players in self.maxes.items()],
             )
+        if self.protocols:
             await session.execute(
-                sqlalchemy.update(models.Server)
-                .where(models.Server.id == db_server.id)
-                .values(max=server.players.online)
+                sqlalchemy.update(servers)
+                .where(servers.c.id == sqlalchemy.bindparam("server_id"))
+                .values(java=sqlalchemy.bindparam("new_java")),
+                [{"server_id": server_id, "new_java": java} for server_id, java in self.protocols.items()],
             )
 
 
+class WriteBehind:
+    """Writes results of pings to the database in the background, so network never holds database locks.
+
+    Workers :meth:`.put` results of every server to a bounded queue, and a writer task merges them and writes in
+    short transactions, every :attr:`~pinger_bot.config.Config.write_batch_size` servers or every
+    :attr:`~pinger_bot.config.Config.write_flush_interval` seconds. If the database falls behind and the queue
+    (:attr:`~pinger_bot.config.Config.write_queue_size`) is full, workers wait, instead of growing memory.
+
+    The writer task is started on the first use in the running event loop.
+    """
+
+    def __init__(self) -> None:
+        self._queue: "typing.Optional[asyncio.Queue[typing.Optional[TickBatch]]]" = None
+        self._task: "typing.Optional[asyncio.Task[None]]" = None
+        self._error: typing.Optional[BaseException] = None
+
+    def _ensure_started(self) -> "asyncio.Queue[typing.Optional[TickBatch]]":
+        """Start the writer task, if it is not running in the current event loop."""
+        if (
+            self._queue is None
+            or self._task is None
+            or self._task.done()
+            or self._task.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._queue = asyncio.Queue(config.config.write_queue_size)
+            self._task = asyncio.create_task(self._run(self._queue))
+        return self._queue
+
+    async def put(self, batch: TickBatch) -> None:
+        """Add results to the queue. Waits, if the queue is full.
+
+        Args:
+            batch: Results of one or more servers.
+        """
+        await self._ensure_started().put(batch)
+
+    async def flush(self) -> None:
+        """Wait until everything, which was put before, is written.
+
+        Raises:
+            Exception: The last error of writing, if there was any since the previous flush.
+        """
+        queue = self._ensure_started()
+        await queue.put(None)  # writes pending results right away, instead of waiting for the interval
+        await queue.join()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    async def close(self) -> None:
+        """Write everything and stop the writer task."""
+        if self._task is None or self._task.done():
+            return
+        try:
+            await self.flush()
+        finally:
+            self._task.cancel()
+            self._task = self._queue = None
+
+    async def _run(self, queue: "asyncio.Queue[typing.Optional[TickBatch]]") -> None:
+        """Take results from the queue and write them, until cancelled."""
+        pending, taken = TickBatch(), 0
+        while True:
+            try:
+                batch = await asyncio.wait_for(queue.get(), config.config.write_flush_interval if taken else None)
+            except asyncio.TimeoutError:
+                batch = None
+            else:
+                taken += 1
+                if batch is not None:
+                    pending.merge(batch)
+                    if taken < config.config.write_batch_size:
+                        continue
+
+            if len(pending.pings) or pending.maxes or pending.protocols:
+                await self._write(pending)
+            for _ in range(taken):
+                queue.task_done()
+            pending, taken = TickBatch(), 0
+
+    async def _write(self, batch: TickBatch) -> None:
+        """Write one batch in its own transaction. Errors are logged and raised later by :meth:`.flush`."""
+        try:
+            async with models.db.session() as session:
+                await batch.write(session)
+                await session.commit()
+        except Exception as exception:  # skipcq: PYL-W0703 # writer must not die, error is raised in `flush`
+            log.exception("WriteBehind._write failed", pings=len(batch.pings))
+            self._error = exception
+        else:
+            log.debug("WriteBehind._write", pings=len(batch.pings), maxes=len(batch.maxes))
+
+
+class Calendar:
+    """Servers with adapted period (see :func:`.update_sampling`), by the slot in which they are due next.
+
+    Slots are absolute numbers of :class:`.TimingWheel` slots. Servers with the default period are not here, they are taken by their phase
+    (see :meth:`pinger_bot.registry.Registry.by_phase`). So every slot touches only its own servers.
+    """
+
+    def __init__(self) -> None:
+        self._slots: typing.Dict[int, typing.Set[int]] = {}
+        self._due: typing.Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        """Number of scheduled servers."""
+        return len(self._due)
+
+    def schedule(self, server_id: int, slot: int) -> None:
+        """Put the server to the next slot after this one, in which it is due with its current period.
+
+        Servers with the default period are removed, because they are due in their phase.
+
+        Args:
+            server_id: ID of the server.
+            slot: Absolute number of the current slot.
+        """
+        self.remove(server_id)
+        slots, period = config.config.ping_slots, period_of(server_id)
+        if period == slots:
+            return
+        due = slot + (registry.phase(server_id, slots) - slot - 1) % period + 1
+        self._slots.setdefault(due, set()).add(server_id)
+        self._due[server_id] = due
+
+    def remove(self, server_id: int) -> None:
+        """Remove the server, if it is scheduled.
+
+        Args:
+            server_id: ID of the server.
+        """
+        due = self._due.pop(server_id, None)
+        if due is not None:
+            self._slots[due].discard(server_id)
+            if not self._slots[due]:
+                del self._slots[due]
+
+    def pop_due(self, slot: int) -> typing.Set[int]:
+        """Take servers, which are due in this slot or earlier (in missed slots), and schedule them again.
+
+        Args:
+            slot: Absolute number of the current slot.
+
+        Returns:
+            IDs of the servers.
+        """
+        due: typing.Set[int] = set()
+        for key in [key for key in self._slots if key <= slot]:
+            due.update(self._slots[key])
+        for server_id in due:
+            self.schedule(server_id, slot)
+        return due
+
+    def clear(self) -> None:
+        """Remove all servers."""
+        self._slots, self._due = {}, {}
+
+
+health: typing.Dict[int, ServerHealth] = {}
+"""Failure state of offline servers (``server's ID -> ServerHealth``). Online servers are not here."""
+sampling: typing.Dict[int, Sampling] = {}
+"""Adapted sampling rate of online servers (``server's ID -> Sampling``), see :func:`.update_sampling`."""
+calendar = Calendar()
+"""Servers with adapted sampling rate, by slot in which they are due."""
+recorded: typing.Dict[int, Recorded] = {}
+"""The last stored pings of online servers (``server's ID -> Recorded``), see :func:`.record_ping`."""
+writer = WriteBehind()
+"""Writer of the collector's results."""
+last_tick: TickStats = TickStats()
+"""Statistic of the last finished :func:`.collect_info_for_statistic` run."""
+rotation: TickStats = TickStats()
+"""Statistic of the current rotation of :class:`.TimingWheel`, summed over its slots."""
+
+
+class TimingWheel:
+    """Spreads pings over :attr:`~pinger_bot.config.Config.ping_interval`, instead of pinging everything at once.
+
+    The interval is split into :attr:`~pinger_bot.config.Config.ping_slots` slots, and every server gets its own
+    slot by hash of its ID (see :meth:`.phase`). :meth:`.advance` is called at the start of every slot and runs
+    the job for servers of this slot. Slots are numbered by wall time, so servers keep their phase after restart.
+    Servers can also be pinged more or less often than once per interval, see :func:`.is_due`.
+
+    If the previous slot is still running, or the call came so late that slots were missed, it is an overrun:
+    it is counted and reported, and missed slots are run together with the current one, instead of being dropped.
+
+    Args:
+        job: Coroutine function, which collects info for servers of the given slots (``job(slots=...)``).
+            Slots are passed as absolute numbers (``time // slot_length``).
+    """
+
+    def __init__(self, job: typing.Callable[..., typing.Awaitable[None]]) -> None:
+        self.job = job
+        """Coroutine function, which collects info for servers of the given slots."""
+        self.last_slot: typing.Optional[int] = None
+        """Absolute number of the last run slot (``time // slot_length``)."""
+        self.running = 0
+        """How many slots are being run now."""
+        self.overruns = 0
+        """How many times the wheel didn't keep up with its slots."""
+
+    @staticmethod
+    def slot_length() -> float:
+        """Length of one slot, in seconds."""
+        return config.config.ping_interval * 60 / config.config.ping_slots
+
+    @classmethod
+    def start_date(cls) -> datetime.datetime:
+        """Start of the next slot, the first call of :meth:`.advance` must be scheduled on it.
+
+        So calls come right after starts of slots, and not at some offset, where small jitter can move a call into
+        the next slot (it would be reported as overrun, and a slot would be run twice or skipped).
+        """
+        length = cls.slot_length()
+        return datetime.datetime.fromtimestamp((time.time() // length + 1) * length, tz=datetime.timezone.utc)
+
+    @staticmethod
+    def phase(server_id: int, slots: int) -> int:
+        """Slot of the server, see :func:`pinger_bot.registry.phase`."""
+        return registry.phase(server_id, slots)
+
+    async def advance(self) -> None:
+        """Run the job for all slots, which are due since the last call."""
+        slots, current = config.config.ping_slots, int(time.time() // self.slot_length())
+        first = current if self.last_slot is None else self.last_slot + 1
+        if first > current:  # called twice in the same slot
+            return
+        self.last_slot = current
+
+        missed = current - first
+        if missed or self.running:
+            self.overruns += 1
+            log.warning(
+                _("Collector doesn't keep up with the ping interval."),
+                missed_slots=missed,
+                still_running=self.running,
+                overruns=self.overruns,
+            )
+
+        self.running += 1
+        try:
+            await self.job(slots=frozenset(range(max(first, current - slots + 1), current + 1)))
+        finally:
+            self.running -= 1
+
+
+async def collect_info_for_statistic(
+    *,
+    cleanup: bool = True,
+    partitions: typing.Optional[typing.Tuple[typing.Collection[int], int]] = None,
+    slots: typing.Optional[typing.Collection[int]] = None,
+) -> None:
+    """Collect info for statistic plot.
+
+    Due servers (see :func:`.due_servers`) are taken into a pool of at most
+    :attr:`~pinger_bot.config.Config.ping_workers` workers, so number of opened sockets
+    doesn't grow with number of servers. Results are written by :data:`.writer` in the background,
+    and the function returns after all of them are written.
+
+    A full run logs its summary. Runs of :class:`.TimingWheel` slots log only at debug level, and the summary
+    is logged once per rotation, after its last slot.
+
+    Args:
+        cleanup: Also roll up finished hours and days (see :mod:`pinger_bot.rollups`) and delete old pings
+            (see :func:`.delete_old_pings`). When servers are split between
+            several processes (see :mod:`pinger_bot.collector`), only one of them does this.
+        partitions: ``(owned, total)`` to ping only servers with ``id % total in owned``. If it is :obj:`None` and
+            :attr:`~pinger_bot.config.Config.collector_leases` is enabled, currently leased partitions are used
+            (see :mod:`pinger_bot.leases`). Old pings are deleted only by the owner of partition ``0``.
+        slots: Ping only servers, which are due in these slots of :class:`.TimingWheel` (see :func:`.is_due`).
+            :obj:`None` to ping all. Old pings are deleted only in the first slot of the interval.
+    """
+    global last_tick, rotation  # skipcq: PYL-W0603 # it is a module-level state of the collector
+
+    if partitions is None and config.config.collector_leases:
+        partitions = (leases.manager.partitions or await leases.manager.sync(), config.config.lease_partitions)
+    if partitions is not None:
+        cleanup = cleanup and 0 in partitions[0]
+    if slots is not None:
+        cleanup = cleanup and any(slot % config.config.ping_slots == 0 for slot in slots)
+
+    servers = due_servers(partitions=partitions, slots=slots)
+    if slots is None:
+        log.info(_("Collecting info for statistic plot."))
+    else:
+        log.debug("collect_info_for_statistic", slots=sorted(slots), servers=len(servers))
+
+    stats = TickStats()
+    workers = min(config.config.ping_workers, len(servers))
+    queue: "asyncio.Queue[typing.Optional[registry.ServerRecord]]" = asyncio.Queue(max(workers, 1))
+    tasks = [asyncio.create_task(ping_worker(queue, stats)) for _ in range(workers)]
+    tasks.append(asyncio.create_task(fill_queue(queue, servers, workers=workers)))
+    try:
+        await asyncio.gather(*tasks)
+    finally:  # if something failed, don't leave tasks hanging on the queue
+        for task in tasks:
+            task.cancel()
+
+    if stats.pinged or cleanup:
+        await writer.flush()
+    if cleanup:
+        await roll_up()
+        async with models.db.session() as session:
+            if config.config.ping_blocks:
+                await ping_blocks.store.pack_closed(session)
+            await delete_old_pings(session)
+            await session.commit()
+
+    stats.backing_off = len(health)
+    last_tick = stats
+    if slots is None:
+        _log_summary(stats)
+        return
+
+    log.debug("collect_info_for_statistic ended", **dataclasses.asdict(stats))
+    rotation.add(stats)
+    # once per rotation, not for every slot
+    if any(slot % config.config.ping_slots == config.config.ping_slots - 1 for slot in slots):
+        _log_summary(rotation)
+        rotation = TickStats()
+
+
+def _log_summary(stats: TickStats) -> None:
+    log.info(
+        _("Collecting info ended!"),
+        **dataclasses.asdict(stats),
+        dns=dataclasses.asdict(dns_cache.resolver.stats),
+        resolve_cache=mc_api._Address_resolve_cache.summary(),  # skipcq: PYL-W0212 # private attribute
+    )
+
+
+async def tick(*, slots: typing.Optional[typing.Collection[int]] = None) -> None:
+    """One run of the bot's collector: :func:`.collect_info_for_statistic`, and then pre-rendering of plots.
+
+    With :attr:`~pinger_bot.config.Config.plot_prerender`, the most requested plots of just pinged servers are
+    rendered (see :func:`pinger_bot.ext.commands.statistic.prerender`), so ``/statistic`` answers them from the
+    cache. Collector's processes (see :mod:`pinger_bot.collector`) don't do it, because they don't have the cache.
+
+    Args:
+        slots: Slots of :class:`.TimingWheel` to run. :obj:`None` to ping all servers.
+    """
+    await collect_info_for_statistic(slots=slots)
+    if config.config.plot_prerender:
+        # it imports `hikari` and plots, so import it only when needed
+        from pinger_bot.ext.commands import statistic
+
+        await statistic.prerender(
+            config.config.plot_prerender,
+            due=lambda server_id: slots is None or any(is_due(server_id, slot) for slot in slots),
+        )
+
+
+wheel = TimingWheel(tick)
+"""Wheel of the bot's collector."""
+
+
+async def reload_servers() -> None:
+    """Reload :data:`pinger_bot.registry.servers` of the bot from the database.
+
+    Commands of other replicas add and change servers, and collectors in other processes update records
+    of online players, only in the database. So the bot's copy is reloaded once per
+    :attr:`~pinger_bot.config.Config.ping_interval`, even if the bot doesn't collect statistic itself.
+    """
+    await registry.servers.load()
+
+
+scheduler.add_job(reload_servers, "interval", minutes=config.config.ping_interval)
+
+
+def schedule_collector() -> None:
+    """Add jobs of the bot's collector to :data:`.scheduler`: the :data:`.wheel`, and renewal of leases."""
+    # the job only waits for pings, so overlapping runs are allowed, and they are reported by the wheel itself
+    scheduler.add_job(
+        wheel.advance,
+        "interval",
+        seconds=TimingWheel.slot_length(),
+        start_date=TimingWheel.start_date(),
+        max_instances=config.config.ping_slots,
+    )
+    if config.config.collector_leases:
+        # renew leases between ticks, so they don't expire while the collector is alive
+        scheduler.add_job(leases.manager.sync, "interval", seconds=config.config.lease_ttl / 3)
+
+
+def due_servers(
+    *,
+    partitions: typing.Optional[typing.Tuple[typing.Collection[int], int]] = None,
+    slots: typing.Optional[typing.Collection[int]] = None,
+) -> typing.List[registry.ServerRecord]:
+    """Get servers from registry, which must be pinged now.
+
+    For slots of :class:`.TimingWheel`, only servers of these slots are looked at: ones with the default period
+    by their phase, and others from :data:`.calendar`.
+
+    Args:
+        partitions: ``(owned, total)`` to get only servers with ``id % total in owned``. :obj:`None` to get all.
+        slots: Get only servers, which are due in these slots (see :func:`.is_due`). :obj:`None` to get all.
+
+    Returns:
+        Servers to ping.
+    """
+    if slots is None:
+        servers = list(registry.servers)
+    else:
+        total = config.config.ping_slots
+        by_id = {
+            db_server.id: db_server
+            for slot in slots
+            for db_server in registry.servers.by_phase(slot % total)
+            if period_of(db_server.id) == total
+        }
+        for server_id in calendar.pop_due(max(slots)):
+            db_server = registry.servers.get(server_id)
+            if db_server is None:  # removed from the registry
+                calendar.remove(server_id)
+            else:
+                by_id[server_id] = db_server
+        servers = list(by_id.values())
+
+    if partitions is not None:
+        servers = [db_server for db_server in servers if db_server.id % partitions[1] in partitions[0]]
+    return servers
+
+
+async def fill_queue(
+    queue: "asyncio.Queue[typing.Optional[registry.ServerRecord]]",
+    servers: typing.Iterable[registry.ServerRecord],
+    *,
+    workers: int,
+) -> None:
+    """Put every server to the queue, and then one :obj:`None` for every worker to stop it.
+
+    Args:
+        queue: Queue, from which workers take servers.
+        servers: Servers to put, see :func:`.due_servers`.
+        workers: Number of workers, which are listening to the queue.
+    """
+    for db_server in servers:
+        await queue.put(db_server)
+
+    for _ in range(workers):
+        await queue.put(None)
+
+
+def period_of(server_id: int) -> int:
+    """Number of :class:`.TimingWheel` slots between pings of the server, see :func:`.update_sampling`."""
+    server_sampling = sampling.get(server_id)
+    return server_sampling.period if server_sampling is not None else config.config.ping_slots
+
+
+def is_due(server_id: int, slot: int) -> bool:
+    """Should the server be pinged in this slot of :class:`.TimingWheel`.
+
+    Every server is pinged in its own phase (see :meth:`.TimingWheel.phase`), every :attr:`.Sampling.period`
+    slots. By default, it is once per :attr:`~pinger_bot.config.Config.ping_interval`.
+
+    Args:
+        server_id: ID of the server.
+        slot: Absolute number of the slot.
+    """
+    return (slot - registry.phase(server_id, config.config.ping_slots)) % period_of(server_id) == 0
+
+
+def update_sampling(server_id: int, players: int) -> None:
+    """Adapt how often the online server is pinged, after a successful ping.
+
+    If online players changed by at least :attr:`~pinger_bot.config.Config.adaptive_volatility`, the server
+    is pinged twice as often, and if they didn't change at all, twice as rarely. Popular servers (see
+    :attr:`~pinger_bot.config.Config.adaptive_popular_players`) are never pinged less often than
+    :attr:`~pinger_bot.config.Config.ping_interval`. It always stays between
+    :attr:`~pinger_bot.config.Config.ping_interval_min` and :attr:`~pinger_bot.config.Config.ping_interval_max`.
+
+    Plots stay correct, because every ping has its real time.
+
+    Args:
+        server_id: ID of the server in database.
+        players: Online players on this ping.
+    """
+    if not config.config.adaptive_intervals:
+        return
+
+    slots, slot_length = config.config.ping_slots, TimingWheel.slot_length()
+    shortest = max(1, round(config.config.ping_interval_min * 60 / slot_length))
+    longest = max(shortest, round(config.config.ping_interval_max * 60 / slot_length))
+
+    current = int(time.time() // slot_length)
+    server_sampling = sampling.get(server_id)
+    if server_sampling is None:
+        sampling[server_id] = Sampling(period=min(max(slots, shortest), longest), players=players)
+        calendar.schedule(server_id, current)
+        return
+
+    change = abs(players - server_sampling.players)
+    period = server_sampling.period
+    if change >= max(1.0, server_sampling.players * config.config.adaptive_volatility):
+        period //= 2
+    elif change == 0:
+        period *= 2
+    if players >= config.config.adaptive_popular_players:
+        period = min(period, slots)
+
+    period = min(max(period, shortest), longest)
+    if period != server_sampling.period:
+        server_sampling.period = period
+        calendar.schedule(server_id, current)
+    server_sampling.players = players
+
+
+async def ping_worker(queue: "asyncio.Queue[typing.Optional[registry.ServerRecord]]", stats: TickStats) -> None:
+    """Take servers from the queue and handle them, until get :obj:`None`.
+
+    Servers, which are in backoff state (see :func:`.update_health`), are skipped. Results are passed
+    to :data:`.writer`.
+
+    Args:
+        queue: Queue with servers, filled by :func:`.fill_queue`.
+        stats: Statistic of the current tick, which will be updated.
+    """
+    while (db_server := await queue.get()) is not None:
+        server_health = health.get(db_server.id)
+        if server_health is not None and server_health.skip > 0:
+            server_health.skip -= 1
+            stats.skipped += 1
+            continue
+
+        batch = TickBatch()
+        online = await handle_server(db_server, batch)
+        if online or batch.pings:  # offline server can have a pending ping (see `record_ping`)
+            await writer.put(batch)
+        update_health(db_server.id, online=online)
+        stats.pinged += 1
+        stats.online += online
+
+
+def update_health(server_id: int, *, online: bool) -> None:
+    """Update failure state of the server after a ping.
+
+    After :attr:`~pinger_bot.config.Config.backoff_after` failed pings in a row, the server is pinged only every
+    2nd, then 4th, 8th... tick (but not less often than every :attr:`~pinger_bot.config.Config.backoff_max_ticks`
+    tick). The first successful ping resets this.
+
+    Args:
+        server_id: ID of the server in database.
+        online: Was the ping successful.
+    """
+    if online:
+        if health.pop(server_id, None) is not None:
+            log.debug("scheduling.update_health server is back online", server_id=server_id)
+        return
+
+    server_health = health.setdefault(server_id, ServerHealth())
+    server_health.failures += 1
+    if server_health.failures >= config.config.backoff_after:
+        exponent = min(server_health.failures - config.config.backoff_after + 1, 16)
+        server_health.skip = min(2**exponent, config.config.backoff_max_ticks) - 1
+        log.debug(
+            "scheduling.update_health server in backoff",
+            server_id=server_id,
+            failures=server_health.failures,
+            skip=server_health.skip,
+        )
+
+
+async def handle_server(db_server: registry.ServerRecord, batch: TickBatch) -> bool:
+    """One interaction for the servers in database.
+
+    Args:
+        db_server: :class:`pinger_bot.registry.ServerRecord` of the server.
+        batch: Results, where ping and changes of the server are added.
+
+    Returns:
+        :obj:`True` if server is online.
+    """
+    log.debug("scheduling.handle_server", server=db_server)
+    probe = await mc_api.PlayersProbe.probe(db_server.host, db_server.port, java=db_server.java)
+    log.debug(_("Server offline?"), offline=probe is None)
+
+    if probe is None:
+        flush_pending(db_server.id, batch)
+        return False
+
+    record_ping(batch, {"server_id": db_server.id, "time": probe.time, "players": probe.players.online})
+    update_sampling(db_server.id, probe.players.online)
+
+    values: typing.Dict[str, typing.Union[int, bool]] = {}
+    if probe.players.online > db_server.max:
+        log.debug(
+            _("Update max players, in server {}").format(db_server.alias or db_server.ip),
+            current=probe.players.online,
+            old=db_server.max,
+        )
+        values["max"] = batch.maxes[db_server.id] = probe.players.online
+    if probe.java != db_server.java:
+        log.debug("scheduling.handle_server protocol changed", old=db_server.java, new=probe.java)
+        values["java"] = batch.protocols[db_server.id] = probe.java
+
+    if values:
+        registry.servers.update(db_server.id, **values)
+    return True
+
+
+def record_ping(batch: TickBatch, ping: typing.Dict[str, typing.Any]) -> None:
+    """Add the ping to the batch, or skip it, if online players didn't change.
+
+    With :attr:`~pinger_bot.config.Config.ping_changes_only`, the ping is stored only if online players changed
+    since the last stored ping, or :attr:`~pinger_bot.config.Config.ping_heartbeat` passed. When players change,
+    the last skipped ping is stored too, so pings form the same step function as all pings together.
+
+    Args:
+        batch: Results of the server.
+        ping: Row of :class:`pinger_bot.models.Ping`.
+    """
+    if not config.config.ping_changes_only:
+        batch.pings.append(ping)
+        return
+
+    last = recorded.get(ping["server_id"])
+    if last is not None and ping["players"] == last.players:
+        if ping["time"] - last.time < datetime.timedelta(minutes=config.config.ping_heartbeat):
+            last.pending = ping
+            return
+    elif last is not None and last.pending is not None:
+        batch.pings.append(last.pending)
+
+    batch.pings.append(ping)
+    recorded[ping["server_id"]] = Recorded(players=ping["players"], time=ping["time"])
+
+
+def flush_pending(server_id: int, batch: TickBatch) -> None:
+    """Add the last skipped ping of the server, which went offline, to the batch (see :func:`.record_ping`).
+
+    Args:
+        server_id: ID of the server in database.
+        batch: Results of the server.
+    """
+    last = recorded.pop(server_id, None)
+    if last is not None and last.pending is not None:
+        batch.pings.append(last.pending)
+
+
+async def roll_up() -> None:
+    """Aggregate finished periods of pings, see :func:`pinger_bot.rollups.roll_up`.
+
+    It runs before old pings are deleted, so they are aggregated before they are gone. It has its own transaction,
+    and its failure is only logged, so it doesn't stop deleting old pings.
+    """
+    try:
+        async with models.db.session() as session:
+            await rollups.roll_up(session)
+            await session.commit()
+    except Exception:  # skipcq: PYL-W0703 # retention must not depend on rollups
+        log.exception("roll_up failed")
+
+
 async def delete_old_pings(session: sqlalchemy_asyncio.AsyncSession) -> None:
-    """Delete old pings, this means older than ~26 hours.
+    """Delete old pings, this means older than :attr:`~pinger_bot.config.Config.ping_retention_hours`.
+
+    It drops whole expired partitions (see :meth:`pinger_bot.ping_storage.PingStorage.drop_expired`)
+    and blocks (see :mod:`pinger_bot.ping_blocks`), so it doesn't depend on number of pings.
 
     Args:
         session: :class:`sqlalchemy.ext.asyncio.AsyncSession`, so we don't need to open it again.
     """
     log.debug(_("Deleting old pings."))
-    yesterday = datetime.datetime.now() - datetime.timedelta(days=1, hours=2)
-    await session.execute(sqlalchemy.delete(models.Ping).where(models.Ping.time < yesterday))
+    await ping_storage.storage.drop_expired(session)
+    await ping_blocks.store.drop_expired(session)
 
 
-def load(__: bot.PingerBot) -> None:
+def load(__: "bot.PingerBot") -> None:
     """Placeholder for the :external+lightbulb:std:doc:`lightbulb's plugin system <guides/plugins>`, \
     so this file will be loaded."""
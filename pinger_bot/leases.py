@@ -0,0 +1,185 @@
+"""Sharing servers between several collectors (bot replicas or collector's processes) through the database.
+
+Servers are split into :attr:`~pinger_bot.config.Config.lease_partitions` partitions (``id % partitions``).
+Every collector registers itself in :class:`pinger_bot.models.Collector` and claims time-limited
+leases (:class:`pinger_bot.models.Lease`) on its fair share of partitions. While the collector is alive, it renews
+them every :attr:`~pinger_bot.config.Config.lease_ttl` / 3 seconds. If it dies, its leases expire and other
+collectors claim them on their next sync.
+
+Claiming is one ``UPDATE ... WHERE owner IS NULL OR expires < now``, so only one collector can win a partition.
+This works with every database, which supports row counts of ``UPDATE``, like SQLite and PostgreSQL.
+
+.. note:: Times are taken from the collectors' clocks, so they must be roughly in sync.
+"""
+import datetime
+import math
+import os
+import socket
+import typing
+import uuid
+
+import sqlalchemy
+from sqlalchemy.ext import asyncio as sqlalchemy_asyncio
+from structlog import stdlib as structlog
+
+from pinger_bot import config, models
+from pinger_bot.config import gettext as _
+
+log = structlog.get_logger()
+
+
+class LeaseManager:
+    """Leases of one collector.
+
+    Args:
+        owner: Unique name of the collector. Default to ``hostname:pid:random``.
+    """
+
+    def __init__(self, owner: typing.Optional[str] = None) -> None:
+        self.owner = owner if owner is not None else f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        """Unique name of the collector."""
+        self.partitions: typing.FrozenSet[int] = frozenset()
+        """Partitions, owned after the last :meth:`.sync`."""
+
+    async def sync(self) -> typing.FrozenSet[int]:
+        """Renew own leases, give away extra ones and claim free ones, up to the fair share.
+
+        Fair share is ``partitions / alive collectors``, rounded up, but not more than
+        :attr:`~pinger_bot.config.Config.lease_max_partitions`.
+
+        Returns:
+            Partitions, which this collector owns now.
+        """
+        now = datetime.datetime.utcnow()
+        expires = now + datetime.timedelta(seconds=config.config.lease_ttl)
+        total: int = config.config.lease_partitions
+
+        async with models.db.session() as session:
+            alive = await self._heartbeat(session, now=now, expires=expires)
+            await self._create_missing(session, total)
+            share = math.ceil(total / alive)
+            if config.config.lease_max_partitions is not None:
+                share = min(share, config.config.lease_max_partitions)
+
+            await session.execute(
+                sqlalchemy.update(models.Lease)
+                .where(models.Lease.owner == self.owner, models.Lease.partition < total)
+                .values(expires=expires)
+            )
+            owned = set(
+                (
+                    await session.scalars(
+                        sqlalchemy.select(models.Lease.partition)
+                        .where(models.Lease.owner == self.owner, models.Lease.partition < total)
+                        .order_by(models.Lease.partition)
+                    )
+                ).all()
+            )
+
+            if len(owned) > share:
+                extra = sorted(owned)[share:]
+                await session.execute(
+                    sqlalchemy.update(models.Lease)
+                    .where(models.Lease.owner == self.owner, models.Lease.partition.in_(extra))
+                    .values(owner=None, expires=None)
+                )
+                owned.difference_update(extra)
+            elif len(owned) < share:
+                owned.update(await self._claim(session, share - len(owned), now=now, expires=expires, total=total))
+
+            await session.commit()
+
+        if owned != self.partitions:
+            log.info(_("Leased partitions changed."), owner=self.owner, partitions=sorted(owned), alive=alive)
+        self.partitions = frozenset(owned)
+        return self.partitions
+
+    async def release(self) -> None:
+        """Give away all leases, so other collectors can claim them without waiting for expiration."""
+        async with models.db.session() as session:
+            await session.execute(
+                sqlalchemy.update(models.Lease).where(models.Lease.owner == self.owner).values(owner=None, expires=None)
+            )
+            await session.execute(sqlalchemy.delete(models.Collector).where(models.Collector.owner == self.owner))
+            await session.commit()
+        self.partitions = frozenset()
+
+    async def _heartbeat(
+        self, session: sqlalchemy_asyncio.AsyncSession, *, now: datetime.datetime, expires: datetime.datetime
+    ) -> int:
+        """Register this collector as alive, and forget dead ones.
+
+        Returns:
+            Number of alive collectors, including this one.
+        """
+        result = await session.execute(
+            sqlalchemy.update(models.Collector).where(models.Collector.owner == self.owner).values(expires=expires)
+        )
+        if result.rowcount == 0:  # type: ignore[attr-defined] # it is `CursorResult`
+            session.add(models.Collector(owner=self.owner, expires=expires))
+            await session.flush()
+        await session.execute(sqlalchemy.delete(models.Collector).where(models.Collector.expires < now))
+        return int(
+            (await session.execute(sqlalchemy.select(sqlalchemy.func.count(models.Collector.owner)))).scalar_one()
+        )
+
+    @staticmethod
+    async def _create_missing(session: sqlalchemy_asyncio.AsyncSession, total: int) -> None:
+        """Create rows for partitions, which are not in the table yet."""
+        existing = set((await session.scalars(sqlalchemy.select(models.Lease.partition))).all())
+        missing = [partition for partition in range(total) if partition not in existing]
+        if not missing:
+            return
+
+        try:
+            async with session.begin_nested():
+                session.add_all(models.Lease(partition=partition) for partition in missing)
+        except sqlalchemy.exc.IntegrityError:  # another collector created them at the same time
+            log.debug("LeaseManager._create_missing race", missing=missing)
+
+    async def _claim(
+        self,
+        session: sqlalchemy_asyncio.AsyncSession,
+        number: int,
+        *,
+        now: datetime.datetime,
+        expires: datetime.datetime,
+        total: int,
+    ) -> typing.Set[int]:
+        """Claim free or expired partitions.
+
+        Args:
+            session: Session to use.
+            number: How many partitions to claim at most.
+            now: Current time.
+            expires: Expiration time of new leases.
+            total: Total number of partitions.
+
+        Returns:
+            Claimed partitions.
+        """
+        free = sqlalchemy.or_(models.Lease.owner.is_(None), models.Lease.expires < now)
+        candidates = (
+            await session.scalars(
+                sqlalchemy.select(models.Lease.partition)
+                .where(free, models.Lease.partition < total)
+                .order_by(models.Lease.partition)
+            )
+        ).all()
+
+        claimed: typing.Set[int] = set()
+        for partition in candidates:
+            if len(claimed) >= number:
+                break
+            result = await session.execute(
+                sqlalchemy.update(models.Lease)
+                .where(models.Lease.partition == partition, free)
+                .values(owner=self.owner, expires=expires)
+            )
+            if result.rowcount == 1:  # type: ignore[attr-defined] # it is `CursorResult`
+                claimed.add(partition)
+        return claimed
+
+
+manager = LeaseManager()
+"""Initialized :class:`.LeaseManager` object of this process."""
@@ -1,25 +1,216 @@
 """API module with Minecraft Servers API."""
 import asyncio
 import dataclasses
+import datetime
+import functools
+import time
 import typing
+import urllib.parse
 from abc import ABC
 
 import asyncache
 import cachetools
-import dns.asyncresolver
 import dns.exception
+import dns.resolver
 import mcstatus
-import sqlalchemy
+import mcstatus.status_response
 from dns.rdatatype import RdataType as DNSRdataType
 from structlog import stdlib as structlog
 
-from pinger_bot import models
+from pinger_bot import config, dns_cache, registry
 from pinger_bot.config import gettext as _
 
 log = structlog.get_logger()
 
-_Address_resolve_cache: cachetools.TTLCache = cachetools.TTLCache(128, 3600)  # type: ignore[type-arg]
-"""Helper for tests, this used when you need to remove the cache."""
+_failed_cache: cachetools.TTLCache = cachetools.TTLCache(4096, config.config.failed_ping_cache_ttl)  # type: ignore[type-arg]
+"""Recently failed pings (``host -> FailedMCServer``). Helper for tests, when you need to clear it."""
+_protocol_hints: cachetools.LRUCache = cachetools.LRUCache(4096)  # type: ignore[type-arg]
+"""Learned protocols of the servers (``normalized resolved host:port -> ProtocolHint``).
+
+Helper for tests, when you need to clear it.
+"""
+
+_statuses_in_flight: typing.Dict[str, "asyncio.Task[typing.Union[MCServer, FailedMCServer, PlayersProbe, None]]"] = {}
+"""Pings in progress (``normalized host -> task``), shared by :meth:`MCServer.status` and :meth:`PlayersProbe.probe`.
+
+Task of :meth:`MCServer.status` returns :class:`MCServer` or :class:`FailedMCServer`, task of the probe returns
+:class:`PlayersProbe` or :obj:`None` if it failed.
+"""
+_recent_statuses: cachetools.LRUCache = cachetools.LRUCache(4096)  # type: ignore[type-arg]
+"""Recent successful pings (``normalized host -> (time, MCServer)``). Helper for tests, when you need to clear it."""
+
+BEDROCK_PORTS = frozenset({19132, 19133})
+"""Default ports of Bedrock servers. Unknown servers on these ports are pinged as Bedrock first."""
+
+
+@dataclasses.dataclass
+class ProtocolHint:
+    """Known protocol of the host, so we don't need to race Java and Bedrock on every ping."""
+
+    java: bool
+    """If server is Java or Bedrock."""
+    failures: int = 0
+    """Number of failed pings in a row with this protocol."""
+
+
+@dataclasses.dataclass
+class CacheStats:
+    """Counters of one part of :class:`.ResolveCache`."""
+
+    hits: int = 0
+    """Lookups, which found the value in cache."""
+    misses: int = 0
+    """Lookups, which didn't find the value in cache."""
+    evictions: int = 0
+    """Values, which were removed before their TTL because the cache was full."""
+
+    @property
+    def hit_rate(self) -> float:
+        """Part of lookups, which found the value in cache. From ``0`` to ``1``."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class _CountingTTLCache(cachetools.TTLCache):  # type: ignore[type-arg]
+    """:class:`cachetools.TTLCache`, which counts evictions."""
+
+    def __init__(self, maxsize: int, ttl: float, stats: CacheStats) -> None:
+        super().__init__(maxsize, ttl)
+        self.stats = stats
+
+    def popitem(self) -> typing.Tuple[typing.Any, typing.Any]:
+        """Evict the least recently used item, because cache is full."""
+        item = super().popitem()
+        self.stats.evictions += 1
+        return item
+
+
+class ResolveCache(typing.MutableMapping[typing.Tuple[str, bool], "Address"]):
+    """Cache for :meth:`Address.resolve`, with separate parts for tracked servers and for all other ones.
+
+    Tracked servers (which are in :data:`pinger_bot.registry.servers`) are pinged on every tick, so their part
+    is sized from the number of them (or :attr:`~pinger_bot.config.Config.resolve_cache_size`). Other servers
+    are pinged only by commands, and they live in their own part of
+    :attr:`~pinger_bot.config.Config.resolve_hot_cache_size` entries, so the collector can't evict them.
+
+    Keys are ``(input_ip, java)``.
+    """
+
+    MIN_FLEET_SIZE = 128
+    """Minimal size of the tracked servers' part, when it is sized automatically."""
+
+    def __init__(self) -> None:
+        self.fleet_stats = CacheStats()
+        """Counters of the tracked servers' part."""
+        self.hot_stats = CacheStats()
+        """Counters of the other servers' part."""
+        self._fleet: typing.Optional[_CountingTTLCache] = None
+        self._hot: typing.Optional[_CountingTTLCache] = None
+
+    def _fleet_size(self) -> int:
+        """Get wanted size of the tracked servers' part.
+
+        Every server can be resolved for both protocols, so when sized automatically there is room for two entries
+        per server, and the same amount of headroom, so we don't resize the cache on every added server.
+        """
+        if config.config.resolve_cache_size is not None:
+            return typing.cast(int, config.config.resolve_cache_size)
+
+        needed = 2 * len(registry.servers)
+        if self._fleet is not None and needed <= self._fleet.maxsize and self._fleet.maxsize // 4 <= needed:
+            return int(self._fleet.maxsize)
+        return max(self.MIN_FLEET_SIZE, 2 * needed)
+
+    def _get_fleet(self) -> _CountingTTLCache:
+        """Get the tracked servers' part, resizing it if the number of tracked servers changed a lot."""
+        size = self._fleet_size()
+        if self._fleet is None or self._fleet.maxsize != size:
+            log.debug("ResolveCache resize", old=self._fleet.maxsize if self._fleet is not None else None, new=size)
+            fleet = _CountingTTLCache(size, config.config.resolve_cache_ttl, self.fleet_stats)
+            if self._fleet is not None:
+                self._fleet.expire()
+                for key, value in list(self._fleet.items())[-size:]:
+                    fleet[key] = value
+            self._fleet = fleet
+        return self._fleet
+
+    def _get_hot(self) -> _CountingTTLCache:
+        """Get the other servers' part."""
+        if self._hot is None:
+            self._hot = _CountingTTLCache(
+                config.config.resolve_hot_cache_size, config.config.resolve_cache_ttl, self.hot_stats
+            )
+        return self._hot
+
+    def _part(self, key: typing.Tuple[str, bool]) -> _CountingTTLCache:
+        """Get part of the cache, where the key belongs.
+
+        Args:
+            key: ``(input_ip, java)``.
+
+        Returns:
+            The tracked servers' part, if ``input_ip`` is an IP with port or alias of the tracked server.
+            Else - the other servers' part.
+        """
+        input_ip = key[0]
+        host, _, port = input_ip.rpartition(":")
+        tracked = registry.servers.by_alias(input_ip) is not None or (
+            port.isdigit() and registry.servers.by_address(host, int(port)) is not None
+        )
+        return self._get_fleet() if tracked else self._get_hot()
+
+    def __getitem__(self, key: typing.Tuple[str, bool]) -> "Address":
+        """Get cached value, counting hits and misses of the part."""
+        part = self._part(key)
+        try:
+            value: Address = part[key]
+        except KeyError:
+            part.stats.misses += 1
+            raise
+        part.stats.hits += 1
+        return value
+
+    def __setitem__(self, key: typing.Tuple[str, bool], value: "Address") -> None:
+        """Cache the value in the right part."""
+        self._part(key)[key] = value
+
+    def __delitem__(self, key: typing.Tuple[str, bool]) -> None:
+        """Remove the value from any part."""
+        for part in (self._fleet, self._hot):
+            if part is not None and key in part:
+                del part[key]
+                return
+        raise KeyError(key)
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple[str, bool]]:
+        """Iterate over keys of both parts."""
+        for part in (self._fleet, self._hot):
+            if part is not None:
+                yield from list(part)
+
+    def __len__(self) -> int:
+        """Number of cached values in both parts."""
+        return sum(len(part) for part in (self._fleet, self._hot) if part is not None)
+
+    def summary(self) -> typing.Dict[str, typing.Dict[str, typing.Union[int, float]]]:
+        """Get counters of both parts, with their hit rates and sizes, to put them in logs.
+
+        Returns:
+            ``{"fleet": {...}, "hot": {...}}``.
+        """
+        return {
+            name: {**dataclasses.asdict(stats), "hit_rate": round(stats.hit_rate, 3), "size": len(part or ())}
+            for name, stats, part in (("fleet", self.fleet_stats, self._fleet), ("hot", self.hot_stats, self._hot))
+        }
+
+    def clear(self) -> None:
+        """Remove everything from the cache and reset counters."""
+        self._fleet = self._hot = None
+        self.fleet_stats, self.hot_stats = CacheStats(), CacheStats()
+
+
+_Address_resolve_cache = ResolveCache()
+"""Cache of :meth:`Address.resolve`. Helper for tests, this used when you need to remove the cache."""
 
 
 @dataclasses.dataclass
@@ -41,8 +232,17 @@ class Address:
     _server: typing.Union[mcstatus.JavaServer, mcstatus.BedrockServer]
     """Private attribute with JavaServer or BedrockServer instance."""
 
+    @property
+    def java(self) -> bool:
+        """Is this an address of Java server (or Bedrock).
+
+        Returns:
+            :obj:`True` if it is Java server, :obj:`False` if Bedrock.
+        """
+        return isinstance(self._server, mcstatus.JavaServer)
+
     @classmethod
-    @asyncache.cached(_Address_resolve_cache)
+    @asyncache.cached(_Address_resolve_cache, key=lambda _, input_ip, *, java: (input_ip, java))
     async def resolve(cls, input_ip: str, *, java: bool) -> "Address":
         """Resolve IP or domain or alias to :py:class:`.Address` object.
 
@@ -54,10 +254,10 @@ class Address:
             Resolved :py:class:`.Address` object.
         """
         log.debug("Address.resolve", input_ip=input_ip, java=java)
-        ip_from_alias = await cls._get_ip_from_alias(input_ip)
+        ip_from_alias = cls._get_ip_from_alias(input_ip)
 
         server: typing.Union[mcstatus.JavaServer, mcstatus.BedrockServer] = (
-            await mcstatus.JavaServer.async_lookup(ip_from_alias if ip_from_alias is not None else input_ip)
+            await cls._java_lookup(ip_from_alias if ip_from_alias is not None else input_ip)
             if java
             else mcstatus.BedrockServer.lookup(ip_from_alias if ip_from_alias is not None else input_ip)
         )
@@ -73,9 +273,8 @@ class Address:
                 _server=server,
             )
 
-        num_ip_without_port, alias = await asyncio.gather(
-            cls._get_number_ip(server.address.host), cls._get_alias_from_ip(server.address.host, server.address.port)
-        )
+        num_ip_without_port = await cls._get_number_ip(server.address.host)
+        alias = cls._get_alias_from_ip(server.address.host, server.address.port)
 
         return cls(
             host=server.address.host,
@@ -88,28 +287,46 @@ class Address:
         )
 
     @staticmethod
-    async def _get_ip_from_alias(alias: str) -> typing.Optional[str]:
+    async def _java_lookup(address: str) -> mcstatus.JavaServer:
+        """Same as :meth:`mcstatus.JavaServer.async_lookup`, but SRV query goes through the shared DNS cache.
+
+        Args:
+            address: IP or domain of the server, maybe with port.
+
+        Returns:
+            :class:`mcstatus.JavaServer` object.
+        """
+        parsed = urllib.parse.urlparse("//" + address)
+        if parsed.hostname is None:
+            raise ValueError(f"Invalid address '{address}', can't parse.")
+        if parsed.port is not None:
+            return mcstatus.JavaServer(parsed.hostname, parsed.port)
+
+        try:
+            answers = await dns_cache.resolver.resolve("_minecraft._tcp." + parsed.hostname, DNSRdataType.SRV)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            return mcstatus.JavaServer(parsed.hostname, mcstatus.JavaServer.DEFAULT_PORT)
+
+        answer = answers[0]
+        return mcstatus.JavaServer(str(answer.target).rstrip("."), int(answer.port))
+
+    @staticmethod
+    def _get_ip_from_alias(alias: str) -> typing.Optional[str]:
         """Get IP from alias.
 
         Args:
             alias: Alias to resolve.
 
         Returns:
-            IP if alias was found, else None.
+            IP if alias was found in :data:`pinger_bot.registry.servers`, else None.
         """
-        log.debug("Address._get_ip_from_alias", alias=alias)
-        async with models.db.session() as session:
-            server = await session.execute(
-                sqlalchemy.select(models.Server.host, models.Server.port).where(models.Server.alias == alias)
-            )
-        row = server.first()
-
-        log.debug("Address._get_ip_from_alias row", row=row)
-        return str(row.host + ":" + str(row.port)) if row is not None else None
+        record = registry.servers.by_alias(alias)
+        log.debug("Address._get_ip_from_alias", alias=alias, record=record)
+        return record.ip if record is not None else None
 
     @staticmethod
     async def _get_number_ip(input_ip: str) -> str:
-        """Make query to DNS and get number IP.
+        """Make query to DNS (through :data:`pinger_bot.dns_cache.resolver`) and get number IP.
 
         Args:
             input_ip: Domain to query.
@@ -119,7 +336,7 @@ class Address:
         """
         log.debug("Address._get_number_ip", input_ip=input_ip)
         try:
-            answers = await dns.asyncresolver.resolve(input_ip, DNSRdataType.A)
+            answers = await dns_cache.resolver.resolve(input_ip, DNSRdataType.A)
         except dns.exception.DNSException:
             log.debug(_("Cannot resolve IP {} to number IP").format(input_ip))
             return input_ip
@@ -131,27 +348,19 @@ class Address:
         return ip
 
     @staticmethod
-    async def _get_alias_from_ip(host: str, port: int) -> typing.Optional[str]:
+    def _get_alias_from_ip(host: str, port: int) -> typing.Optional[str]:
         """Get alias from IP.
 
         Args:
-            host: Server's host, which exist in database.
-            port: Server's port, which exist in database.
+            host: Server's host, which exist in :data:`pinger_bot.registry.servers`.
+            port: Server's port, which exist in :data:`pinger_bot.registry.servers`.
 
         Returns:
             Alias if found, else None.
         """
-        log.debug("Address._get_alias_from_ip", host=host, port=port)
-        async with models.db.session() as session:
-            server = await session.execute(
-                sqlalchemy.select(models.Server.alias)
-                .where(models.Server.host == host)
-                .where(models.Server.port == port)
-            )
-        row = server.first()
-
-        log.debug("Address._get_alias_from_ip row", row=row)
-        return str(row.alias) if row is not None and row.alias is not None else None
+        record = registry.servers.by_address(host, port)
+        log.debug("Address._get_alias_from_ip", host=host, port=port, record=record)
+        return record.alias if record is not None else None
 
 
 @dataclasses.dataclass
@@ -206,41 +415,195 @@ class MCServer(BaseMCServer):
     """:py:class:`.Players` object."""
     latency: float
     """Time of response from server, in milliseconds."""
+    time: datetime.datetime = dataclasses.field(default_factory=datetime.datetime.now, compare=False)
+    """When the server answered."""
 
     @classmethod
-    async def status(cls, host: str) -> typing.Union["MCServer", "FailedMCServer"]:
-        """Get cross-platform status.
+    async def status(
+        cls, host: str, *, java: typing.Optional[bool] = None
+    ) -> typing.Union["MCServer", "FailedMCServer"]:
+        """Get cross-platform status, sharing one ping between all concurrent callers.
 
-        First ping it as :py:class:`mcstatus.JavaServer`, and if it fails, ping as :py:class:`mcstatus.BedrockServer`.
+        If the same server (see :meth:`._normalize_host`) is already being pinged, by a command or by the collector
+        (see :meth:`PlayersProbe.probe`), this waits for that ping instead of sending a new one. Successful result
+        can also be reused for :attr:`~pinger_bot.config.Config.status_fresh_for` seconds after the ping finished.
 
         Args:
             host: Host where server is, like ``127.0.0.1:25565``, ``hypixel.net`` or alias.
+            java: Known protocol of the server, for example :attr:`pinger_bot.models.Server.java`.
 
         Returns:
             Initialised :py:class:`.MCServer` object or :class:`.FailedMCServer` if ping failed.
         """
-        log.debug("MCServer.status", host=host)
-        success_task = await cls._handle_exceptions(
-            *(
-                await asyncio.wait(
-                    {
-                        asyncio.create_task(
-                            cls.handle_response(host, java=True), name="MCServer.handle_response(java=True)"
-                        ),
-                        asyncio.create_task(
-                            cls.handle_response(host, java=False), name="MCServer.handle_response(java=False)"
-                        ),
-                    },
-                    return_when=asyncio.FIRST_COMPLETED,
-                )
-            )
-        )
+        key = cls._normalize_host(host)
+        recent: typing.Optional[typing.Tuple[float, MCServer]] = _recent_statuses.get(key)
+        if recent is not None and time.monotonic() - recent[0] < config.config.status_fresh_for:
+            log.debug("MCServer.status fresh", host=host, key=key)
+            return recent[1]
+
+        task = _statuses_in_flight.get(key)
+        if task is None:
+            task = _statuses_in_flight[key] = asyncio.create_task(cls._status(host, java=java))
+            task.add_done_callback(functools.partial(cls._forget_status, key))
+        else:
+            log.debug("MCServer.status coalesced", host=host, key=key)
+
+        # shield, so if one caller is cancelled (e.g. by timeout), the ping is still finished for others
+        result = await asyncio.shield(task)
+        if result is None or isinstance(result, PlayersProbe):  # shared a probe of the collector
+            return await cls._from_probe(host, result)
+        return result
+
+    @classmethod
+    async def _from_probe(
+        cls, host: str, probe: typing.Optional["PlayersProbe"]
+    ) -> typing.Union["MCServer", "FailedMCServer"]:
+        """Make status from the shared probe of the collector, without connecting to the server again.
+
+        Args:
+            host: Host where server is, like ``127.0.0.1:25565``, ``hypixel.net`` or alias.
+            probe: Result of :meth:`PlayersProbe.probe`.
+
+        Returns:
+            Initialised :py:class:`.MCServer` object or :class:`.FailedMCServer` if the probe failed.
+        """
+        if probe is None or probe.status is None:
+            return await FailedMCServer.handle_failed(host)
+        server = cls.from_status(await Address.resolve(host, java=probe.java), probe.status)
+        server.time = probe.time
+        return server
+
+    @staticmethod
+    def _normalize_host(host: str) -> str:
+        """Get key, which is the same for all spellings of the same server.
+
+        Domains are case-insensitive, and alias is the same as IP of the server it points to. For added servers
+        this is their resolved ``host:port``, so the key is also used for :data:`._protocol_hints`.
+
+        Args:
+            host: Host where server is, like ``127.0.0.1:25565``, ``hypixel.net`` or alias.
+
+        Returns:
+            Normalized host.
+        """
+        host = host.strip()
+        record = registry.servers.by_alias(host)
+        if record is not None:
+            host = record.ip
+        return host.lower().rstrip(".")
 
+    @staticmethod
+    def _forget_status(
+        key: str, task: "asyncio.Task[typing.Union[MCServer, FailedMCServer, PlayersProbe, None]]"
+    ) -> None:
+        """Remove finished ping from in-flight ones, and remember its result if it was successful.
+
+        Args:
+            key: Normalized host.
+            task: Finished task of the ping.
+        """
+        if _statuses_in_flight.get(key) is task:
+            del _statuses_in_flight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if isinstance(result, MCServer) and config.config.status_fresh_for > 0:
+            _recent_statuses[key] = (time.monotonic(), result)
+
+    @classmethod
+    async def _status(
+        cls, host: str, *, java: typing.Optional[bool] = None
+    ) -> typing.Union["MCServer", "FailedMCServer"]:
+        """Actually ping the server, without sharing the ping with other callers.
+
+        If protocol of the server is known (passed in ``java`` argument, or learned from previous pings), ping
+        only with this protocol. If it fails :attr:`~pinger_bot.config.Config.protocol_fallback_after` times
+        in a row, or protocol is unknown - race :py:class:`mcstatus.JavaServer` and
+        :py:class:`mcstatus.BedrockServer` (see :meth:`._race`).
+
+        If ping of this host failed in last :attr:`~pinger_bot.config.Config.failed_ping_cache_ttl` seconds,
+        the server is not pinged at all, and the same :class:`.FailedMCServer` is returned.
+
+        Args:
+            host: Host where server is, like ``127.0.0.1:25565``, ``hypixel.net`` or alias.
+            java: Known protocol of the server, for example :attr:`pinger_bot.models.Server.java`.
+
+        Returns:
+            Initialised :py:class:`.MCServer` object or :class:`.FailedMCServer` if ping failed.
+        """
+        log.debug("MCServer.status", host=host, java=java)
+        failed: typing.Optional[FailedMCServer] = _failed_cache.get(host)
+        if failed is not None:
+            log.debug("MCServer.status recently failed", host=host)
+            return failed
+
+        key = cls._normalize_host(host)
+        hint: typing.Optional[ProtocolHint] = _protocol_hints.get(key)
+        if java is not None and (hint is None or hint.java != java):
+            hint = _protocol_hints[key] = ProtocolHint(java=java)
+
+        if hint is not None and hint.failures < config.config.protocol_fallback_after:
+            try:
+                return await cls.handle_response(host, java=hint.java)
+            except Exception as exception:  # skipcq: PYL-W0703 # any exception here means that ping failed
+                log.debug("MCServer.status known protocol failed", host=host, java=hint.java, error=exception)
+                hint.failures += 1
+                return await FailedMCServer.handle_failed(host)
+
+        success_task = await cls._race(host, first=None if hint is not None else cls._guess_java(host))
         if success_task is None:
             return await FailedMCServer.handle_failed(host)
 
         return success_task.result()  # type: ignore[no-any-return]
 
+    @staticmethod
+    def _guess_java(host: str) -> typing.Optional[bool]:
+        """Guess protocol of unknown server by its port.
+
+        Args:
+            host: Host where server is, like ``127.0.0.1:19132``.
+
+        Returns:
+            :obj:`False` if port is one of :data:`.BEDROCK_PORTS`, else :obj:`None` (we can't guess).
+        """
+        port = host.rpartition(":")[2]
+        return False if port.isdigit() and int(port) in BEDROCK_PORTS else None
+
+    @classmethod
+    async def _race(
+        cls,
+        host: str,
+        *,
+        first: typing.Optional[bool],
+        handler: typing.Optional[typing.Callable[..., typing.Awaitable[typing.Any]]] = None,
+    ) -> typing.Optional[asyncio.Task]:  # type: ignore[type-arg]
+        """Ping server as Java and as Bedrock, and return the first successful ping.
+
+        Args:
+            host: Host where server is, like ``127.0.0.1:25565``, ``hypixel.net`` or alias.
+            first: Protocol which gets a head start of :attr:`~pinger_bot.config.Config.protocol_head_start`
+                seconds. If it answers in this time, another protocol is not pinged at all.
+                :obj:`None` to ping with both protocols at once.
+            handler: Coroutine function, which pings with one protocol, like ``handler(host, java=True)``.
+                Default to :meth:`.handle_response`.
+
+        Returns:
+            Successful task or :obj:`None` if both pings failed.
+        """
+        handler = handler if handler is not None else cls.handle_response
+        name = "MCServer.handle_response" if handler is cls.handle_response else "PlayersProbe.probe_once"
+        order = (True, False) if first is None else (first, not first)
+        tasks = {asyncio.create_task(handler(host, java=order[0]), name=f"{name}(java={order[0]})")}
+
+        if first is not None:
+            done, _ = await asyncio.wait(tasks, timeout=config.config.protocol_head_start)
+            for task in done:
+                if task.exception() is None:
+                    return task
+
+        tasks.add(asyncio.create_task(handler(host, java=order[1]), name=f"{name}(java={order[1]})"))
+        return await cls._handle_exceptions(*(await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)))
+
     @staticmethod
     async def _handle_exceptions(  # type: ignore[return]
         done: typing.Set[asyncio.Task], pending: typing.Set[asyncio.Task]  # type: ignore[type-arg]
@@ -281,6 +644,9 @@ class MCServer(BaseMCServer):
     async def handle_response(cls, host: str, *, java: bool) -> "MCServer":
         """Handle java server and transform it to :py:class:`.MCServer` object.
 
+        On success, protocol of the resolved ``host:port`` is remembered, so next time :meth:`.status` (or
+        :meth:`PlayersProbe.probe`) won't ping another one.
+
         Args:
             host: Host where server is, like ``127.0.0.1:25565``, ``hypixel.net`` or alias.
             java: If server is Java or Bedrock.
@@ -293,6 +659,20 @@ class MCServer(BaseMCServer):
         # we access this private attribute, because it's expected behaviour to use
         # `mcstatus`' object exactly here. it must not be used anywhere else.
         status = await address._server.async_status()  # skipcq: PYL-W0212 # accessing private attribute
+        _protocol_hints[cls._normalize_host(f"{address.host}:{address.port}")] = ProtocolHint(java=java)
+        return cls.from_status(address, status)
+
+    @classmethod
+    def from_status(cls, address: Address, status: mcstatus.status_response.BaseStatusResponse) -> "MCServer":
+        """Transform response of the server to :py:class:`.MCServer` object.
+
+        Args:
+            address: Resolved address of the server.
+            status: Response of the server.
+
+        Returns:
+            Initialised :py:class:`.MCServer` object.
+        """
         return cls(
             address=address,
             motd=status.description,
@@ -313,6 +693,9 @@ class FailedMCServer(BaseMCServer):
     async def handle_failed(cls, host: str) -> "FailedMCServer":
         """Handle failed ping and transform it to :py:class:`.MCServer` object.
 
+        Result is remembered for :attr:`~pinger_bot.config.Config.failed_ping_cache_ttl` seconds,
+        see :meth:`.MCServer.status`.
+
         Args:
             host: Host where server is, like ``127.0.0.1:25565``, ``hypixel.net`` or alias.
 
@@ -321,4 +704,129 @@ class FailedMCServer(BaseMCServer):
         """
         log.debug("MCServer.handle_failed", host=host)
         # using java=False because it is faster
-        return cls(await Address.resolve(host, java=False))
+        failed = _failed_cache[host] = cls(await Address.resolve(host, java=False))
+        return failed
+
+
+@dataclasses.dataclass
+class PlayersProbe:
+    """Result of the slim ping, which is used by the collector instead of :meth:`MCServer.status`.
+
+    It pings exactly the stored host and port, so there are no SRV, A-record and alias lookups, and it keeps only
+    the numbers of players. Interactive commands should still use full :class:`.MCServer`.
+    """
+
+    players: Players
+    """:py:class:`.Players` object."""
+    java: bool
+    """Is the server Java (or Bedrock)."""
+    time: datetime.datetime
+    """When the server answered."""
+    status: typing.Optional[mcstatus.status_response.BaseStatusResponse] = dataclasses.field(
+        default=None, repr=False, compare=False
+    )
+    """Full response of the server, so :meth:`MCServer.status` can share the probe."""
+
+    @classmethod
+    async def probe(
+        cls, host: str, port: int, *, java: typing.Optional[bool] = None
+    ) -> typing.Optional["PlayersProbe"]:
+        """Get players of the server.
+
+        If the same server is being pinged by :meth:`MCServer.status` right now (or was pinged recently, see
+        :attr:`~pinger_bot.config.Config.status_fresh_for`), its result is reused. Otherwise the probe itself is
+        registered as the ping in flight, so a command for the same server waits for it instead of connecting
+        again.
+
+        Args:
+            host: Host of the server, always without port.
+            port: Port of the server.
+            java: Known protocol of the server, for example :attr:`pinger_bot.models.Server.java`.
+
+        Returns:
+            :class:`.PlayersProbe` or :obj:`None` if ping failed.
+        """
+        ip = f"{host}:{port}"
+        key = MCServer._normalize_host(ip)  # skipcq: PYL-W0212 # the same module
+        recent: typing.Optional[typing.Tuple[float, MCServer]] = _recent_statuses.get(key)
+        if recent is not None and time.monotonic() - recent[0] < config.config.status_fresh_for:
+            return cls.from_server(recent[1])
+
+        task = _statuses_in_flight.get(key)
+        if task is None:
+            task = _statuses_in_flight[key] = asyncio.create_task(cls._probe(ip, key, java=java))
+            task.add_done_callback(functools.partial(MCServer._forget_status, key))  # skipcq: PYL-W0212
+        else:
+            log.debug("PlayersProbe.probe shares ping in flight", ip=ip, key=key)
+
+        result = await asyncio.shield(task)
+        if isinstance(result, MCServer):
+            return cls.from_server(result)
+        return None if isinstance(result, FailedMCServer) else result
+
+    @classmethod
+    async def _probe(cls, ip: str, key: str, *, java: typing.Optional[bool] = None) -> typing.Optional["PlayersProbe"]:
+        """Actually ping the server, choosing protocol the same way, as in :meth:`MCServer.status`.
+
+        Args:
+            ip: Host of the server with port.
+            key: Normalized ``ip``, see :meth:`MCServer._normalize_host`.
+            java: Known protocol of the server, for example :attr:`pinger_bot.models.Server.java`.
+
+        Returns:
+            :class:`.PlayersProbe` or :obj:`None` if ping failed.
+        """
+        log.debug("PlayersProbe.probe", ip=ip, java=java)
+        hint: typing.Optional[ProtocolHint] = _protocol_hints.get(key)
+        if java is not None and (hint is None or hint.java != java):
+            hint = _protocol_hints[key] = ProtocolHint(java=java)
+
+        if hint is not None and hint.failures < config.config.protocol_fallback_after:
+            try:
+                return await cls.probe_once(ip, java=hint.java)
+            except Exception as exception:  # skipcq: PYL-W0703 # any exception here means that ping failed
+                log.debug("PlayersProbe.probe known protocol failed", ip=ip, java=hint.java, error=exception)
+                hint.failures += 1
+                return None
+
+        success_task = await MCServer._race(  # skipcq: PYL-W0212 # the same module
+            ip, first=None if hint is not None else MCServer._guess_java(ip), handler=cls.probe_once
+        )
+        return success_task.result() if success_task is not None else None
+
+    @classmethod
+    def from_server(cls, server: MCServer) -> "PlayersProbe":
+        """Make probe from the full status.
+
+        Args:
+            server: Result of :meth:`MCServer.status`.
+
+        Returns:
+            :class:`.PlayersProbe` with the same players and time of the answer, even if the status was shared
+            or reused later.
+        """
+        return cls(players=server.players, java=server.address.java, time=server.time)
+
+    @classmethod
+    async def probe_once(cls, ip: str, *, java: bool) -> "PlayersProbe":
+        """Ping the server with one protocol.
+
+        On success, protocol of the server is remembered, like in :meth:`MCServer.handle_response`.
+
+        Args:
+            ip: Host of the server with port, like ``127.0.0.1:25565``.
+            java: If server is Java or Bedrock.
+
+        Returns:
+            Initialised :class:`.PlayersProbe` object.
+        """
+        host, _, port = ip.rpartition(":")
+        server = mcstatus.JavaServer(host, int(port)) if java else mcstatus.BedrockServer(host, int(port))
+        status = await server.async_status()
+        _protocol_hints[MCServer._normalize_host(ip)] = ProtocolHint(java=java)  # skipcq: PYL-W0212
+        return cls(
+            players=Players(online=status.players.online, max=status.players.max),
+            java=java,
+            time=datetime.datetime.now(),
+            status=status,
+        )
@@ -6,6 +6,7 @@ import alembic
 import sqlalchemy
 from sqlalchemy.ext import asyncio as sqlalchemy_asyncio
 
+from pinger_bot import ping_storage
 from pinger_bot.config import config as pinger_bot_config
 from pinger_bot.models import Base
 
@@ -31,6 +32,13 @@ target_metadata = Base.metadata  # type: ignore[attr-defined]
 config.set_main_option("sqlalchemy.url", pinger_bot_config.db_uri)
 
 
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    """Ignore partitions of pings, they are created at runtime (see :mod:`pinger_bot.ping_storage`)."""
+    if type_ == "index":
+        name = obj.table.name
+    return not (type_ in {"table", "index"} and name.startswith(ping_storage.PREFIX))
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -50,6 +58,7 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
         render_as_batch=True,
+        include_object=include_object,
     )
 
     with alembic.context.begin_transaction():
@@ -58,7 +67,9 @@ def run_migrations_offline() -> None:
 
 def do_run_migrations(connection) -> None:
     """Just run migrations."""
-    alembic.context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+    alembic.context.configure(
+        connection=connection, target_metadata=target_metadata, render_as_batch=True, include_object=include_object
+    )
 
     with alembic.context.begin_transaction():
         alembic.context.run_migrations()
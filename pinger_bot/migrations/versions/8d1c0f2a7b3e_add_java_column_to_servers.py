@@ -0,0 +1,29 @@
+"""Add java column to servers.
+
+Revision ID: 8d1c0f2a7b3e
+Revises: 461c3a5c3ebe
+Create Date: 2026-10-18 12:04:31.518207
+
+"""
+import typing
+
+import alembic.op as op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "8d1c0f2a7b3e"
+down_revision: typing.Optional[str] = "461c3a5c3ebe"
+branch_labels: typing.Optional[str] = None
+depends_on: typing.Optional[str] = None
+
+
+def upgrade() -> None:
+    """Upgrade actions that must be performed when upgrading the database to this revision."""
+    with op.batch_alter_table("pb_servers", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("java", sa.Boolean(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade actions that must be performed when downgrading the database from this revision."""
+    with op.batch_alter_table("pb_servers", schema=None) as batch_op:
+        batch_op.drop_column("java")
@@ -0,0 +1,40 @@
+"""Add collector leases.
+
+Revision ID: b7e2d94c1f05
+Revises: 8d1c0f2a7b3e
+Create Date: 2026-10-18 13:41:07.215634
+
+"""
+import typing
+
+import alembic.op as op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e2d94c1f05"
+down_revision: typing.Optional[str] = "8d1c0f2a7b3e"
+branch_labels: typing.Optional[str] = None
+depends_on: typing.Optional[str] = None
+
+
+def upgrade() -> None:
+    """Upgrade actions that must be performed when upgrading the database to this revision."""
+    op.create_table(
+        "pb_collectors",
+        sa.Column("owner", sa.String(length=128), nullable=False),
+        sa.Column("expires", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("owner", name="collectors_owner_pk"),
+    )
+    op.create_table(
+        "pb_leases",
+        sa.Column("partition", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("owner", sa.String(length=128), nullable=True),
+        sa.Column("expires", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("partition", name="leases_partition_pk"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade actions that must be performed when downgrading the database from this revision."""
+    op.drop_table("pb_leases")
+    op.drop_table("pb_collectors")
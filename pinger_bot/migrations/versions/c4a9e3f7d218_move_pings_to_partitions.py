@@ -0,0 +1,101 @@
+"""Move pings to time partitions.
+
+Existing rows of ``pb_pings`` are copied in chunks to partition tables (see :mod:`pinger_bot.ping_storage`),
+and ``pb_pings`` stays empty, as the template for partitions.
+
+Revision ID: c4a9e3f7d218
+Revises: b7e2d94c1f05
+Create Date: 2026-10-18 16:02:44.518203
+
+"""
+import datetime
+import re
+import typing
+
+import alembic.op as op
+import sqlalchemy as sa
+
+from pinger_bot.config import config
+
+# revision identifiers, used by Alembic.
+revision: str = "c4a9e3f7d218"
+down_revision: typing.Optional[str] = "b7e2d94c1f05"
+branch_labels: typing.Optional[str] = None
+depends_on: typing.Optional[str] = None
+
+CHUNK_SIZE = 10_000
+EPOCH = datetime.datetime(2000, 1, 1)
+NAME_REGEX = re.compile(r"^pb_pings_\d{10}_\d+h$")
+
+
+def _foreign_key_name(name: str) -> str:
+    """Name of the foreign key of pings table, it must be unique in the whole database (e.g. in MySQL)."""
+    return "ping_to_server" if name == "pb_pings" else f"{name}_to_server"
+
+
+def _pings_table(metadata: sa.MetaData, name: str) -> sa.Table:
+    """Table with layout of ``pb_pings`` in this revision."""
+    if "pb_servers" not in metadata.tables:  # for the foreign key
+        sa.Table("pb_servers", metadata, sa.Column("host", sa.String(256)), sa.Column("port", sa.Integer()))
+    return sa.Table(
+        name,
+        metadata,
+        sa.Column("id", sa.Integer(), sa.Identity(), primary_key=True),
+        sa.Column("host", sa.String(256), nullable=False),
+        sa.Column("port", sa.Integer(), nullable=False),
+        sa.Column("time", sa.DateTime(), server_default=sa.sql.func.now(), nullable=False),
+        sa.Column("players", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["host", "port"], ["pb_servers.host", "pb_servers.port"], name=_foreign_key_name(name)),
+        extend_existing=True,
+    )
+
+
+def _partition_name(time: datetime.datetime, hours: int) -> str:
+    length = datetime.timedelta(hours=hours)
+    start = EPOCH + (time - EPOCH) // length * length
+    return f"pb_pings_{start:%Y%m%d%H}_{hours}h"
+
+
+def _copy(source: sa.Table, target_for: typing.Callable[[typing.Any], sa.Table]) -> None:
+    """Copy rows from ``source`` in chunks, to tables from ``target_for(row)``, and delete them from ``source``."""
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(source).where(source.c.id > last_id).order_by(source.c.id).limit(CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        by_target: typing.Dict[sa.Table, typing.List[typing.Dict[str, typing.Any]]] = {}
+        for row in rows:
+            by_target.setdefault(target_for(row), []).append(
+                {"host": row.host, "port": row.port, "time": row.time, "players": row.players}
+            )
+        for target, target_rows in by_target.items():
+            target.create(bind, checkfirst=True)
+            bind.execute(sa.insert(target), target_rows)
+
+        bind.execute(sa.delete(source).where(source.c.id <= rows[-1].id))
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    """Upgrade actions that must be performed when upgrading the database to this revision."""
+    metadata = sa.MetaData()
+    hours = config.ping_partition_hours
+    _copy(
+        _pings_table(metadata, "pb_pings"),
+        lambda row: _pings_table(metadata, _partition_name(row.time, hours)),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade actions that must be performed when downgrading the database from this revision."""
+    metadata = sa.MetaData()
+    pings = _pings_table(metadata, "pb_pings")
+    for name in sorted(sa.inspect(op.get_bind()).get_table_names()):
+        if NAME_REGEX.match(name):
+            partition = _pings_table(metadata, name)
+            _copy(partition, lambda _: pings)
+            partition.drop(op.get_bind())
@@ -0,0 +1,184 @@
+"""Compact layout of pings: integer server ID, time in seconds and an index.
+
+``host`` and ``port`` of every ping are replaced by ``server_id``, ``time`` is stored as seconds since 2000-01-01
+(see :class:`pinger_bot.models.CompactTime`), and ``(server_id, time)`` gets an index. It is done for ``pb_pings``
+and every partition (see :mod:`pinger_bot.ping_storage`): rows are copied in chunks to a new table, which then
+replaces the old one. Pings of servers, which are not in ``pb_servers`` anymore, are dropped.
+
+Foreign key of every table is named after the table (like in :attr:`pinger_bot.ping_storage.Partition.table`),
+because MySQL requires names of constraints to be unique in the whole database. The foreign key of the old table
+is dropped before the new table is created, so the new one can take its name.
+
+Copied rows get new IDs from the identity of the new table. Explicit IDs would not advance its sequence
+on PostgreSQL, so the first insert after the migration would fail with a duplicate key.
+
+.. note:: Chunks only bound memory. The whole revision still runs in one transaction, so on a big database
+    it needs space for a full copy of the pings until it is committed.
+
+Revision ID: d8f1a6b3c920
+Revises: c4a9e3f7d218
+Create Date: 2026-10-18 17:41:09.201774
+
+"""
+import datetime
+import re
+import typing
+
+import alembic.op as op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d8f1a6b3c920"
+down_revision: typing.Optional[str] = "c4a9e3f7d218"
+branch_labels: typing.Optional[str] = None
+depends_on: typing.Optional[str] = None
+
+CHUNK_SIZE = 10_000
+EPOCH = datetime.datetime(2000, 1, 1)
+NAME_REGEX = re.compile(r"^pb_pings(_\d{10}_\d+h)?$")
+
+
+def _servers_table(metadata: sa.MetaData) -> sa.Table:
+    return sa.Table(
+        "pb_servers",
+        metadata,
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("host", sa.String(256)),
+        sa.Column("port", sa.Integer()),
+        extend_existing=True,
+    )
+
+
+def _foreign_key_name(name: str) -> str:
+    """Name of the foreign key of pings table, it must be unique in the whole database (e.g. in MySQL)."""
+    return "ping_to_server" if name == "pb_pings" else f"{name}_to_server"
+
+
+def _old_table(metadata: sa.MetaData, name: str, foreign_key: typing.Optional[str] = None) -> sa.Table:
+    """Table with layout of pings before this revision.
+
+    Args:
+        metadata: Metadata for the table.
+        name: Name of the table.
+        foreign_key: Name of the foreign key. Default to :func:`._foreign_key_name` of the table.
+    """
+    _servers_table(metadata)
+    return sa.Table(
+        name,
+        metadata,
+        sa.Column("id", sa.Integer(), sa.Identity(), primary_key=True),
+        sa.Column("host", sa.String(256), nullable=False),
+        sa.Column("port", sa.Integer(), nullable=False),
+        sa.Column("time", sa.DateTime(), server_default=sa.sql.func.now(), nullable=False),
+        sa.Column("players", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["host", "port"], ["pb_servers.host", "pb_servers.port"], name=foreign_key or _foreign_key_name(name)
+        ),
+        extend_existing=True,
+    )
+
+
+def _new_table(metadata: sa.MetaData, name: str, foreign_key: typing.Optional[str] = None) -> sa.Table:
+    """Table with layout of pings in this revision, without the index. Arguments are the same as of :func:`._old_table`."""
+    _servers_table(metadata)
+    return sa.Table(
+        name,
+        metadata,
+        sa.Column("id", sa.Integer(), sa.Identity(), primary_key=True),
+        sa.Column("server_id", sa.Integer(), nullable=False),
+        sa.Column("time", sa.Integer(), nullable=False),
+        sa.Column("players", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["server_id"], ["pb_servers.id"], name=foreign_key or _foreign_key_name(name), ondelete="CASCADE"
+        ),
+        extend_existing=True,
+    )
+
+
+def _tables() -> typing.List[str]:
+    return sorted(name for name in sa.inspect(op.get_bind()).get_table_names() if NAME_REGEX.match(name))
+
+
+def _replace(
+    name: str,
+    make_target: typing.Callable[[sa.MetaData, str, str], sa.Table],
+    select_chunk: typing.Callable[[sa.MetaData, str, int], sa.sql.Select],
+    convert: typing.Callable[[typing.Any], typing.Dict[str, typing.Any]],
+) -> None:
+    """Copy rows of ``name`` to a new table in chunks, and replace the old table with it.
+
+    Args:
+        name: Name of the table.
+        make_target: Creates the new table (without the index) from metadata, name and name of the foreign key.
+        select_chunk: Selects the next chunk of rows (with ``id``) after the given ID.
+        convert: Converts selected row to a row of the new table, without ``id``.
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":  # SQLite can't drop constraints, but their names are unique only in a table
+        for foreign_key in sa.inspect(bind).get_foreign_keys(name):
+            op.drop_constraint(foreign_key["name"], name, type_="foreignkey")
+    metadata = sa.MetaData()
+    target = make_target(metadata, f"{name}_new", _foreign_key_name(name))
+    target.create(bind)
+
+    last_id = 0
+    while True:
+        rows = bind.execute(select_chunk(metadata, name, last_id)).all()
+        if not rows:
+            break
+        bind.execute(sa.insert(target), [convert(row) for row in rows])
+        last_id = rows[-1].id
+
+    op.drop_table(name)
+    op.rename_table(target.name, name)
+
+
+def upgrade() -> None:
+    """Upgrade actions that must be performed when upgrading the database to this revision."""
+
+    def select_chunk(metadata: sa.MetaData, name: str, after: int) -> sa.sql.Select:
+        pings, servers = _old_table(metadata, name), _servers_table(metadata)
+        return (
+            sa.select(pings.c.id, servers.c.id.label("server_id"), pings.c.time, pings.c.players)
+            .join(servers, sa.and_(servers.c.host == pings.c.host, servers.c.port == pings.c.port))
+            .where(pings.c.id > after)
+            .order_by(pings.c.id)
+            .limit(CHUNK_SIZE)
+        )
+
+    def convert(row: typing.Any) -> typing.Dict[str, typing.Any]:
+        return {
+            "server_id": row.server_id,
+            "time": (row.time - EPOCH) // datetime.timedelta(seconds=1),
+            "players": row.players,
+        }
+
+    for name in _tables():
+        _replace(name, _new_table, select_chunk, convert)
+        op.create_index(f"ix_{name}_server_time", name, ["server_id", "time"])
+
+
+def downgrade() -> None:
+    """Downgrade actions that must be performed when downgrading the database from this revision."""
+
+    def select_chunk(metadata: sa.MetaData, name: str, after: int) -> sa.sql.Select:
+        pings, servers = _new_table(metadata, name), _servers_table(metadata)
+        return (
+            sa.select(pings.c.id, servers.c.host, servers.c.port, pings.c.time, pings.c.players)
+            .join(servers, servers.c.id == pings.c.server_id)
+            .where(pings.c.id > after)
+            .order_by(pings.c.id)
+            .limit(CHUNK_SIZE)
+        )
+
+    def convert(row: typing.Any) -> typing.Dict[str, typing.Any]:
+        return {
+            "host": row.host,
+            "port": row.port,
+            "time": EPOCH + datetime.timedelta(seconds=row.time),
+            "players": row.players,
+        }
+
+    for name in _tables():
+        op.drop_index(f"ix_{name}_server_time", table_name=name)
+        _replace(name, _old_table, select_chunk, convert)
@@ -0,0 +1,41 @@
+"""Add hourly and daily rollups of pings.
+
+Revision ID: e3b5c7d9f142
+Revises: d8f1a6b3c920
+Create Date: 2026-10-18 18:27:51.630418
+
+"""
+import typing
+
+import alembic.op as op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e3b5c7d9f142"
+down_revision: typing.Optional[str] = "d8f1a6b3c920"
+branch_labels: typing.Optional[str] = None
+depends_on: typing.Optional[str] = None
+
+
+def upgrade() -> None:
+    """Upgrade actions that must be performed when upgrading the database to this revision."""
+    for tier in ("hourly", "daily"):
+        op.create_table(
+            f"pb_rollups_{tier}",
+            sa.Column("server_id", sa.Integer(), nullable=False),
+            sa.Column("start", sa.Integer(), nullable=False),
+            sa.Column("min", sa.Integer(), nullable=False),
+            sa.Column("max", sa.Integer(), nullable=False),
+            sa.Column("avg", sa.Float(), nullable=False),
+            sa.Column("samples", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(
+                ["server_id"], ["pb_servers.id"], name=f"{tier}_rollup_to_server", ondelete="CASCADE"
+            ),
+            sa.PrimaryKeyConstraint("server_id", "start", name=f"rollups_{tier}_pk"),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade actions that must be performed when downgrading the database from this revision."""
+    op.drop_table("pb_rollups_daily")
+    op.drop_table("pb_rollups_hourly")
@@ -0,0 +1,36 @@
+"""Add compressed blocks of pings.
+
+Revision ID: f1c3e5a7b9d2
+Revises: e3b5c7d9f142
+Create Date: 2026-10-18 19:12:36.804127
+
+"""
+import typing
+
+import alembic.op as op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "f1c3e5a7b9d2"
+down_revision: typing.Optional[str] = "e3b5c7d9f142"
+branch_labels: typing.Optional[str] = None
+depends_on: typing.Optional[str] = None
+
+
+def upgrade() -> None:
+    """Upgrade actions that must be performed when upgrading the database to this revision."""
+    op.create_table(
+        "pb_ping_blocks",
+        sa.Column("server_id", sa.Integer(), nullable=False),
+        sa.Column("start", sa.Integer(), nullable=False),
+        sa.Column("end", sa.Integer(), nullable=False),
+        sa.Column("samples", sa.Integer(), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(["server_id"], ["pb_servers.id"], name="ping_block_to_server", ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("server_id", "start", name="ping_blocks_pk"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade actions that must be performed when downgrading the database from this revision."""
+    op.drop_table("pb_ping_blocks")
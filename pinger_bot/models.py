@@ -7,6 +7,7 @@ import sqlalchemy
 import sqlalchemy.orm
 from sqlalchemy import sql
 from sqlalchemy.ext import asyncio as sqlalchemy_asyncio
+from sqlalchemy.ext import compiler as sqlalchemy_compiler
 from structlog import stdlib as structlog
 
 from pinger_bot import config
@@ -38,43 +39,182 @@ class Server(Base):
     """Alias of the server. Can be used as IP of the server."""
     owner: int = sqlalchemy.Column(sqlalchemy.BigInteger, nullable=False)
     """Owner's Discord ID of the server."""
+    java: typing.Optional[bool] = sqlalchemy.Column(sqlalchemy.Boolean)
+    """Is the server Java (or Bedrock). Detected when the server is added, :obj:`None` if unknown."""
 
     __table_args__ = (sqlalchemy.UniqueConstraint("host", "port", name="ip"),)
     """Unique constraint for host and port."""
 
 
+class CompactTime(sqlalchemy.types.TypeDecorator):
+    """Time as an integer number of seconds since 2000-01-01, instead of a full ``DATETIME``.
+
+    It takes 4 bytes instead of 8 (PostgreSQL) or 26 (text in SQLite), and lasts till 2068. Microseconds are dropped.
+    """
+
+    impl = sqlalchemy.Integer
+    """Type in the database."""
+    cache_ok = True
+    """It has no state, so it can be cached."""
+    EPOCH = datetime.datetime(2000, 1, 1)
+    """Time of ``0``."""
+
+    def process_bind_param(
+        self, value: typing.Optional[datetime.datetime], dialect: sqlalchemy.engine.Dialect
+    ) -> typing.Optional[int]:
+        """Convert time to seconds."""
+        if value is None:
+            return None
+        return (value - self.EPOCH) // datetime.timedelta(seconds=1)
+
+    def process_result_value(
+        self, value: typing.Optional[int], dialect: sqlalchemy.engine.Dialect
+    ) -> typing.Optional[datetime.datetime]:
+        """Convert seconds back to time."""
+        if value is None:
+            return None
+        return self.EPOCH + datetime.timedelta(seconds=value)
+
+
 class Ping(Base):
-    """Represents a single ping record in DB."""
+    """Represents a single ping record in DB.
+
+    Pings are actually stored in partitions, copies of this table (see :mod:`pinger_bot.ping_storage`).
+    """
 
     __tablename__ = "pb_pings"
 
     id: int = sqlalchemy.Column(sqlalchemy.Integer, sqlalchemy.Identity(), primary_key=True)
     """Unique ID of the ping, primary key."""
 
-    host: str = sqlalchemy.Column(sqlalchemy.String(256), nullable=False)
-    """Host of the server, for which ping was made. This is a foreign key constraint."""
-    port: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False)
-    """Port of the server, for which ping was made. This is a foreign key constraint."""
-    time: datetime.datetime = sqlalchemy.Column(  # skipcq: PYL-E1102
-        sqlalchemy.DateTime, server_default=sql.func.now(), nullable=False
+    server_id: int = sqlalchemy.Column(
+        sqlalchemy.Integer,
+        sqlalchemy.ForeignKey("pb_servers.id", name="ping_to_server", ondelete="CASCADE"),
+        nullable=False,
     )
-    """Time of the ping. Default to current time."""
+    """:attr:`Server.id` of the server, for which ping was made."""
+    time: datetime.datetime = sqlalchemy.Column(CompactTime, nullable=False)
+    """Time of the ping, with precision to seconds."""
     players: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False)
     """Players online in moment of the ping."""
 
-    __mapper_args__ = {"eager_defaults": True}
-    """Some magic to make eager loading work.
+    __table_args__ = (sqlalchemy.Index("ix_pb_pings_server_time", "server_id", "time"),)
+    """Index for reading pings of one server in a time window. Every partition has its own copy of it."""
 
-    .. seealso:: `<https://docs.sqlalchemy.org/en/14/orm/extensions/asyncio.html#synopsis-orm>`_
-    """
-    __table_args__ = (
-        sqlalchemy.ForeignKeyConstraint(
-            ["host", "port"], ["pb_servers.host", "pb_servers.port"], name="ping_to_server"
-        ),
+
+class PingBlock(Base):
+    """Compressed pings of the server for one closed partition. See :mod:`pinger_bot.ping_blocks`."""
+
+    __tablename__ = "pb_ping_blocks"
+
+    server_id: int = sqlalchemy.Column(
+        sqlalchemy.Integer,
+        sqlalchemy.ForeignKey("pb_servers.id", name="ping_block_to_server", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    """:attr:`Server.id` of the server."""
+    start: datetime.datetime = sqlalchemy.Column(CompactTime, primary_key=True)
+    """Start of the window, inclusive."""
+    end: datetime.datetime = sqlalchemy.Column(CompactTime, nullable=False)
+    """End of the window, exclusive."""
+    samples: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False)
+    """Number of pings in the block."""
+    data: bytes = sqlalchemy.Column(sqlalchemy.LargeBinary, nullable=False)
+    """Encoded pings, see :func:`pinger_bot.ping_blocks.encode`."""
+
+
+class HourlyRollup(Base):
+    """Aggregated pings of the server for one hour. See :mod:`pinger_bot.rollups`."""
+
+    __tablename__ = "pb_rollups_hourly"
+
+    server_id: int = sqlalchemy.Column(
+        sqlalchemy.Integer,
+        sqlalchemy.ForeignKey("pb_servers.id", name="hourly_rollup_to_server", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    """:attr:`Server.id` of the server."""
+    start: datetime.datetime = sqlalchemy.Column(CompactTime, primary_key=True)
+    """Start of the hour."""
+    min: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False)
+    """Minimal online players in the hour."""
+    max: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False)
+    """Maximal online players in the hour."""
+    avg: float = sqlalchemy.Column(sqlalchemy.Float, nullable=False)
+    """Average online players in the hour."""
+    samples: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False)
+    """Number of pings in the hour."""
+
+
+class DailyRollup(Base):
+    """Aggregated pings of the server for one day, made from :class:`.HourlyRollup`. See :mod:`pinger_bot.rollups`."""
+
+    __tablename__ = "pb_rollups_daily"
+
+    server_id: int = sqlalchemy.Column(
+        sqlalchemy.Integer,
+        sqlalchemy.ForeignKey("pb_servers.id", name="daily_rollup_to_server", ondelete="CASCADE"),
+        primary_key=True,
     )
-    """Define Foreign Key Constraint to associate :attr:`pb_pings.host <.Ping.host>` and \
-    :attr:`pb_pings.port <.Server.port>` to :attr:`pb_pings.host <.Ping.host>` and \
-    :attr:`pb_pings.port <.Server.port>`."""
+    """:attr:`Server.id` of the server."""
+    start: datetime.datetime = sqlalchemy.Column(CompactTime, primary_key=True)
+    """Start of the day (midnight)."""
+    min: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False)
+    """Minimal online players in the day."""
+    max: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False)
+    """Maximal online players in the day."""
+    avg: float = sqlalchemy.Column(sqlalchemy.Float, nullable=False)
+    """Average online players in the day."""
+    samples: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False)
+    """Number of pings in the day."""
+
+
+class Collector(Base):
+    """Alive collector (bot or ``python -m pinger_bot collector`` process), which shares partitions with others.
+
+    See :mod:`pinger_bot.leases`.
+    """
+
+    __tablename__ = "pb_collectors"
+
+    owner: str = sqlalchemy.Column(sqlalchemy.String(128), primary_key=True)
+    """Unique name of the collector's process."""
+    expires: datetime.datetime = sqlalchemy.Column(sqlalchemy.DateTime, nullable=False)
+    """When the collector is considered dead, if it doesn't renew this. In UTC."""
+
+
+class Lease(Base):
+    """Time-limited right of the one collector to ping servers from the partition. See :mod:`pinger_bot.leases`."""
+
+    __tablename__ = "pb_leases"
+
+    partition: int = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True, autoincrement=False)
+    """Number of the partition. Server belongs to the partition ``id % partitions``."""
+    owner: typing.Optional[str] = sqlalchemy.Column(sqlalchemy.String(128))
+    """:attr:`Collector.owner` of the lease, :obj:`None` if the partition is free."""
+    expires: typing.Optional[datetime.datetime] = sqlalchemy.Column(sqlalchemy.DateTime)
+    """When the lease expires, if the owner doesn't renew it. In UTC."""
+
+
+class Greatest(sql.expression.FunctionElement):
+    """SQL ``GREATEST(a, b, ...)``. SQLite doesn't have it, so there it is the scalar ``MAX(a, b, ...)``."""
+
+    type = sqlalchemy.Integer()
+    """Type of the result."""
+    name = "greatest"
+    """Name of the function."""
+    inherit_cache = True
+    """It can be cached like any other function."""
+
+
+@sqlalchemy_compiler.compiles(Greatest)
+def _compile_greatest(element: Greatest, compiler: sql.compiler.SQLCompiler, **kwargs: typing.Any) -> str:
+    return f"GREATEST({compiler.process(element.clauses, **kwargs)})"
+
+
+@sqlalchemy_compiler.compiles(Greatest, "sqlite")
+def _compile_greatest_sqlite(element: Greatest, compiler: sql.compiler.SQLCompiler, **kwargs: typing.Any) -> str:
+    return f"MAX({compiler.process(element.clauses, **kwargs)})"
 
 
 class Database:
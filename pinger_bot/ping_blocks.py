@@ -0,0 +1,313 @@
+"""Compressed blocks of pings, an optional storage for closed partitions.
+
+With :attr:`~pinger_bot.config.Config.ping_blocks`, every closed partition (see :mod:`pinger_bot.ping_storage`)
+is packed into one :class:`pinger_bot.models.PingBlock` per server, and the partition is dropped.
+
+Block is a stream of unsigned varints (LEB128):
+
+* number of pings and number of runs of online players;
+* times, in seconds since 2000-01-01: the first one, the first delta, and then deltas of deltas (zigzag encoded).
+  Pings come every interval, so most of them are ``0`` and take one byte;
+* online players, run-length encoded as ``players, repeats`` pairs.
+
+Encoding and decoding are vectorized with numpy, and decoding reads the blob without copying it, so reads
+don't create a Python object per ping.
+"""
+import datetime
+import typing
+
+import numpy
+import sqlalchemy
+from sqlalchemy.ext import asyncio as sqlalchemy_asyncio
+from structlog import stdlib as structlog
+
+from pinger_bot import config, models, ping_storage
+
+log = structlog.get_logger()
+
+PACK_CHUNK = 1000
+"""How many server IDs are packed at once, so a big partition is not loaded into memory at once."""
+
+
+def _seconds(time: datetime.datetime) -> int:
+    """Time in seconds since 2000-01-01, like :class:`pinger_bot.models.CompactTime` stores it."""
+    return (time - models.CompactTime.EPOCH) // datetime.timedelta(seconds=1)
+
+
+def _zigzag(values: numpy.ndarray) -> numpy.ndarray:
+    """Map signed integers to unsigned ones, so small negative numbers are small too."""
+    values = values.astype(numpy.int64)
+    return ((values << 1) ^ (values >> 63)).astype(numpy.uint64)
+
+
+def _unzigzag(values: numpy.ndarray) -> numpy.ndarray:
+    return (values >> numpy.uint64(1)).astype(numpy.int64) ^ -(values & numpy.uint64(1)).astype(numpy.int64)
+
+
+def _encode_varints(values: numpy.ndarray) -> bytes:
+    """Encode unsigned integers as varints: 7 bits per byte, the high bit is set on all bytes except the last."""
+    values = values.astype(numpy.uint64)
+    lengths = numpy.ones(len(values), dtype=numpy.int64)
+    rest = values >> numpy.uint64(7)
+    while rest.any():
+        lengths += rest > 0
+        rest >>= numpy.uint64(7)
+
+    owner = numpy.repeat(numpy.arange(len(values)), lengths)
+    position = numpy.arange(lengths.sum()) - numpy.repeat(numpy.cumsum(lengths) - lengths, lengths)
+    groups = (values[owner] >> (position * 7).astype(numpy.uint64)) & numpy.uint64(0x7F)
+    groups[position < lengths[owner] - 1] |= numpy.uint64(0x80)
+    return groups.astype(numpy.uint8).tobytes()
+
+
+def _decode_varints(data: bytes) -> numpy.ndarray:
+    raw = numpy.frombuffer(data, dtype=numpy.uint8)
+    if not len(raw):
+        return numpy.array([], dtype=numpy.uint64)
+    last = (raw & 0x80) == 0
+    starts = numpy.flatnonzero(numpy.concatenate(([True], last[:-1])))
+    position = numpy.arange(len(raw)) - numpy.repeat(starts, numpy.diff(numpy.append(starts, len(raw))))
+    groups = (raw & 0x7F).astype(numpy.uint64) << (position * 7).astype(numpy.uint64)
+    return numpy.add.reduceat(groups, starts)
+
+
+def encode(times: numpy.ndarray, players: numpy.ndarray) -> bytes:
+    """Encode pings of one server into a block.
+
+    Args:
+        times: Times of pings in seconds since 2000-01-01 (like :class:`pinger_bot.models.CompactTime`), sorted.
+        players: Online players of every ping.
+
+    Returns:
+        Encoded block, see :mod:`pinger_bot.ping_blocks`.
+    """
+    times = numpy.asarray(times, dtype=numpy.int64)
+    players = numpy.asarray(players, dtype=numpy.int64)
+    deltas = numpy.diff(times)
+    time_stream = numpy.concatenate((times[:1], deltas[:1], numpy.diff(deltas)))
+
+    run_starts = numpy.concatenate(([0], numpy.flatnonzero(numpy.diff(players)) + 1)) if len(players) else players
+    repeats = numpy.diff(numpy.append(run_starts, len(players)))
+    runs = numpy.column_stack((players[run_starts], repeats)).ravel()
+
+    return _encode_varints(
+        numpy.concatenate(
+            (
+                numpy.array([len(times), len(run_starts)], dtype=numpy.uint64),
+                _zigzag(time_stream),
+                runs.astype(numpy.uint64),
+            )
+        )
+    )
+
+
+def decode(data: bytes) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+    """Decode a block from :func:`.encode`.
+
+    Args:
+        data: Encoded block.
+
+    Returns:
+        Times of pings in seconds since 2000-01-01, and online players of every ping.
+    """
+    values = _decode_varints(data)
+    count, runs = int(values[0]), int(values[1])
+
+    time_stream = _unzigzag(values[2 : 2 + count])
+    times = time_stream[:1] + numpy.concatenate(([0], numpy.cumsum(numpy.cumsum(time_stream[1:]))))[:count]
+
+    pairs = values[2 + count : 2 + count + 2 * runs].astype(numpy.int64).reshape(-1, 2)
+    return times, numpy.repeat(pairs[:, 0], pairs[:, 1])
+
+
+class BlockStore:
+    """Packs closed partitions into blocks, and reads pings from blocks and partitions together."""
+
+    async def pack_closed(
+        self, session: sqlalchemy_asyncio.AsyncSession, *, now: typing.Optional[datetime.datetime] = None
+    ) -> typing.List[ping_storage.Partition]:
+        """Pack partitions, which are closed, into blocks and drop them. Doesn't commit.
+
+        Partition is closed :attr:`~pinger_bot.config.Config.ping_interval` after its end, so late writes of other
+        collectors get into it.
+
+        Args:
+            session: Session to use.
+            now: Current time. Default to :meth:`datetime.datetime.now`.
+
+        Returns:
+            Packed partitions.
+        """
+        if now is None:
+            now = datetime.datetime.now()
+        closed_before = now - datetime.timedelta(minutes=config.config.ping_interval)
+
+        packed = [
+            partition for partition in await ping_storage.storage.partitions(session) if partition.end <= closed_before
+        ]
+        for partition in packed:
+            samples = await self._pack(session, partition)
+            await ping_storage.storage.drop(session, partition)
+            log.debug("BlockStore.pack_closed", partition=partition.name, samples=samples)
+        return packed
+
+    @staticmethod
+    async def _pack(session: sqlalchemy_asyncio.AsyncSession, partition: ping_storage.Partition) -> int:
+        """Write blocks of all servers in the partition.
+
+        Returns:
+            Number of packed pings.
+        """
+        table = partition.table
+        first, last = (
+            await session.execute(
+                sqlalchemy.select(sqlalchemy.func.min(table.c.server_id), sqlalchemy.func.max(table.c.server_id))
+            )
+        ).one()
+        if first is None:
+            return 0
+
+        samples = 0
+        for chunk in range(first, last + 1, PACK_CHUNK):
+            rows = (
+                await session.execute(
+                    sqlalchemy.select(
+                        table.c.server_id, sqlalchemy.type_coerce(table.c.time, sqlalchemy.Integer), table.c.players
+                    )
+                    .where(table.c.server_id >= chunk, table.c.server_id < chunk + PACK_CHUNK)
+                    .order_by(table.c.server_id, table.c.time)
+                )
+            ).all()
+            if not rows:
+                continue
+
+            server_ids, times, players = numpy.array(rows, dtype=numpy.int64).T
+            splits = numpy.flatnonzero(numpy.diff(server_ids)) + 1
+            await session.execute(
+                sqlalchemy.insert(models.PingBlock),
+                [
+                    {
+                        "server_id": int(server_column[0]),
+                        "start": partition.start,
+                        "end": partition.end,
+                        "samples": len(server_times),
+                        "data": encode(server_times, server_players),
+                    }
+                    for server_column, server_times, server_players in zip(
+                        numpy.split(server_ids, splits), numpy.split(times, splits), numpy.split(players, splits)
+                    )
+                ],
+            )
+            samples += len(rows)
+        return samples
+
+    async def read(
+        self,
+        session: sqlalchemy_asyncio.AsyncSession,
+        server_id: int,
+        *,
+        since: datetime.datetime,
+        until: typing.Optional[datetime.datetime] = None,
+    ) -> ping_storage.Series:
+        """Get pings of the server from blocks and from partitions, which are not packed yet, sorted by time.
+
+        Args:
+            session: Session to use.
+            server_id: :attr:`pinger_bot.models.Server.id` of the server.
+            since: Start of the window, inclusive.
+            until: End of the window, exclusive. Default to now.
+
+        Returns:
+            Pings as columns.
+        """
+        if until is None:
+            until = datetime.datetime.now()
+        times, players = await self._blocks(session, server_id, since, until)
+        return ping_storage.Series.concat(
+            [
+                ping_storage.Series(times=ping_storage.EPOCH64 + times.astype("timedelta64[s]"), players=players),
+                ping_storage.Series.from_rows(
+                    await ping_storage.storage.read(session, server_id, since=since, until=until)
+                ),
+            ]
+        )
+
+    @staticmethod
+    async def _blocks(
+        session: sqlalchemy_asyncio.AsyncSession, server_id: int, since: datetime.datetime, until: datetime.datetime
+    ) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+        """Decode blocks of the server, which overlap the window, and keep only pings inside it.
+
+        Returns:
+            Times of pings in seconds since 2000-01-01, and online players of every ping.
+        """
+        blocks = (
+            await session.scalars(
+                sqlalchemy.select(models.PingBlock.data)
+                .where(
+                    models.PingBlock.server_id == server_id,
+                    models.PingBlock.start < until,
+                    models.PingBlock.end > since,
+                )
+                .order_by(models.PingBlock.start)
+            )
+        ).all()
+        decoded = [decode(data) for data in blocks]
+        times = numpy.concatenate([times for times, _ in decoded] + [numpy.array([], dtype=numpy.int64)])
+        players = numpy.concatenate([players for _, players in decoded] + [numpy.array([], dtype=numpy.int64)])
+        inside = (times >= _seconds(since)) & (times < _seconds(until))
+        return times[inside], players[inside]
+
+    async def read_plot(
+        self,
+        session: sqlalchemy_asyncio.AsyncSession,
+        server_id: int,
+        *,
+        since: datetime.datetime,
+        until: typing.Optional[datetime.datetime] = None,
+        points: int,
+    ) -> ping_storage.Series:
+        """Like :meth:`pinger_bot.ping_storage.PingStorage.read_plot`, but with blocks too.
+
+        Blocks are downsampled with :func:`pinger_bot.ping_storage.downsample` into the same buckets, so
+        only the bucket on the border of blocks and partitions can be split into two points.
+        """
+        if until is None:
+            until = datetime.datetime.now()
+        times, players = await self._blocks(session, server_id, since, until)
+        return ping_storage.Series.concat(
+            [
+                ping_storage.downsample(times, players, ping_storage.bucket_length(since, until, points)),
+                await ping_storage.storage.read_plot(session, server_id, since=since, until=until, points=points),
+            ]
+        )
+
+    async def nearest(
+        self,
+        session: sqlalchemy_asyncio.AsyncSession,
+        server_id: int,
+        time: datetime.datetime,
+        *,
+        tolerance: datetime.timedelta,
+    ) -> typing.Optional[typing.Tuple[datetime.datetime, int]]:
+        """Like :meth:`pinger_bot.ping_storage.PingStorage.nearest`, but with blocks too."""
+        pings = await self.read(session, server_id, since=time - tolerance, until=time + tolerance)
+        return ping_storage.nearest(pings, time, tolerance)
+
+    @staticmethod
+    async def drop_expired(
+        session: sqlalchemy_asyncio.AsyncSession, *, before: typing.Optional[datetime.datetime] = None
+    ) -> None:
+        """Delete blocks, which are older than :attr:`~pinger_bot.config.Config.ping_retention_hours`. Doesn't commit.
+
+        Args:
+            session: Session to use.
+            before: Delete blocks, which end before this time. Default to now minus retention.
+        """
+        if before is None:
+            before = datetime.datetime.now() - datetime.timedelta(hours=config.config.ping_retention_hours)
+        await session.execute(sqlalchemy.delete(models.PingBlock).where(models.PingBlock.end <= before))
+
+
+store = BlockStore()
+"""Initialized :class:`.BlockStore` object."""
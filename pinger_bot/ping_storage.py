@@ -0,0 +1,427 @@
+"""Storage of pings, split into time partitions.
+
+Pings are stored in tables like ``pb_pings_2024010106_6h``, one for every
+:attr:`~pinger_bot.config.Config.ping_partition_hours` hours, with the same columns as
+:class:`pinger_bot.models.Ping`. ``pb_pings`` itself stays empty, it is only the template for partitions,
+which is managed by migrations.
+
+Retention drops whole expired partitions (:meth:`.PingStorage.drop_expired`), instead of deleting rows
+one by one, and reads (:meth:`.PingStorage.read`) query only partitions, which overlap the requested window.
+It is plain tables, so it works the same on SQLite and PostgreSQL.
+"""
+import dataclasses
+import datetime
+import math
+import re
+import typing
+
+import numpy
+import sqlalchemy
+import sqlalchemy.exc
+from sqlalchemy.ext import asyncio as sqlalchemy_asyncio
+from structlog import stdlib as structlog
+
+from pinger_bot import config, models
+
+log = structlog.get_logger()
+
+PREFIX = "pb_pings_"
+"""Prefix of names of the partitions."""
+_NAME_REGEX = re.compile(r"^pb_pings_(\d{10})_(\d+)h$")
+_EPOCH = datetime.datetime(2000, 1, 1)
+"""Partitions are aligned to this time, so all processes split time the same way."""
+EPOCH64 = numpy.datetime64(models.CompactTime.EPOCH, "s")
+""":attr:`pinger_bot.models.CompactTime.EPOCH` as :class:`numpy.datetime64`."""
+
+_metadata = sqlalchemy.MetaData()
+"""Metadata of the partitions. It is separate from :attr:`pinger_bot.models.Base.metadata`, so migrations
+don't know about partitions."""
+_tables: typing.Dict[str, sqlalchemy.Table] = {}
+
+
+@dataclasses.dataclass
+class Series:
+    """Points of one server as columns, so there is no Python object per point."""
+
+    times: numpy.ndarray
+    """Times of the points, as ``datetime64[s]``."""
+    players: numpy.ndarray
+    """Online players (or average online players of rollups)."""
+    min: typing.Optional[numpy.ndarray] = None
+    """Minimal online players, only for rollups (see :mod:`pinger_bot.rollups`)."""
+    max: typing.Optional[numpy.ndarray] = None
+    """Maximal online players, only for rollups (see :mod:`pinger_bot.rollups`)."""
+    count: typing.Optional[numpy.ndarray] = None
+    """Number of pings in every point, only for downsampled series (see :meth:`.PingStorage.read_plot`)."""
+
+    def __len__(self) -> int:
+        """Number of points."""
+        return len(self.times)
+
+    @property
+    def samples(self) -> int:
+        """Number of pings (or rollups) behind the points. For downsampled series it is the sum of :attr:`.count`."""
+        return int(self.count.sum()) if self.count is not None else len(self)
+
+    @classmethod
+    def from_rows(cls, rows: typing.Sequence[sqlalchemy.engine.Row]) -> "Series":
+        """Make columns from rows with ``time``, ``players`` and optionally ``min`` and ``max``.
+
+        Args:
+            rows: Rows from :meth:`.PingStorage.read` or :func:`pinger_bot.rollups.read`.
+        """
+        series = cls(
+            times=numpy.array([row.time for row in rows], dtype="datetime64[s]"),
+            players=numpy.array([row.players for row in rows]),
+        )
+        if rows and "min" in rows[0]._fields:
+            series.min = numpy.array([row.min for row in rows])
+            series.max = numpy.array([row.max for row in rows])
+        return series
+
+    @classmethod
+    def concat(cls, parts: typing.Sequence["Series"]) -> "Series":
+        """Join series of pings, which go one after another in time."""
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls(times=numpy.array([], dtype="datetime64[s]"), players=numpy.array([], dtype=numpy.int64))
+        return cls(
+            times=numpy.concatenate([part.times for part in parts]),
+            players=numpy.concatenate([part.players for part in parts]),
+            count=(
+                numpy.concatenate([part.count for part in parts])
+                if all(part.count is not None for part in parts)
+                else None
+            ),
+        )
+
+
+def bucket_length(since: datetime.datetime, until: datetime.datetime, points: int) -> int:
+    """Length of one point of the downsampled series, in seconds, so the window has at most ``points`` points."""
+    return max(1, math.ceil((until - since).total_seconds() / points))
+
+
+def downsample(times: numpy.ndarray, players: numpy.ndarray, bucket: int) -> Series:
+    """Average pings in buckets of equal length, like :meth:`.PingStorage.read_plot` does in SQL.
+
+    Args:
+        times: Times of pings in seconds since 2000-01-01 (like :class:`pinger_bot.models.CompactTime`), sorted.
+        players: Online players of every ping.
+        bucket: Length of one bucket, in seconds. See :func:`.bucket_length`.
+    """
+    keys, index, count = numpy.unique(times - times % bucket, return_inverse=True, return_counts=True)
+    average_times = numpy.bincount(index, weights=times, minlength=len(keys)) / count
+    return Series(
+        times=EPOCH64 + numpy.rint(average_times).astype("timedelta64[s]"),
+        players=numpy.bincount(index, weights=players, minlength=len(keys)) / count,
+        count=count,
+    )
+
+
+def nearest(
+    pings: Series, time: datetime.datetime, tolerance: datetime.timedelta
+) -> typing.Optional[typing.Tuple[datetime.datetime, int]]:
+    """Find the ping, which tells online players at the time.
+
+    Pings are a step function: online players stay the same until the next ping (with
+    :attr:`~pinger_bot.config.Config.ping_changes_only` only changes are stored). So it is the last ping
+    before the time, if it is not older than ``tolerance``, or else the first ping after the time, within
+    ``tolerance``.
+
+    Args:
+        pings: Pings, sorted by time.
+        time: The time.
+        tolerance: How far the ping can be from the time.
+
+    Returns:
+        ``(time, players)`` of the ping, or :obj:`None` if there is no ping close enough.
+    """
+    target = numpy.datetime64(time, "s")
+    delta = numpy.timedelta64(tolerance, "s")
+    index = int(numpy.searchsorted(pings.times, target, side="right"))
+    for found in (index - 1, index):
+        if 0 <= found < len(pings) and abs(pings.times[found] - target) < delta:
+            return pings.times[found].item(), int(pings.players[found])
+    return None
+
+
+@dataclasses.dataclass(frozen=True)
+class Partition:
+    """One table with pings of the time window."""
+
+    start: datetime.datetime
+    """Start of the window, inclusive."""
+    hours: int
+    """Length of the window."""
+
+    @property
+    def end(self) -> datetime.datetime:
+        """End of the window, exclusive."""
+        return self.start + datetime.timedelta(hours=self.hours)
+
+    @property
+    def name(self) -> str:
+        """Name of the table. Length is in the name, so changing of the config doesn't break old partitions."""
+        return f"{PREFIX}{self.start:%Y%m%d%H}_{self.hours}h"
+
+    @classmethod
+    def for_time(cls, time: datetime.datetime, hours: typing.Optional[int] = None) -> "Partition":
+        """Get partition, where the ping with this time is stored.
+
+        Args:
+            time: Time of the ping.
+            hours: Length of the partition. Default to :attr:`~pinger_bot.config.Config.ping_partition_hours`.
+
+        Returns:
+            :class:`.Partition` object.
+        """
+        if hours is None:
+            hours = config.config.ping_partition_hours
+        length = datetime.timedelta(hours=hours)
+        return cls(start=_EPOCH + (time - _EPOCH) // length * length, hours=hours)
+
+    @classmethod
+    def from_name(cls, name: str) -> typing.Optional["Partition"]:
+        """Parse name of the table.
+
+        Args:
+            name: Name of the table.
+
+        Returns:
+            :class:`.Partition` or :obj:`None`, if it is not a partition.
+        """
+        match = _NAME_REGEX.match(name)
+        if match is None:
+            return None
+        return cls(start=datetime.datetime.strptime(match[1], "%Y%m%d%H"), hours=int(match[2]))
+
+    def overlaps(self, since: datetime.datetime, until: datetime.datetime) -> bool:
+        """Does the partition have any time from ``since`` (inclusive) to ``until`` (exclusive)."""
+        return self.start < until and self.end > since
+
+    @property
+    def table(self) -> sqlalchemy.Table:
+        """:class:`sqlalchemy.Table` of the partition, a copy of :class:`pinger_bot.models.Ping`'s table."""
+        table = _tables.get(self.name)
+        if table is None:
+            if models.Server.__tablename__ not in _metadata.tables:  # for the foreign key
+                models.Server.__table__.to_metadata(_metadata)
+            table = _tables[self.name] = models.Ping.__table__.to_metadata(_metadata, name=self.name)
+            # names of indexes and constraints must be unique in the whole database (e.g. in MySQL)
+            for index in table.indexes:
+                index.name = index.name.replace(models.Ping.__tablename__, self.name, 1)
+            for constraint in table.foreign_key_constraints:
+                constraint.name = f"{self.name}_to_server"
+        return table
+
+
+class PingStorage:
+    """Reads and writes pings in partitions (see :mod:`pinger_bot.ping_storage`)."""
+
+    def __init__(self) -> None:
+        self._created: typing.Set[str] = set()
+
+    @staticmethod
+    async def partitions(session: sqlalchemy_asyncio.AsyncSession) -> typing.List[Partition]:
+        """Get all existing partitions, sorted by time.
+
+        Args:
+            session: Session to use.
+        """
+        names = await session.run_sync(lambda sync: sqlalchemy.inspect(sync.connection()).get_table_names())
+        partitions = [partition for partition in map(Partition.from_name, names) if partition is not None]
+        return sorted(partitions, key=lambda partition: partition.start)
+
+    async def write(
+        self, session: sqlalchemy_asyncio.AsyncSession, rows: typing.Sequence[typing.Dict[str, typing.Any]]
+    ) -> None:
+        """Insert pings into their partitions, creating partitions if needed. Doesn't commit.
+
+        Args:
+            session: Session to use.
+            rows: Rows of :class:`pinger_bot.models.Ping` without ID, ``time`` is required.
+        """
+        by_partition: typing.Dict[Partition, typing.List[typing.Dict[str, typing.Any]]] = {}
+        for row in rows:
+            by_partition.setdefault(Partition.for_time(row["time"]), []).append(row)
+
+        for partition in by_partition:
+            await self._create(partition)
+        for partition, partition_rows in by_partition.items():
+            await session.execute(sqlalchemy.insert(partition.table), partition_rows)
+
+    async def _create(self, partition: Partition) -> None:
+        """Create the partition, if it doesn't exist yet.
+
+        It is done in its own transaction, so other processes see the partition right away. If it fails, because
+        another process created the partition at the same time, the error is ignored; any other error is raised,
+        and the partition is not remembered as created.
+        """
+        if partition.name in self._created:
+            return
+        try:
+            async with models.db.engine.begin() as connection:
+                await connection.run_sync(partition.table.create, checkfirst=True)
+        except sqlalchemy.exc.DBAPIError:  # every backend raises its own error on the race, so check the result
+            async with models.db.engine.connect() as connection:
+                exists = await connection.run_sync(lambda sync: sqlalchemy.inspect(sync).has_table(partition.name))
+            if not exists:
+                raise
+            log.debug("PingStorage._create race", partition=partition.name)
+        else:
+            log.debug("PingStorage._create", partition=partition.name)
+        self._created.add(partition.name)
+
+    async def read(
+        self,
+        session: sqlalchemy_asyncio.AsyncSession,
+        server_id: int,
+        *,
+        since: datetime.datetime,
+        until: typing.Optional[datetime.datetime] = None,
+    ) -> typing.List[sqlalchemy.engine.Row]:
+        """Get pings of the server, sorted by time.
+
+        Only partitions, which overlap the window, are queried.
+
+        Args:
+            session: Session to use.
+            server_id: :attr:`pinger_bot.models.Server.id` of the server.
+            since: Start of the window, inclusive.
+            until: End of the window, exclusive. Default to now.
+
+        Returns:
+            Rows with ``time`` and ``players``.
+        """
+        if until is None:
+            until = datetime.datetime.now()
+        selects = [
+            sqlalchemy.select(table.c.time, table.c.players).where(
+                table.c.server_id == server_id, table.c.time >= since, table.c.time < until
+            )
+            for table in (
+                partition.table for partition in await self.partitions(session) if partition.overlaps(since, until)
+            )
+        ]
+        if not selects:
+            return []
+
+        pings = sqlalchemy.union_all(*selects).subquery()
+        return list((await session.execute(sqlalchemy.select(pings).order_by(pings.c.time))).all())
+
+    async def read_plot(
+        self,
+        session: sqlalchemy_asyncio.AsyncSession,
+        server_id: int,
+        *,
+        since: datetime.datetime,
+        until: typing.Optional[datetime.datetime] = None,
+        points: int,
+    ) -> Series:
+        """Get pings of the server for a plot, averaged in SQL into at most ``points`` points, sorted by time.
+
+        It is one ``GROUP BY`` over the index of overlapping partitions, so the result doesn't grow with
+        number of pings.
+
+        Args:
+            session: Session to use.
+            server_id: :attr:`pinger_bot.models.Server.id` of the server.
+            since: Start of the window, inclusive.
+            until: End of the window, exclusive. Default to now.
+            points: Maximal number of points. See :func:`.bucket_length`.
+
+        Returns:
+            Series with :attr:`.Series.count`. Time of the point is the average time of its pings.
+        """
+        if until is None:
+            until = datetime.datetime.now()
+        selects = [
+            sqlalchemy.select(
+                sqlalchemy.type_coerce(table.c.time, sqlalchemy.Integer).label("time"), table.c.players
+            ).where(table.c.server_id == server_id, table.c.time >= since, table.c.time < until)
+            for table in (
+                partition.table for partition in await self.partitions(session) if partition.overlaps(since, until)
+            )
+        ]
+        if not selects:
+            return Series.concat([])
+
+        pings = sqlalchemy.union_all(*selects).subquery()
+        # literal, because a bound parameter gets its own placeholder in GROUP BY and ORDER BY, and PostgreSQL
+        # doesn't consider them the same expression
+        bucket = pings.c.time - pings.c.time % sqlalchemy.literal_column(str(bucket_length(since, until, points)))
+        rows = (
+            await session.execute(
+                sqlalchemy.select(
+                    sqlalchemy.func.avg(pings.c.time), sqlalchemy.func.avg(pings.c.players), sqlalchemy.func.count()
+                )
+                .group_by(bucket)
+                .order_by(bucket)
+            )
+        ).all()
+        columns = numpy.array(rows, dtype=numpy.float64).reshape(-1, 3)
+        return Series(
+            times=EPOCH64 + numpy.rint(columns[:, 0]).astype("timedelta64[s]"),
+            players=columns[:, 1],
+            count=columns[:, 2].astype(numpy.int64),
+        )
+
+    async def nearest(
+        self,
+        session: sqlalchemy_asyncio.AsyncSession,
+        server_id: int,
+        time: datetime.datetime,
+        *,
+        tolerance: datetime.timedelta,
+    ) -> typing.Optional[typing.Tuple[datetime.datetime, int]]:
+        """Get the ping, which tells online players at the time. See :func:`.nearest`.
+
+        It reads only pings within ``tolerance`` from the time, with one query over the index.
+
+        Args:
+            session: Session to use.
+            server_id: :attr:`pinger_bot.models.Server.id` of the server.
+            time: The time.
+            tolerance: How far the ping can be from the time.
+        """
+        rows = await self.read(session, server_id, since=time - tolerance, until=time + tolerance)
+        return nearest(Series.from_rows(rows), time, tolerance)
+
+    async def drop(self, session: sqlalchemy_asyncio.AsyncSession, partition: Partition) -> None:
+        """Drop the partition with all its pings. Doesn't commit.
+
+        Args:
+            session: Session to use.
+            partition: Partition to drop.
+        """
+        await session.run_sync(lambda sync: partition.table.drop(sync.connection(), checkfirst=True))
+        self._created.discard(partition.name)
+
+    async def drop_expired(
+        self, session: sqlalchemy_asyncio.AsyncSession, *, before: typing.Optional[datetime.datetime] = None
+    ) -> typing.List[Partition]:
+        """Drop partitions, which are older than :attr:`~pinger_bot.config.Config.ping_retention_hours`. Doesn't commit.
+
+        Partition is dropped only when all its pings are expired, so pings can live up to
+        :attr:`~pinger_bot.config.Config.ping_partition_hours` longer.
+
+        Args:
+            session: Session to use.
+            before: Drop partitions, which end before this time. Default to now minus retention.
+
+        Returns:
+            Dropped partitions.
+        """
+        if before is None:
+            before = datetime.datetime.now() - datetime.timedelta(hours=config.config.ping_retention_hours)
+
+        dropped = [partition for partition in await self.partitions(session) if partition.end <= before]
+        for partition in dropped:
+            await self.drop(session, partition)
+        if dropped:
+            log.debug("PingStorage.drop_expired", partitions=[partition.name for partition in dropped])
+        return dropped
+
+
+storage = PingStorage()
+"""Initialized :class:`.PingStorage` object."""
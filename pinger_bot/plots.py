@@ -0,0 +1,359 @@
+"""Rendering of plots in a pool of processes, so it doesn't block the event loop.
+
+Rendering of one plot takes milliseconds (or, with matplotlib, tens or hundreds of milliseconds) of CPU,
+and it holds the GIL, so in the bot's process it stalls the gateway heartbeat and all other commands. Instead,
+:data:`.renderer` sends plain arrays (:class:`.Plot`) to :attr:`~pinger_bot.config.Config.plot_processes` warm
+processes, and gets PNG bytes back.
+
+Plots are drawn by one of :data:`.BACKENDS`, chosen with :attr:`~pinger_bot.config.Config.plot_backend`:
+
+* ``sparkline`` - lightweight rasterizer on numpy (see :mod:`pinger_bot.sparkline`);
+* ``matplotlib`` - the object-oriented :class:`matplotlib.figure.Figure` API, without :mod:`matplotlib.pyplot`,
+  so no global figure manager keeps plots after rendering.
+
+Backends are imported only when they are used.
+
+Rendered plots are kept in :data:`.cache`, so the same plot is not rendered again until new pings come.
+"""
+import asyncio
+import collections
+import concurrent.futures
+import dataclasses
+import datetime
+import functools
+import io
+import multiprocessing
+import time
+import typing
+
+import cachetools
+import numpy
+from structlog import stdlib as structlog
+
+from pinger_bot import config
+
+log = structlog.get_logger()
+
+
+@dataclasses.dataclass(frozen=True)
+class Plot:
+    """Everything needed to draw a plot, as plain values, so it is cheap to send to another process."""
+
+    times: numpy.ndarray
+    """Times of the points, as ``datetime64[s]``."""
+    players: numpy.ndarray
+    """Online players (or average online players) of every point."""
+    title: str
+    """Title of the plot, already translated."""
+    xlabel: str
+    """Label of the time axis, already translated."""
+    ylabel: str
+    """Label of the players axis, already translated."""
+    date_format: str
+    """Format of labels on the time axis."""
+    min: typing.Optional[numpy.ndarray] = None
+    """Minimal online players of every point. If set with :attr:`.max`, area between them is filled."""
+    max: typing.Optional[numpy.ndarray] = None
+    """Maximal online players of every point."""
+
+
+def _render_sparkline(plot: Plot) -> bytes:
+    from pinger_bot import sparkline
+
+    return sparkline.render(plot)
+
+
+def _render_matplotlib(plot: Plot) -> bytes:
+    import matplotlib.dates
+    import matplotlib.figure
+
+    figure = matplotlib.figure.Figure()
+    axes = figure.subplots()
+    axes.xaxis.set_major_formatter(matplotlib.dates.DateFormatter(plot.date_format))
+    axes.plot(plot.times, plot.players)
+    if plot.min is not None and plot.max is not None:
+        axes.fill_between(plot.times, plot.min, plot.max, alpha=0.3)
+
+    axes.set_xlabel(plot.xlabel)
+    axes.set_ylabel(plot.ylabel)
+    axes.set_title(plot.title)
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+BACKENDS: typing.Dict[str, typing.Callable[[Plot], bytes]] = {
+    "sparkline": _render_sparkline,
+    "matplotlib": _render_matplotlib,
+}
+"""Functions, which draw :class:`.Plot` into PNG, by name. See :attr:`~pinger_bot.config.Config.plot_backend`."""
+
+
+def create_plot(plot: Plot, backend: typing.Optional[str] = None) -> bytes:
+    """Draw the plot. It is called in a process of the pool.
+
+    Args:
+        plot: What to draw.
+        backend: Key of :data:`.BACKENDS`. Default to :attr:`~pinger_bot.config.Config.plot_backend`.
+
+    Returns:
+        PNG image.
+    """
+    return BACKENDS[backend or config.config.plot_backend](plot)
+
+
+def _warm_up(backend: str) -> None:
+    """Draw a tiny plot, so the first real one doesn't wait for loading of fonts and the backend."""
+    create_plot(
+        Plot(
+            times=numpy.array(["2000-01-01T00:00", "2000-01-01T01:00"], dtype="datetime64[s]"),
+            players=numpy.array([0, 1]),
+            title="",
+            xlabel="",
+            ylabel="",
+            date_format="%H:%M",
+        ),
+        backend,
+    )
+
+
+class Renderer:
+    """Pool of processes, which render plots.
+
+    - The pool is started once (see :meth:`.start`), and its processes are reused for all plots.
+    - No more than :attr:`~pinger_bot.config.Config.plot_processes` plots are rendered at once, others wait
+      in the event loop, so they can be cancelled.
+    - Waiting and rendering are limited by :attr:`~pinger_bot.config.Config.plot_timeout`. The process can't
+      be interrupted, so it finishes the plot anyway, but nobody waits for it. It keeps its place in the limit
+      until then, so timed out plots don't pile up in the pool.
+    """
+
+    def __init__(self) -> None:
+        self._pool: typing.Optional[concurrent.futures.Executor] = None
+        self._semaphore: typing.Optional[asyncio.Semaphore] = None
+
+    def start(self) -> None:
+        """Start the pool and warm up its processes. Does nothing, if the pool is already started.
+
+        With :attr:`~pinger_bot.config.Config.plot_processes` ``0``, plots are rendered in a thread of this process.
+        """
+        if self._pool is not None:
+            return
+        processes = config.config.plot_processes
+        if processes > 0:
+            # `spawn`, so processes don't inherit event loop and connections of the bot
+            self._pool = concurrent.futures.ProcessPoolExecutor(processes, multiprocessing.get_context("spawn"))
+        else:
+            self._pool = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="plots")
+        for _ in range(max(processes, 1)):
+            self._pool.submit(_warm_up, config.config.plot_backend)
+        log.debug("Renderer.start", processes=processes)
+
+    def close(self) -> None:
+        """Stop the pool. Plots in progress are not waited."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        self._semaphore = None
+
+    async def render(self, plot: Plot) -> bytes:
+        """Render the plot in the pool. Starts the pool, if it is not started yet.
+
+        Args:
+            plot: What to draw.
+
+        Returns:
+            PNG image.
+
+        Raises:
+            asyncio.TimeoutError: If the plot isn't rendered in :attr:`~pinger_bot.config.Config.plot_timeout`.
+        """
+        return await asyncio.wait_for(self._render(plot), config.config.plot_timeout)
+
+    async def _render(self, plot: Plot) -> bytes:
+        self.start()
+        if self._semaphore is None:  # create it lazily, to be bound to the running event loop
+            self._semaphore = asyncio.Semaphore(max(config.config.plot_processes, 1))
+
+        semaphore, loop = self._semaphore, asyncio.get_running_loop()
+        await semaphore.acquire()
+        try:
+            # the backend is passed, so processes don't depend on their own copy of the config.
+            # the pool is started above, so it isn't `None`
+            future = self._pool.submit(create_plot, plot, config.config.plot_backend)  # type: ignore[union-attr]
+        except BaseException:
+            semaphore.release()
+            raise
+        # released when the process finishes the plot, not when the caller stops waiting for it
+        future.add_done_callback(functools.partial(self._release, loop, semaphore))
+        return await asyncio.wrap_future(future)
+
+    @staticmethod
+    def _release(
+        loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore, _: "concurrent.futures.Future[bytes]"
+    ) -> None:
+        """Release the place of the finished plot. Called in a thread of the pool."""
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(semaphore.release)
+
+
+renderer = Renderer()
+"""Initialized :class:`.Renderer` object."""
+
+
+class PlotKey(typing.NamedTuple):
+    """Key of the rendered plot in :class:`.PlotCache`. The plot changes only with new pings, so they are in the key."""
+
+    server_id: int
+    """:attr:`pinger_bot.models.Server.id` of the server."""
+    ip: str
+    """IP of the server in the title of the plot."""
+    range: str
+    """Time range of the plot, key of :data:`pinger_bot.ext.commands.statistic.RANGES`."""
+    latest: datetime.datetime
+    """Time of the last point of the plot."""
+    samples: int
+    """Number of pings (or rollups) in the plot."""
+
+
+@dataclasses.dataclass
+class PlotCacheStats:
+    """Counters of the :class:`.PlotCache`."""
+
+    hits: int = 0
+    """Plots returned from the cache."""
+    misses: int = 0
+    """Plots, which were not in the cache."""
+    coalesced: int = 0
+    """Plots, which waited for the same plot already being rendered, instead of rendering it again."""
+    evictions: int = 0
+    """Plots, which were removed, because the cache was out of :attr:`~pinger_bot.config.Config.plot_cache_bytes`."""
+    renders: int = 0
+    """Rendered plots."""
+    render_seconds: float = 0.0
+    """Total time of rendering, including waiting for a free process."""
+
+    @property
+    def hit_rate(self) -> float:
+        """Part of requests, which were answered from the cache. From ``0`` to ``1``."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class _CountingLRUCache(cachetools.LRUCache):  # type: ignore[type-arg]
+    """:class:`cachetools.LRUCache`, which counts evictions."""
+
+    def __init__(self, maxsize: int, stats: PlotCacheStats) -> None:
+        super().__init__(maxsize, getsizeof=len)
+        self.stats = stats
+
+    def popitem(self) -> typing.Tuple[typing.Any, typing.Any]:
+        """Evict the least recently used item, because cache is full."""
+        item = super().popitem()
+        self.stats.evictions += 1
+        return item
+
+
+class PlotCache:
+    """Cache of rendered plots, bounded by :attr:`~pinger_bot.config.Config.plot_cache_bytes` of PNGs.
+
+    - The least recently used plots are evicted first.
+    - Identical plots, which are rendered at the same time, are rendered once.
+    - It remembers, how often every plot is requested, so the most popular ones can be rendered in advance
+      (see :attr:`~pinger_bot.config.Config.plot_prerender`).
+    """
+
+    def __init__(self) -> None:
+        self.stats = PlotCacheStats()
+        """Counters of the cache."""
+        self.requests: "collections.Counter[typing.Tuple[int, str, str]]" = collections.Counter()
+        """How many times every plot was requested, by ``(server_id, ip, range)``."""
+        self._cache: typing.Optional[_CountingLRUCache] = None
+        self._in_flight: "typing.Dict[PlotKey, asyncio.Task[bytes]]" = {}
+
+    def _get_cache(self) -> _CountingLRUCache:
+        if self._cache is None:
+            self._cache = _CountingLRUCache(config.config.plot_cache_bytes, self.stats)
+        return self._cache
+
+    async def get(
+        self, key: PlotKey, render: typing.Callable[[], typing.Awaitable[bytes]], *, request: bool = True
+    ) -> bytes:
+        """Get the plot from the cache, or render and cache it.
+
+        Args:
+            key: Key of the plot.
+            render: Renders the plot, if it is not cached. Like :meth:`.Renderer.render`.
+            request: Count it as request of a user, see :attr:`.requests`. Pre-rendering is not a request.
+
+        Returns:
+            PNG image.
+        """
+        if request:
+            self.requests[key.server_id, key.ip, key.range] += 1
+        cache = self._get_cache()
+        image: typing.Optional[bytes] = cache.get(key)
+        if image is not None:
+            self.stats.hits += 1
+            return image
+
+        self.stats.misses += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = self._in_flight[key] = asyncio.create_task(self._render(key, render))
+            task.add_done_callback(functools.partial(self._forget, key))
+        else:
+            self.stats.coalesced += 1
+        # shield, so if one caller is cancelled, the plot is still rendered for others
+        return await asyncio.shield(task)
+
+    async def _render(self, key: PlotKey, render: typing.Callable[[], typing.Awaitable[bytes]]) -> bytes:
+        start = time.perf_counter()
+        image = await render()
+        self.stats.renders += 1
+        self.stats.render_seconds += time.perf_counter() - start
+
+        cache = self._get_cache()
+        if len(image) <= cache.maxsize:
+            cache[key] = image
+        return image
+
+    def _forget(self, key: PlotKey, task: "asyncio.Task[bytes]") -> None:
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # mark exception as retrieved, even if all callers were cancelled
+
+    def popular(self, limit: int) -> typing.List[typing.Tuple[int, str, str]]:
+        """Get the most requested plots.
+
+        Args:
+            limit: How many plots to return.
+
+        Returns:
+            ``(server_id, ip, range)`` of the plots, the most requested first.
+        """
+        return [plot for plot, _ in self.requests.most_common(limit)]
+
+    def summary(self) -> typing.Dict[str, typing.Union[int, float]]:
+        """Get counters, with the hit rate, size and average time of rendering, to put them in logs."""
+        cache = self._cache
+        return {
+            **dataclasses.asdict(self.stats),
+            "hit_rate": round(self.stats.hit_rate, 3),
+            "average_render_ms": round(
+                self.stats.render_seconds / self.stats.renders * 1000 if self.stats.renders else 0, 1
+            ),
+            "plots": len(cache) if cache is not None else 0,
+            "bytes": int(cache.currsize) if cache is not None else 0,
+        }
+
+    def clear(self) -> None:
+        """Remove everything from the cache and reset counters."""
+        self._cache = None
+        self.stats = PlotCacheStats()
+        self.requests.clear()
+
+
+cache = PlotCache()
+"""Initialized :class:`.PlotCache` object."""
@@ -0,0 +1,278 @@
+"""In-memory registry of the servers, which were added to the bot."""
+import dataclasses
+import typing
+
+import sqlalchemy
+from structlog import stdlib as structlog
+
+from pinger_bot import config, models
+
+log = structlog.get_logger()
+
+
+@dataclasses.dataclass
+class ServerRecord:
+    """In-memory copy of the one :class:`pinger_bot.models.Server` row."""
+
+    id: int
+    """Unique ID of the server."""
+    host: str
+    """Hostname of the server, can be number IP or domain. Always without port."""
+    port: int
+    """Port of the server."""
+    max: int
+    """Max players on the server."""
+    alias: typing.Optional[str]
+    """Alias of the server. Can be used as IP of the server."""
+    owner: int
+    """Owner's Discord ID of the server."""
+    java: typing.Optional[bool]
+    """Is the server Java (or Bedrock). :obj:`None` if unknown."""
+
+    @property
+    def ip(self) -> str:
+        """IP of the server with port, like ``127.0.0.1:25565``."""
+        return f"{self.host}:{self.port}"
+
+    @classmethod
+    def from_model(cls, server: typing.Union[models.Server, sqlalchemy.engine.Row]) -> "ServerRecord":
+        """Create record from the ORM object or row with all columns.
+
+        Args:
+            server: :class:`pinger_bot.models.Server` object or row from :func:`.iter_servers`.
+
+        Returns:
+            Created :class:`.ServerRecord`.
+        """
+        return cls(
+            id=server.id,
+            host=server.host,
+            port=server.port,
+            max=server.max,
+            alias=server.alias,
+            owner=server.owner,
+            java=server.java,
+        )
+
+
+def phase(server_id: int, slots: int) -> int:
+    """Slot of the server in :class:`pinger_bot.ext.scheduling.TimingWheel`.
+
+    It uses Fibonacci hashing, instead of plain ``id % slots``, so it doesn't correlate with splitting servers
+    by ``id % processes`` (see :mod:`pinger_bot.collector`). Otherwise, one process would get only half of
+    the slots with two processes.
+
+    Args:
+        server_id: ID of the server.
+        slots: Total number of the slots.
+
+    Returns:
+        Number from ``0`` to ``slots - 1``.
+    """
+    return ((server_id * 2654435761) & 0xFFFFFFFF) * slots >> 32
+
+
+async def iter_servers(
+    chunk_size: int,
+    *,
+    shard: typing.Optional[typing.Tuple[int, int]] = None,
+    partitions: typing.Optional[typing.Tuple[typing.Collection[int], int]] = None,
+) -> typing.AsyncIterator[sqlalchemy.engine.Row]:
+    """Iterate over all servers in database, loading them by chunks.
+
+    Every chunk is a separate short query (keyset pagination by ``id``), which loads only
+    rows, instead of full ORM objects.
+
+    Args:
+        chunk_size: How many rows to load from database at once.
+        shard: ``(index, shards)`` to load only servers with ``id % shards == index``. :obj:`None` to load all.
+        partitions: ``(owned, total)`` to load only servers with ``id % total in owned``, see
+            :mod:`pinger_bot.leases`. :obj:`None` to load all.
+
+    Yields:
+        Rows of :class:`pinger_bot.models.Server` table.
+    """
+    last_id: typing.Optional[int] = None
+    while True:
+        query = (
+            sqlalchemy.select(
+                models.Server.id,
+                models.Server.host,
+                models.Server.port,
+                models.Server.max,
+                models.Server.alias,
+                models.Server.owner,
+                models.Server.java,
+            )
+            .order_by(models.Server.id)
+            .limit(chunk_size)
+        )
+        if last_id is not None:
+            query = query.where(models.Server.id > last_id)
+        if shard is not None:
+            query = query.where(models.Server.id % shard[1] == shard[0])
+        if partitions is not None:
+            query = query.where((models.Server.id % partitions[1]).in_(list(partitions[0])))
+
+        async with models.db.session() as session:
+            chunk = (await session.execute(query)).all()
+        log.debug("registry.iter_servers", last_id=last_id, loaded=len(chunk))
+
+        for row in chunk:
+            yield row
+
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1].id
+
+
+class Registry:
+    """In-memory copy of the :class:`pinger_bot.models.Server` table, with O(1) lookups by alias and address.
+
+    Servers are also indexed by their :func:`.phase`, so every slot of the timing wheel gets its servers
+    without going over all of them.
+
+    It is loaded on startup (see :meth:`.load`), and then every place which writes to the table
+    must also update the registry. Changes from other processes are seen after the next reload
+    (see :func:`pinger_bot.ext.scheduling.reload_servers` and :func:`pinger_bot.collector.load`).
+    """
+
+    def __init__(self) -> None:
+        self._by_id: typing.Dict[int, ServerRecord] = {}
+        self._by_alias: typing.Dict[str, ServerRecord] = {}
+        self._by_address: typing.Dict[typing.Tuple[str, int], ServerRecord] = {}
+        self._by_phase: typing.Dict[int, typing.Dict[int, ServerRecord]] = {}
+        self._phase_slots = 0
+
+    def __len__(self) -> int:
+        """Number of servers in the registry."""
+        return len(self._by_id)
+
+    def __iter__(self) -> typing.Iterator[ServerRecord]:
+        """Iterate over snapshot of all servers, so the registry can be changed while iterating."""
+        return iter(list(self._by_id.values()))
+
+    async def load(
+        self,
+        *,
+        shard: typing.Optional[typing.Tuple[int, int]] = None,
+        partitions: typing.Optional[typing.Tuple[typing.Collection[int], int]] = None,
+    ) -> None:
+        """Load all servers from database, replacing current content of the registry.
+
+        Args:
+            shard: Load only one part of the servers, see :func:`.iter_servers`.
+            partitions: Load only servers from these partitions, see :func:`.iter_servers`.
+        """
+        by_id: typing.Dict[int, ServerRecord] = {}
+        async for row in iter_servers(config.config.ping_chunk_size, shard=shard, partitions=partitions):
+            by_id[row.id] = ServerRecord.from_model(row)
+
+        self._by_id = by_id
+        self._by_alias = {record.alias: record for record in by_id.values() if record.alias is not None}
+        self._by_address = {(record.host, record.port): record for record in by_id.values()}
+        self._index_phases()
+        log.debug("Registry.load", servers=len(self))
+
+    def clear(self) -> None:
+        """Remove all servers from the registry."""
+        self._by_id, self._by_alias, self._by_address, self._by_phase = {}, {}, {}, {}
+
+    def _index_phases(self) -> None:
+        """Rebuild the index by phase for current :attr:`~pinger_bot.config.Config.ping_slots`."""
+        self._phase_slots = config.config.ping_slots
+        self._by_phase = {}
+        for record in self._by_id.values():
+            self._by_phase.setdefault(phase(record.id, self._phase_slots), {})[record.id] = record
+
+    def add(self, record: ServerRecord) -> None:
+        """Add new server to the registry, or replace existing one with the same ID.
+
+        Args:
+            record: Server to add.
+        """
+        self.remove(record.id)
+        self._by_id[record.id] = record
+        self._by_address[(record.host, record.port)] = record
+        if record.alias is not None:
+            self._by_alias[record.alias] = record
+        if self._phase_slots:
+            self._by_phase.setdefault(phase(record.id, self._phase_slots), {})[record.id] = record
+
+    def remove(self, server_id: int) -> None:
+        """Remove server from the registry, if it is there.
+
+        Args:
+            server_id: ID of the server.
+        """
+        record = self._by_id.pop(server_id, None)
+        if record is None:
+            return
+
+        self._by_address.pop((record.host, record.port), None)
+        if record.alias is not None:
+            self._by_alias.pop(record.alias, None)
+        if self._phase_slots:
+            self._by_phase.get(phase(server_id, self._phase_slots), {}).pop(server_id, None)
+
+    def update(self, server_id: int, **values: typing.Union[int, str, bool, None]) -> None:
+        """Update fields of the server, if it is in the registry.
+
+        Args:
+            server_id: ID of the server.
+            values: New values of :class:`.ServerRecord`'s fields.
+        """
+        record = self._by_id.get(server_id)
+        if record is not None:
+            self.add(dataclasses.replace(record, **values))  # type: ignore[arg-type] # can't type kwargs properly
+
+    def get(self, server_id: int) -> typing.Optional[ServerRecord]:
+        """Get server by its ID.
+
+        Args:
+            server_id: ID of the server.
+
+        Returns:
+            :class:`.ServerRecord` or :obj:`None` if not found.
+        """
+        return self._by_id.get(server_id)
+
+    def by_phase(self, server_phase: int) -> typing.List[ServerRecord]:
+        """Get servers with the phase, see :func:`.phase`.
+
+        Args:
+            server_phase: Phase from ``0`` to :attr:`~pinger_bot.config.Config.ping_slots` ``- 1``.
+
+        Returns:
+            Servers of this phase.
+        """
+        if self._phase_slots != config.config.ping_slots:  # it is changed only in tests, but stay correct anyway
+            self._index_phases()
+        return list(self._by_phase.get(server_phase, {}).values())
+
+    def by_alias(self, alias: str) -> typing.Optional[ServerRecord]:
+        """Get server by its alias.
+
+        Args:
+            alias: Alias of the server.
+
+        Returns:
+            :class:`.ServerRecord` or :obj:`None` if not found.
+        """
+        return self._by_alias.get(alias)
+
+    def by_address(self, host: str, port: int) -> typing.Optional[ServerRecord]:
+        """Get server by its host and port.
+
+        Args:
+            host: Host of the server, always without port.
+            port: Port of the server.
+
+        Returns:
+            :class:`.ServerRecord` or :obj:`None` if not found.
+        """
+        return self._by_address.get((host, port))
+
+
+servers = Registry()
+"""Initialized :class:`.Registry` object."""
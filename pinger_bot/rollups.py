@@ -0,0 +1,207 @@
+"""Hourly and daily aggregates of pings, for statistic longer than raw pings are stored.
+
+Raw pings are stored only :attr:`~pinger_bot.config.Config.ping_retention_hours`. Every finished hour is
+aggregated into :class:`pinger_bot.models.HourlyRollup` (minimal, maximal and average online players, and number
+of pings of every server), and every finished day - from hourly rollups into :class:`pinger_bot.models.DailyRollup`.
+
+It is incremental: only periods after the last rolled up one are aggregated, with one ``INSERT ... SELECT ...
+GROUP BY`` per tier, so it works the same on every database. Every tier has its own retention
+(:attr:`~pinger_bot.config.Config.rollup_hourly_retention_days` and
+:attr:`~pinger_bot.config.Config.rollup_daily_retention_days`).
+"""
+import dataclasses
+import datetime
+import typing
+
+import sqlalchemy
+from sqlalchemy.ext import asyncio as sqlalchemy_asyncio
+from structlog import stdlib as structlog
+
+from pinger_bot import config, models, ping_storage
+
+log = structlog.get_logger()
+
+Rollup = typing.Union[typing.Type[models.HourlyRollup], typing.Type[models.DailyRollup]]
+
+
+@dataclasses.dataclass(frozen=True)
+class Tier:
+    """One level of aggregation."""
+
+    model: Rollup
+    """Model, where aggregates are stored."""
+    length: datetime.timedelta
+    """Length of one aggregated period."""
+    retention_option: str
+    """Name of the option in :class:`~pinger_bot.config.Config` with retention of the tier, in days."""
+
+    @property
+    def retention(self) -> datetime.timedelta:
+        """For how long aggregates are stored."""
+        return datetime.timedelta(days=getattr(config.config, self.retention_option))
+
+    def floor(self, time: datetime.datetime) -> datetime.datetime:
+        """Get start of the period, which contains the time."""
+        epoch = models.CompactTime.EPOCH
+        return epoch + (time - epoch) // self.length * self.length
+
+
+HOURLY = Tier(models.HourlyRollup, datetime.timedelta(hours=1), "rollup_hourly_retention_days")
+"""Hourly aggregates of raw pings."""
+DAILY = Tier(models.DailyRollup, datetime.timedelta(days=1), "rollup_daily_retention_days")
+"""Daily aggregates of hourly ones."""
+
+
+def _period_start(column: sqlalchemy.sql.ColumnElement, tier: Tier) -> sqlalchemy.sql.ColumnElement:
+    """SQL expression with start of the period of :class:`pinger_bot.models.CompactTime` column.
+
+    Length of the period is a literal, because the expression is used in both SELECT and GROUP BY, and with
+    a bound parameter PostgreSQL gets different placeholders there and doesn't consider them the same expression.
+    """
+    seconds = sqlalchemy.type_coerce(column, sqlalchemy.Integer)
+    return seconds - seconds % sqlalchemy.literal_column(str(int(tier.length.total_seconds())))
+
+
+async def _next_start(
+    session: sqlalchemy_asyncio.AsyncSession, tier: Tier, *, now: datetime.datetime
+) -> typing.Optional[datetime.datetime]:
+    """Get start of the first period, which is not rolled up yet.
+
+    Returns:
+        :obj:`None` if there is nothing to roll up yet.
+    """
+    last = (await session.execute(sqlalchemy.select(sqlalchemy.func.max(tier.model.start)))).scalar_one()
+    if last is not None:
+        start = last + tier.length
+    elif tier is HOURLY:
+        partitions = await ping_storage.storage.partitions(session)
+        if not partitions:
+            return None
+        start = partitions[0].start
+    else:
+        start = (await session.execute(sqlalchemy.select(sqlalchemy.func.min(models.HourlyRollup.start)))).scalar_one()
+        if start is None:
+            return None
+    # older data is already expired anyway
+    return tier.floor(max(start, now - tier.retention))
+
+
+async def _roll_up_hours(
+    session: sqlalchemy_asyncio.AsyncSession, *, now: datetime.datetime, until: datetime.datetime
+) -> None:
+    since = await _next_start(session, HOURLY, now=now)
+    if since is None or since >= until:
+        return
+
+    tables = [
+        partition.table
+        for partition in await ping_storage.storage.partitions(session)
+        if partition.overlaps(since, until)
+    ]
+    if not tables:
+        return
+    pings = sqlalchemy.union_all(
+        *(
+            sqlalchemy.select(table.c.server_id, table.c.time, table.c.players).where(
+                table.c.time >= since, table.c.time < until
+            )
+            for table in tables
+        )
+    ).subquery()
+    hour = _period_start(pings.c.time, HOURLY)
+    await session.execute(
+        sqlalchemy.insert(models.HourlyRollup).from_select(
+            ["server_id", "start", "min", "max", "avg", "samples"],
+            sqlalchemy.select(
+                pings.c.server_id,
+                hour,
+                sqlalchemy.func.min(pings.c.players),
+                sqlalchemy.func.max(pings.c.players),
+                sqlalchemy.func.avg(pings.c.players),
+                sqlalchemy.func.count(),
+            ).group_by(pings.c.server_id, hour),
+        )
+    )
+    log.debug("rollups._roll_up_hours", since=since, until=until)
+
+
+async def _roll_up_days(
+    session: sqlalchemy_asyncio.AsyncSession, *, now: datetime.datetime, until: datetime.datetime
+) -> None:
+    since = await _next_start(session, DAILY, now=now)
+    if since is None or since >= until:
+        return
+
+    hourly = models.HourlyRollup
+    day = _period_start(hourly.start, DAILY)
+    await session.execute(
+        sqlalchemy.insert(models.DailyRollup).from_select(
+            ["server_id", "start", "min", "max", "avg", "samples"],
+            sqlalchemy.select(
+                hourly.server_id,
+                day,
+                sqlalchemy.func.min(hourly.min),
+                sqlalchemy.func.max(hourly.max),
+                sqlalchemy.func.sum(hourly.avg * hourly.samples) / sqlalchemy.func.sum(hourly.samples),
+                sqlalchemy.func.sum(hourly.samples),
+            )
+            .where(hourly.start >= since, hourly.start < until)
+            .group_by(hourly.server_id, day),
+        )
+    )
+    log.debug("rollups._roll_up_days", since=since, until=until)
+
+
+async def roll_up(session: sqlalchemy_asyncio.AsyncSession, *, now: typing.Optional[datetime.datetime] = None) -> None:
+    """Aggregate finished hours and days, which are not aggregated yet, and delete expired aggregates.
+
+    Period is finished :attr:`~pinger_bot.config.Config.ping_interval` after its end, so late writes of other
+    collectors get into it. Doesn't commit.
+
+    Args:
+        session: Session to use.
+        now: Current time. Default to :meth:`datetime.datetime.now`.
+    """
+    if now is None:
+        now = datetime.datetime.now()
+    ready = now - datetime.timedelta(minutes=config.config.ping_interval)
+
+    await _roll_up_hours(session, now=now, until=HOURLY.floor(ready))
+    await _roll_up_days(session, now=now, until=DAILY.floor(ready))
+    for tier in (HOURLY, DAILY):
+        await session.execute(sqlalchemy.delete(tier.model).where(tier.model.start < now - tier.retention))
+
+
+async def read(
+    session: sqlalchemy_asyncio.AsyncSession,
+    server_id: int,
+    tier: Tier,
+    *,
+    since: datetime.datetime,
+    until: typing.Optional[datetime.datetime] = None,
+) -> typing.List[sqlalchemy.engine.Row]:
+    """Get aggregates of the server, sorted by time.
+
+    Args:
+        session: Session to use.
+        server_id: :attr:`pinger_bot.models.Server.id` of the server.
+        tier: :data:`.HOURLY` or :data:`.DAILY`.
+        since: Start of the window, inclusive. Period, which contains it, is included too.
+        until: End of the window, exclusive. Default to now.
+
+    Returns:
+        Rows with ``time`` (start of the period), ``players`` (average online players), ``min`` and ``max``,
+        so they can be used like pings from :meth:`pinger_bot.ping_storage.PingStorage.read`.
+    """
+    if until is None:
+        until = datetime.datetime.now()
+    model = tier.model
+    return list(
+        (
+            await session.execute(
+                sqlalchemy.select(model.start.label("time"), model.avg.label("players"), model.min, model.max)
+                .where(model.server_id == server_id, model.start >= tier.floor(since), model.start < until)
+                .order_by(model.start)
+            )
+        ).all()
+    )
@@ -0,0 +1,197 @@
+"""Lightweight plot backend: draws the line of online players with numpy, without matplotlib.
+
+Everything is rasterized at once over arrays of points: the area between minimal and maximal online is filled
+column by column, and segments of the line are sampled into pixels together. Only text (title, labels of axes
+and ticks) is drawn with Pillow, which is also used to write the PNG. The image uses a palette of a few colors,
+so it compresses well.
+
+Text is drawn with :attr:`~pinger_bot.config.Config.plot_font`, by default with DejaVu Sans from matplotlib's data,
+so the localized title is readable. The font is only read from disk, matplotlib itself is not imported.
+"""
+import datetime
+import functools
+import importlib.util
+import io
+import pathlib
+import typing
+
+import numpy
+from PIL import Image, ImageDraw, ImageFont
+
+from pinger_bot import config, plots
+
+WIDTH, HEIGHT = 640, 480
+"""Size of the image, the same as of matplotlib's default figure."""
+LEFT, RIGHT, TOP, BOTTOM = 70, 20, 40, 55
+"""Margins around the plot area, for labels."""
+
+BACKGROUND, LINE, BAND, AXES, GRID = range(5)
+"""Indexes of colors in :data:`.PALETTE`."""
+PALETTE = [(255, 255, 255), (31, 119, 180), (188, 214, 232), (0, 0, 0), (225, 225, 225)]
+"""Colors of the image: background, line, area between minimal and maximal online, axes with text and grid."""
+
+_TIME_STEPS = [
+    numpy.timedelta64(seconds, "s")
+    for seconds in (60, 300, 900, 1800, 3600, 7200, 10800, 21600, 43200)
+    + tuple(86400 * days for days in (1, 2, 7, 14, 30, 60, 90, 180))
+]
+"""Possible distances between ticks of the time axis."""
+
+
+def _font_path() -> pathlib.Path:
+    """Get :attr:`~pinger_bot.config.Config.plot_font`, or path to DejaVu Sans in matplotlib's data.
+
+    Pillow's default font is not used, because it has no Cyrillic letters.
+
+    Raises:
+        ModuleNotFoundError: If the font is not set, and matplotlib is not installed.
+    """
+    if config.config.plot_font is not None:
+        return pathlib.Path(config.config.plot_font)
+    # matplotlib is not imported, so rendering stays light
+    spec = importlib.util.find_spec("matplotlib")
+    if spec is None or not spec.submodule_search_locations:
+        raise ModuleNotFoundError("matplotlib is not installed, set `plot_font` in the config.")
+    return pathlib.Path(spec.submodule_search_locations[0]) / "mpl-data" / "fonts" / "ttf" / "DejaVuSans.ttf"
+
+
+@functools.lru_cache(maxsize=None)
+def _font(size: int) -> ImageFont.FreeTypeFont:
+    """Load font of the text, see :func:`._font_path`."""
+    return ImageFont.truetype(str(_font_path()), size)
+
+
+def _nice_step(span: float, ticks: int) -> float:
+    """Get distance between ticks like ``1``, ``2``, ``5``, ``10``, ``20``..., so there are at most ``ticks``."""
+    raw = max(span / ticks, 1e-9)
+    magnitude = 10 ** numpy.floor(numpy.log10(raw))
+    for multiplier in (1, 2, 5, 10):
+        if multiplier * magnitude >= raw:
+            return float(multiplier * magnitude)
+    return float(10 * magnitude)  # pragma: no cover # the loop always returns
+
+
+def _time_ticks(start: numpy.datetime64, end: numpy.datetime64, ticks: int = 6) -> numpy.ndarray:
+    """Get round times for ticks of the time axis, between ``start`` and ``end``."""
+    span = end - start
+    step = next((step for step in _TIME_STEPS if span / step <= ticks), _TIME_STEPS[-1])
+    seconds = step.astype(numpy.int64)
+    first = -(-start.astype(numpy.int64) // seconds) * seconds  # rounded up to the step
+    return numpy.arange(numpy.datetime64(int(first), "s"), end + numpy.timedelta64(1, "s"), step)
+
+
+def _draw_segments(canvas: numpy.ndarray, xs: numpy.ndarray, ys: numpy.ndarray, color: int) -> None:
+    """Draw the polyline through the points, two pixels thick, by sampling every segment at every pixel.
+
+    Args:
+        canvas: Image as array of palette indexes.
+        xs: X coordinates of the points, in pixels.
+        ys: Y coordinates of the points, in pixels.
+        color: Index of the color.
+    """
+    if len(xs) == 1:
+        xs, ys = numpy.append(xs, xs), numpy.append(ys, ys)
+    dx, dy = numpy.diff(xs), numpy.diff(ys)
+    steps = numpy.maximum(numpy.ceil(numpy.maximum(numpy.abs(dx), numpy.abs(dy))).astype(numpy.int64), 1)
+    segment = numpy.repeat(numpy.arange(len(steps)), steps)
+    fraction = (numpy.arange(steps.sum()) - numpy.repeat(numpy.cumsum(steps) - steps, steps)) / steps[segment]
+
+    # the last point is not sampled by any segment
+    px = numpy.rint(numpy.append(xs[segment] + dx[segment] * fraction, xs[-1])).astype(numpy.int64)
+    py = numpy.rint(numpy.append(ys[segment] + dy[segment] * fraction, ys[-1])).astype(numpy.int64)
+    for offset_x, offset_y in ((0, 0), (1, 0), (0, 1), (1, 1)):
+        canvas[
+            numpy.clip(py + offset_y, 0, canvas.shape[0] - 1), numpy.clip(px + offset_x, 0, canvas.shape[1] - 1)
+        ] = color
+
+
+def _fill_band(canvas: numpy.ndarray, xs: numpy.ndarray, top: numpy.ndarray, bottom: numpy.ndarray) -> None:
+    """Fill the area between two lines, column by column.
+
+    Args:
+        canvas: Image as array of palette indexes.
+        xs: X coordinates of the points, in pixels, sorted.
+        top: Y coordinates of the upper line (maximal online).
+        bottom: Y coordinates of the lower line (minimal online).
+    """
+    columns = numpy.arange(int(numpy.ceil(xs[0])), int(numpy.floor(xs[-1])) + 1)
+    upper, lower = numpy.interp(columns, xs, top), numpy.interp(columns, xs, bottom)
+    rows = numpy.arange(canvas.shape[0])[:, numpy.newaxis]
+    inside = (rows >= numpy.floor(upper)) & (rows <= numpy.ceil(lower))
+    region = canvas[:, columns]
+    region[inside] = BAND
+    canvas[:, columns] = region
+
+
+def _text(draw: ImageDraw.ImageDraw, position: typing.Tuple[float, float], text: str, size: int, anchor: str) -> None:
+    draw.text(position, text, fill=AXES, font=_font(size), anchor=anchor)
+
+
+def render(plot: "plots.Plot") -> bytes:
+    """Draw the plot.
+
+    Args:
+        plot: What to draw.
+
+    Returns:
+        PNG image.
+    """
+    canvas = numpy.full((HEIGHT, WIDTH), BACKGROUND, dtype=numpy.uint8)
+    right, bottom = WIDTH - RIGHT, HEIGHT - BOTTOM
+
+    times = plot.times.astype("datetime64[s]")
+    if len(times):
+        start, end = times.min(), times.max()
+    else:
+        start = numpy.datetime64(datetime.datetime.now().replace(microsecond=0), "s")
+        end = start
+    if end - start < numpy.timedelta64(60, "s"):
+        start, end = start - numpy.timedelta64(30, "m"), end + numpy.timedelta64(30, "m")
+
+    values = [plot.players] + ([plot.max] if plot.max is not None else [])
+    highest = max([float(numpy.max(value)) for value in values if len(value)] + [1.0])
+    y_step = max(_nice_step(highest, 5), 1.0)  # players are integers
+    y_max = numpy.ceil(highest / y_step) * y_step
+
+    def x_of(moments: numpy.ndarray) -> numpy.ndarray:
+        return LEFT + (moments - start) / (end - start) * (right - LEFT)
+
+    def y_of(players: numpy.ndarray) -> numpy.ndarray:
+        return bottom - numpy.asarray(players, dtype=numpy.float64) / y_max * (bottom - TOP)
+
+    y_ticks = numpy.arange(0, y_max + y_step / 2, y_step)
+    x_ticks = _time_ticks(start, end)
+    canvas[numpy.rint(y_of(y_ticks)).astype(numpy.int64), LEFT:right] = GRID
+    canvas[TOP:bottom, numpy.rint(x_of(x_ticks)).astype(numpy.int64)] = GRID
+
+    if len(times):
+        xs = x_of(times)
+        if plot.min is not None and plot.max is not None:
+            _fill_band(canvas, xs, y_of(plot.max), y_of(plot.min))
+        _draw_segments(canvas, xs, y_of(plot.players), LINE)
+
+    canvas[TOP : bottom + 1, LEFT] = AXES
+    canvas[bottom, LEFT : right + 1] = AXES
+
+    image = Image.frombytes("P", (WIDTH, HEIGHT), canvas.tobytes())
+    image.putpalette([channel for color in PALETTE for channel in color])
+    draw = ImageDraw.Draw(image)
+    _text(draw, (WIDTH / 2, TOP / 2), plot.title, 16, "mm")
+    _text(draw, ((LEFT + right) / 2, HEIGHT - 12), plot.xlabel, 13, "mb")
+    for tick in y_ticks:
+        _text(draw, (LEFT - 6, float(y_of(tick))), f"{tick:g}", 11, "rm")
+    for tick in x_ticks:
+        _text(draw, (float(x_of(tick)), bottom + 6), tick.item().strftime(plot.date_format), 11, "mt")
+
+    # rotated label of the players axis
+    font = _font(13)
+    box = draw.textbbox((0, 0), plot.ylabel, font=font)
+    label = Image.new("P", (box[2] - box[0] + 2, box[3] - box[1] + 2), BACKGROUND)
+    ImageDraw.Draw(label).text((-box[0], -box[1]), plot.ylabel, fill=AXES, font=font)
+    label = label.rotate(90, expand=True)
+    image.paste(label, (8, int((TOP + bottom - label.height) / 2)))
+
+    buffer = io.BytesIO()
+    # `optimize` makes it ~15% smaller, but 8 times slower
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
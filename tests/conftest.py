@@ -1,5 +1,6 @@
 """Some configuration fixtures for tests."""
 import asyncio
+import datetime
 import logging
 import typing
 
@@ -16,7 +17,7 @@ import structlog
 from _pytest import tmpdir
 from sqlalchemy.ext import asyncio as sqlalchemy_asyncio
 
-from pinger_bot import config, models
+from pinger_bot import config, dns_cache, mc_api, models, ping_storage, registry
 
 # isort: off
 from tests import (  # skipcq: PY-W2000
@@ -63,7 +64,11 @@ def patch_config(tmp_path_factory: tmpdir.TempPathFactory, pytestconfig: _pytest
 
 
 async def _clear_db(session: sqlalchemy_asyncio.AsyncSession) -> None:
+    await ping_storage.storage.drop_expired(session, before=datetime.datetime.max)
     await session.execute(sqlalchemy.delete(models.Ping))
+    await session.execute(sqlalchemy.delete(models.PingBlock))
+    await session.execute(sqlalchemy.delete(models.HourlyRollup))
+    await session.execute(sqlalchemy.delete(models.DailyRollup))
     await session.execute(sqlalchemy.delete(models.Server))
     await session.commit()
 
@@ -90,6 +95,22 @@ def configure_database(disable_logging: None, patch_config: None) -> None:
     models.db = models.Database()
 
 
+@pytest.fixture(autouse=True)
+def clear_mc_api_caches() -> None:
+    """Clear caches of :mod:`pinger_bot.mc_api`, so tests don't affect each other."""
+    mc_api._protocol_hints.clear()  # skipcq: PYL-W0212 # private attribute
+    mc_api._failed_cache.clear()  # skipcq: PYL-W0212 # private attribute
+    mc_api._recent_statuses.clear()  # skipcq: PYL-W0212 # private attribute
+    mc_api._Address_resolve_cache.clear()  # skipcq: PYL-W0212 # private attribute
+    dns_cache.resolver.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_registry() -> None:
+    """Clear :data:`pinger_bot.registry.servers`, so tests don't affect each other."""
+    registry.servers.clear()
+
+
 @pytest.fixture(scope="session")
 def _faker_unique_key(pytestconfig: _pytest.config.Config) -> _pytest.stash.StashKey[dict]:  # type: ignore[type-arg]
     """A key for a variable, which storing unique faker objects.
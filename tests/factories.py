@@ -8,7 +8,7 @@ import faker as faker_package
 import mcstatus.status_response
 from sqlalchemy.ext import asyncio as sqlalchemy_asyncio
 
-from pinger_bot import mc_api, models
+from pinger_bot import mc_api, models, registry
 
 Model = typing.Union[models.Server, models.Ping]
 faker = faker_package.Faker()
@@ -62,6 +62,24 @@ class DBServerFactory(AsyncSQLAlchemyModelFactory):
     owner: int = factory.fuzzy.FuzzyAttribute(
         lambda: faker.unique.pyint(min_value=111111111111111111, max_value=999999999999999999)
     )
+    java: typing.Optional[bool] = factory.fuzzy.FuzzyAttribute(lambda: faker.none_or(faker.boolean))
+
+
+class ServerRecordFactory(factory.Factory):
+    """Factory for :class:`pinger_bot.registry.ServerRecord`."""
+
+    class Meta:  # noqa: D106
+        model = registry.ServerRecord
+
+    id: int = factory.Sequence(lambda n: n + 1)
+    host: str = factory.fuzzy.FuzzyAttribute(lambda: faker.unique.domain_name(levels=3))
+    port: int = factory.fuzzy.FuzzyAttribute(faker.unique.port_number)
+    max: int = factory.fuzzy.FuzzyAttribute(faker.pyint)
+    alias: typing.Optional[str] = factory.fuzzy.FuzzyAttribute(faker.unique.word)
+    owner: int = factory.fuzzy.FuzzyAttribute(
+        lambda: faker.unique.pyint(min_value=111111111111111111, max_value=999999999999999999)
+    )
+    java: typing.Optional[bool] = factory.fuzzy.FuzzyAttribute(lambda: faker.none_or(faker.boolean))
 
 
 class DBPingFactory(AsyncSQLAlchemyModelFactory):
@@ -71,8 +89,7 @@ class DBPingFactory(AsyncSQLAlchemyModelFactory):
         model = models.Ping
 
     id: int = factory.Sequence(lambda n: n + 1)
-    host: str = factory.fuzzy.FuzzyAttribute(lambda: faker.unique.domain_name(levels=3))
-    port: int = factory.fuzzy.FuzzyAttribute(faker.unique.port_number)
+    server_id: int = factory.Sequence(lambda n: n + 1)
     time: datetime.datetime = factory.fuzzy.FuzzyAttribute(faker.date_time)
     players: int = factory.fuzzy.FuzzyAttribute(faker.pyint)
 
@@ -141,6 +158,7 @@ class MCServerFactory(factory.Factory):
     version: str = factory.fuzzy.FuzzyAttribute(faker.sem_version)
     players: mc_api.Players = factory.SubFactory(MCPlayersFactory)
     latency: float = factory.fuzzy.FuzzyAttribute(faker.pyfloat)
+    time: datetime.datetime = factory.fuzzy.FuzzyAttribute(faker.date_time)
 
     @classmethod
     def from_mcstatus_status(
@@ -193,6 +211,17 @@ class FailedMCServerFactory(factory.Factory):
     address: mc_api.Address = factory.SubFactory(AddressFactory)
 
 
+class PlayersProbeFactory(factory.Factory):
+    """Factory for :class:`pinger_bot.mc_api.PlayersProbe`."""
+
+    class Meta:  # noqa: D106
+        model = mc_api.PlayersProbe
+
+    players: mc_api.Players = factory.SubFactory(MCPlayersFactory)
+    java: bool = factory.fuzzy.FuzzyAttribute(faker.boolean)
+    time: datetime.datetime = factory.fuzzy.FuzzyAttribute(faker.date_time)
+
+
 # mcstatus part
 
 
@@ -0,0 +1,126 @@
+"""Local fake Minecraft Java servers, for benchmarks and multi-process tests.
+
+One listening socket on ``0.0.0.0`` answers status requests for every ``127.x.y.z`` address, so thousands
+of distinct servers (``127.0.0.1:port``, ``127.0.0.2:port``...) don't need thousands of sockets. Several
+processes can listen on the same port (``SO_REUSEPORT``), so the fake servers are not a bottleneck.
+
+.. note:: Works only on Linux, where the whole ``127.0.0.0/8`` is routed to loopback.
+"""
+import asyncio
+import ipaddress
+import json
+import multiprocessing
+import multiprocessing.process
+import typing
+
+DEFAULT_PORT = 25599
+"""Port, on which fake servers listen by default."""
+
+
+def hosts(number: int) -> typing.List[str]:
+    """Get distinct loopback hosts for the fake servers.
+
+    Args:
+        number: How many hosts to generate.
+
+    Returns:
+        List of hosts like ``127.0.0.1``, ``127.0.0.2``...
+    """
+    first = int(ipaddress.IPv4Address("127.0.0.1"))
+    return [str(ipaddress.IPv4Address(first + i)) for i in range(number)]
+
+
+def players_of(host: str) -> int:
+    """Number of online players, which the fake server on this host reports. Stable for the same host."""
+    return int(ipaddress.IPv4Address(host)) % 100
+
+
+def _varint(value: int) -> bytes:
+    result = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            result.append(byte | 0x80)
+        else:
+            result.append(byte)
+            return bytes(result)
+
+
+async def _read_varint(reader: asyncio.StreamReader) -> int:
+    result = 0
+    for i in range(5):
+        byte = (await reader.readexactly(1))[0]
+        result |= (byte & 0x7F) << (7 * i)
+        if not byte & 0x80:
+            return result
+    raise IOError("Too big varint.")
+
+
+async def _read_packet(reader: asyncio.StreamReader) -> bytes:
+    return await reader.readexactly(await _read_varint(reader))
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Answer handshake and status request, like a real Java server."""
+    host = writer.get_extra_info("sockname")[0]
+    try:
+        await _read_packet(reader)  # handshake
+        await _read_packet(reader)  # status request
+        payload = json.dumps(
+            {
+                "version": {"name": "1.20.1", "protocol": 763},
+                "players": {"online": players_of(host), "max": 100},
+                "description": "Fake server",
+            }
+        ).encode()
+        body = _varint(0) + _varint(len(payload)) + payload
+        writer.write(_varint(len(body)) + body)
+        await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError, IOError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(port: int = DEFAULT_PORT, started: typing.Optional[typing.Any] = None) -> None:
+    """Run fake servers forever.
+
+    Args:
+        port: Port to listen on.
+        started: Optional :class:`multiprocessing.Event`, which is set when the socket is ready.
+    """
+    server = await asyncio.start_server(_handle, "0.0.0.0", port, reuse_port=True, backlog=4096)
+    if started is not None:
+        started.set()
+    async with server:
+        await server.serve_forever()
+
+
+def _process_main(port: int, started: typing.Any) -> None:
+    try:
+        asyncio.run(serve(port, started))
+    except KeyboardInterrupt:
+        pass
+
+
+def start(processes: int = 1, port: int = DEFAULT_PORT) -> typing.List[multiprocessing.process.BaseProcess]:
+    """Start fake servers in separate processes, and wait until they are ready.
+
+    Args:
+        processes: Number of the processes.
+        port: Port to listen on.
+
+    Returns:
+        Started processes. Terminate them, when you don't need fake servers anymore.
+    """
+    context = multiprocessing.get_context("spawn")
+    started = []
+    for _ in range(processes):
+        event = context.Event()
+        process = context.Process(target=_process_main, args=(port, event), daemon=True)
+        process.start()
+        if not event.wait(timeout=30):
+            raise RuntimeError("Fake server didn't start in time.")
+        started.append(process)
+    return started
@@ -0,0 +1,104 @@
+"""Some tests for the :mod:`pinger_bot.collector` module."""
+import typing
+
+import pytest
+import pytest_mock
+
+from pinger_bot import collector, config, leases, registry
+from pinger_bot.ext import scheduling
+from tests import factories
+
+
+@pytest.mark.parametrize(("index", "cleanup"), ((0, True), (1, False)))
+async def test_tick_loads_own_shard(mocker: pytest_mock.MockerFixture, index: int, cleanup: bool) -> None:
+    """Tests that tick reloads only its part of the servers, and only the first process deletes old pings."""
+    load = mocker.patch.object(registry.servers, "load")
+    collect = mocker.patch.object(scheduling, "collect_info_for_statistic")
+
+    await collector.tick(index, 2)
+
+    load.assert_awaited_once_with(shard=(index, 2))
+    collect.assert_awaited_once_with(cleanup=cleanup, slots=None)
+
+
+async def test_run_shard_once(mocker: pytest_mock.MockerFixture) -> None:
+    """Tests that with ``once=True`` only one tick is run, without scheduler."""
+    tick = mocker.patch.object(collector, "tick")
+    scheduler = mocker.patch("apscheduler.schedulers.asyncio.AsyncIOScheduler")
+
+    await collector.run_shard(1, 3, once=True)
+
+    tick.assert_awaited_once_with(1, 3)
+    scheduler.assert_not_called()
+
+
+def test_start_and_stop(mocker: pytest_mock.MockerFixture) -> None:
+    """Tests that every process gets its own index, and alive processes are terminated on stop."""
+    context = mocker.patch("multiprocessing.get_context").return_value
+    context.Process.side_effect = lambda **_: mocker.MagicMock()
+
+    processes = collector.start(3, once=True)
+
+    assert [call.kwargs["args"] for call in context.Process.call_args_list] == [(i, 3, True) for i in range(3)]
+    assert all(process.start.called for process in processes)
+
+    processes[1].is_alive.return_value = False
+    collector.stop(processes)
+    assert [process.terminate.called for process in processes] == [True, False, True]
+
+
+async def test_tick_pings_only_own_shard(mocker: pytest_mock.MockerFixture) -> None:
+    """Tests that servers of other shards are not pinged."""
+    servers = [await factories.DBServerFactory() for _ in range(4)]
+    probe = mocker.patch("pinger_bot.mc_api.PlayersProbe.probe", return_value=None)
+
+    await collector.tick(0, 2)
+
+    pinged = {call.args[:2] for call in probe.call_args_list}
+    assert {(server.host, server.port) for server in servers if server.id % 2 == 0} <= pinged
+    assert not {(server.host, server.port) for server in servers if server.id % 2 == 1} & pinged
+
+
+@pytest.mark.parametrize("processes", (1, 3))
+def test_main(mocker: pytest_mock.MockerFixture, processes: int) -> None:
+    """Tests that standalone collector runs in the current process, if only one process is needed."""
+    process_main = mocker.patch.object(collector, "_process_main")
+    run = mocker.patch.object(collector, "run")
+
+    collector.main(processes, once=True)
+
+    if processes == 1:
+        process_main.assert_called_once_with(0, 1, True)
+        run.assert_not_called()
+    else:
+        run.assert_called_once_with(processes, once=True)
+        process_main.assert_not_called()
+
+
+async def test_tick_with_leases(mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Tests that with leases, tick loads only leased partitions instead of its shard."""
+    monkeypatch.setattr(config.config, "collector_leases", True)
+    monkeypatch.setattr(config.config, "lease_partitions", 8)
+    mocker.patch.object(leases.manager, "sync", return_value=frozenset({0, 3}))
+    monkeypatch.setattr(leases.manager, "partitions", frozenset({0, 3}))
+    load = mocker.patch.object(registry.servers, "load")
+    collect = mocker.patch.object(scheduling, "collect_info_for_statistic")
+
+    await collector.tick(1, 2)
+
+    load.assert_awaited_once_with(partitions=(frozenset({0, 3}), 8))
+    collect.assert_awaited_once_with(partitions=(frozenset({0, 3}), 8), slots=None)
+
+
+@pytest.mark.parametrize(("slots", "reloaded"), (({0, 1}, True), ({5}, False)))
+async def test_tick_reloads_once_per_interval(
+    mocker: pytest_mock.MockerFixture, slots: typing.Set[int], reloaded: bool
+) -> None:
+    """Tests that servers are reloaded only before slot ``0`` of the wheel."""
+    load = mocker.patch.object(registry.servers, "load")
+    collect = mocker.patch.object(scheduling, "collect_info_for_statistic")
+
+    await collector.tick(0, 1, slots=slots)
+
+    assert load.called is reloaded
+    collect.assert_awaited_once_with(cleanup=True, slots=slots)
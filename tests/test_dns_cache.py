@@ -0,0 +1,166 @@
+"""Some tests for the :mod:`pinger_bot.dns_cache` module."""
+import asyncio
+import typing
+
+import dns.resolver
+import faker as faker_package
+import pytest
+import pytest_mock
+from dns.rdatatype import RdataType as DNSRdataType
+
+from pinger_bot import dns_cache, mc_api
+
+
+def _answer(mocker: pytest_mock.MockerFixture, ttl: int, items: typing.Sequence[object] = ()) -> typing.Any:
+    """Create fake :class:`dns.resolver.Answer` with given TTL."""
+    answer = mocker.MagicMock()
+    answer.rrset.ttl = ttl
+    answer.__getitem__.side_effect = list(items).__getitem__
+    return answer
+
+
+class TestCachingResolver:
+    """Tests for the :class:`~pinger_bot.dns_cache.CachingResolver` class."""
+
+    async def test_answer_cached_for_its_ttl(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker
+    ) -> None:
+        """Test that the answer is cached for TTL of the record, and queried again after it."""
+        resolver, domain = dns_cache.CachingResolver(), faker.domain_name()
+        answer = _answer(mocker, ttl=60)
+        mocked = mocker.patch("dns.asyncresolver.resolve", return_value=answer)
+        now = mocker.patch("time.monotonic", return_value=1000.0)
+
+        assert await resolver.resolve(domain, DNSRdataType.A) is answer
+        now.return_value = 1059.0
+        assert await resolver.resolve(domain.upper() + ".", DNSRdataType.A) is answer
+        assert mocked.call_count == 1
+
+        now.return_value = 1061.0
+        assert await resolver.resolve(domain, DNSRdataType.A) is answer
+        assert mocked.call_count == 2
+        assert resolver.stats == dns_cache.ResolverStats(hits=1, misses=2)
+
+    async def test_failure_cached(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that ``NXDOMAIN`` is cached for :attr:`~pinger_bot.config.Config.dns_failure_ttl` seconds."""
+        monkeypatch.setattr(dns_cache.config.config, "dns_failure_ttl", 30)
+        resolver, domain = dns_cache.CachingResolver(), faker.domain_name()
+        mocked = mocker.patch("dns.asyncresolver.resolve", side_effect=dns.resolver.NXDOMAIN)
+        now = mocker.patch("time.monotonic", return_value=1000.0)
+
+        for _ in range(2):
+            with pytest.raises(dns.resolver.NXDOMAIN):
+                await resolver.resolve(domain, DNSRdataType.A)
+        assert mocked.call_count == 1
+
+        now.return_value = 1031.0
+        with pytest.raises(dns.resolver.NXDOMAIN):
+            await resolver.resolve(domain, DNSRdataType.A)
+        assert mocked.call_count == 2
+        assert resolver.stats == dns_cache.ResolverStats(hits=1, misses=2, failures=2)
+
+    async def test_identical_queries_coalesced(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker
+    ) -> None:
+        """Test that identical queries in flight are sent to DNS only once."""
+        resolver, domain = dns_cache.CachingResolver(), faker.domain_name()
+        answer = _answer(mocker, ttl=60)
+        release = asyncio.Event()
+
+        async def slow_resolve(*_: object) -> object:
+            await release.wait()
+            return answer
+
+        mocked = mocker.patch("dns.asyncresolver.resolve", side_effect=slow_resolve)
+
+        tasks = [asyncio.create_task(resolver.resolve(domain, DNSRdataType.A)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*tasks) == [answer] * 5
+        mocked.assert_called_once_with(domain, DNSRdataType.A)
+        assert resolver.stats == dns_cache.ResolverStats(misses=1, coalesced=4)
+
+    async def test_in_flight_queries_limited(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that no more than :attr:`~pinger_bot.config.Config.dns_max_in_flight` queries are sent at once."""
+        monkeypatch.setattr(dns_cache.config.config, "dns_max_in_flight", 2)
+        resolver = dns_cache.CachingResolver()
+        running, max_running = 0, 0
+
+        async def slow_resolve(*_: object) -> object:
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return _answer(mocker, ttl=60)
+
+        mocker.patch("dns.asyncresolver.resolve", side_effect=slow_resolve)
+        await asyncio.gather(*(resolver.resolve(faker.unique.domain_name(), DNSRdataType.A) for _ in range(6)))
+
+        assert max_running == 2
+
+    async def test_clear_resets_in_flight_limit(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that after :meth:`~pinger_bot.dns_cache.CachingResolver.clear` the limit of queries is created again.
+
+        So it is not bound to the event loop, where it was used before, and new
+        :attr:`~pinger_bot.config.Config.dns_max_in_flight` is used.
+        """
+        monkeypatch.setattr(dns_cache.config.config, "dns_max_in_flight", 2)
+        resolver = dns_cache.CachingResolver()
+        running, max_running = 0, 0
+
+        async def slow_resolve(*_: object) -> object:
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return _answer(mocker, ttl=60)
+
+        mocker.patch("dns.asyncresolver.resolve", side_effect=slow_resolve)
+        await asyncio.gather(*(resolver.resolve(faker.unique.domain_name(), DNSRdataType.A) for _ in range(4)))
+        monkeypatch.setattr(dns_cache.config.config, "dns_max_in_flight", 1)
+        resolver.clear()
+        max_running = 0
+        await asyncio.gather(*(resolver.resolve(faker.unique.domain_name(), DNSRdataType.A) for _ in range(4)))
+
+        assert max_running == 1
+
+
+class TestJavaLookup:
+    """Tests for :meth:`pinger_bot.mc_api.Address._java_lookup`, which uses the shared resolver for SRV queries."""
+
+    async def test_srv_record_used(self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker) -> None:
+        """Test that host and port are taken from SRV record, and it is cached."""
+        domain, target, port = faker.domain_name(), faker.domain_name(), faker.port_number()
+        srv = mocker.MagicMock(target=target + ".", port=port)
+        mocked = mocker.patch("dns.asyncresolver.resolve", return_value=_answer(mocker, ttl=60, items=[srv]))
+
+        for _ in range(2):
+            server = await mc_api.Address._java_lookup(domain)
+            assert (server.address.host, server.address.port) == (target, port)
+        mocked.assert_called_once_with("_minecraft._tcp." + domain, DNSRdataType.SRV)
+
+    async def test_no_srv_record(self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker) -> None:
+        """Test that default port is used, when there is no SRV record."""
+        domain = faker.domain_name()
+        mocker.patch("dns.asyncresolver.resolve", side_effect=dns.resolver.NXDOMAIN)
+
+        server = await mc_api.Address._java_lookup(domain)
+        assert (server.address.host, server.address.port) == (domain, 25565)
+
+    async def test_port_given(self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker) -> None:
+        """Test that there is no SRV query, when port is already in address."""
+        domain, port = faker.domain_name(), faker.port_number()
+        mocked = mocker.patch("dns.asyncresolver.resolve")
+
+        server = await mc_api.Address._java_lookup(f"{domain}:{port}")
+        assert (server.address.host, server.address.port) == (domain, port)
+        mocked.assert_not_called()
@@ -1,62 +1,392 @@
 """Some tests for the :mod:`pinger_bot.ext.scheduling` module."""
+import asyncio
 import datetime
-import unittest.mock
+import typing
 
 import faker as faker_package
 import freezegun
+import pytest
 import pytest_mock
 import sqlalchemy
+import sqlalchemy.exc
 
-from pinger_bot import mc_api, models
+from pinger_bot import config, mc_api, models, ping_storage, registry
 from pinger_bot.ext import scheduling
 from tests import factories
 
 
+@pytest.fixture(autouse=True)
+def clear_health() -> None:
+    """Clear failure state, sampling rate, calendar and recorded pings of the servers, so tests don't affect others."""
+    scheduling.health.clear()
+    scheduling.sampling.clear()
+    scheduling.recorded.clear()
+    scheduling.calendar.clear()
+    scheduling.rotation = scheduling.TickStats()
+
+
 class TestCollectInfoForStatistic:
     """Tests for :func:`pinger_bot.ext.scheduling.collect_info_for_statistic`."""
 
-    async def test_everything_called_by_list(
-        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker
+    async def test_every_server_handled_once(
+        self, mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch
     ) -> None:
-        """Tests that all expected functions was called in correct order."""
-        mocker.patch.object(models.db, "engine", mocker.async_stub())
-        mocker.patch.object(models.db, "session", mocker.stub())
+        """Tests that every server from registry is handled exactly once, and old pings are deleted."""
+        for _ in range(5):
+            registry.servers.add(factories.ServerRecordFactory())
+        handled: typing.List[int] = []
 
-        session: unittest.mock.AsyncMock = mocker.patch.object(
-            models.db.session.return_value, "__aenter__", create=True  # type: ignore[attr-defined] # something strange by mypy
-        ).return_value
-        sqlalchemy_select = mocker.patch("sqlalchemy.select")
-        servers = mocker.patch.object(
-            session.scalars.return_value,
-            "all",
-            mocker.MagicMock(return_value=[faker.pystr() for _ in range(faker.pyint(1, 9))]),
-        ).return_value
-        gather = mocker.patch(
-            "asyncio.gather", mocker.async_stub()
-        )  # actually `asyncio.gather` is a sync function, but returns awaitable
+        async def fake_handle_server(db_server: registry.ServerRecord, _: object) -> bool:
+            handled.append(db_server.id)
+            return True
+
+        mocker.patch.object(scheduling, "handle_server", side_effect=fake_handle_server)
+        mocked_delete = mocker.patch.object(scheduling, "delete_old_pings")
+        monkeypatch.setattr(config.config, "ping_workers", 3)
 
         await scheduling.collect_info_for_statistic()
 
-        assert len(session.mock_calls) == 3  # for some reason `call_count` giving 0
-        sqlalchemy_select.assert_called_once_with(models.Server)
-        session.scalars.assert_awaited_once_with(sqlalchemy_select.return_value)
-        session.scalars.return_value.all.assert_called_once_with()
-        gather.assert_awaited_once()
-        session.commit.assert_awaited_once_with()
+        expected = [server.id for server in registry.servers]
+        assert sorted(handled) == sorted(expected)
+        mocked_delete.assert_awaited_once()
+        assert scheduling.last_tick == scheduling.TickStats(pinged=len(expected), online=len(expected))
 
-        expected = (
-            *(scheduling.handle_server(server, session) for server in servers),
-            scheduling.delete_old_pings(session),
-        )
-        for i, coroutine in enumerate(gather.call_args[0]):
-            assert (
-                coroutine.__qualname__ == expected[i].__qualname__
-                and coroutine.cr_frame.f_locals == expected[i].cr_frame.f_locals
+    async def test_failed_rollup_doesnt_stop_retention(self, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests that old pings are deleted, even if aggregating them failed."""
+        mocker.patch.object(scheduling.rollups, "roll_up", side_effect=sqlalchemy.exc.ProgrammingError("", {}, None))
+        mocked_delete = mocker.patch.object(scheduling, "delete_old_pings")
+
+        await scheduling.collect_info_for_statistic()
+
+        mocked_delete.assert_awaited_once()
+
+    async def test_concurrency_is_limited(
+        self, mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tests that no more than :attr:`~pinger_bot.config.Config.ping_workers` servers are handled at once."""
+        for _ in range(10):
+            registry.servers.add(factories.ServerRecordFactory())
+        running, max_running = 0, 0
+
+        async def fake_handle_server(*_: object) -> bool:
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return True
+
+        mocker.patch.object(scheduling, "handle_server", side_effect=fake_handle_server)
+        mocker.patch.object(scheduling, "delete_old_pings")
+        monkeypatch.setattr(config.config, "ping_workers", 4)
+
+        await scheduling.collect_info_for_statistic()
+
+        assert max_running == 4
+
+    async def test_failed_worker_does_not_hang(
+        self, mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tests that an exception in a worker is propagated, instead of hanging on the full queue."""
+        for _ in range(10):
+            registry.servers.add(factories.ServerRecordFactory())
+        mocker.patch.object(scheduling, "handle_server", side_effect=NotImplementedError)
+        monkeypatch.setattr(config.config, "ping_workers", 2)
+
+        with pytest.raises(NotImplementedError):
+            await asyncio.wait_for(scheduling.collect_info_for_statistic(), 5)
+
+    async def test_pings_written(self, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests that :func:`pinger_bot.ext.scheduling.collect_info_for_statistic` writes pings before it returns."""
+        db_server = await factories.DBServerFactory()
+        registry.servers.add(registry.ServerRecord.from_model(db_server))
+        probe = factories.PlayersProbeFactory()
+        mocker.patch.object(mc_api.PlayersProbe, "probe", return_value=probe)
+
+        await scheduling.collect_info_for_statistic(cleanup=False)
+
+        async with models.db.session() as session:
+            pings = await ping_storage.storage.read(
+                session, db_server.id, since=datetime.datetime.min, until=datetime.datetime.max
             )
+        assert [ping.players for ping in pings] == [probe.players.online]
+
+    async def test_only_given_slots(self, mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Tests that only servers of the given slots are handled, and old pings are deleted only in slot ``0``."""
+        monkeypatch.setattr(config.config, "ping_slots", 4)
+        for _ in range(20):
+            registry.servers.add(factories.ServerRecordFactory())
+        mocked = mocker.patch.object(scheduling, "handle_server", return_value=True)
+        mocked_delete = mocker.patch.object(scheduling, "delete_old_pings")
+
+        await scheduling.collect_info_for_statistic(slots={1, 2})
 
-            # also to not trigger `coroutine was never awaited` warning, we need to close every coroutine
-            coroutine.close()
-            expected[i].close()
+        expected = {server.id for server in registry.servers if scheduling.TimingWheel.phase(server.id, 4) in {1, 2}}
+        assert {call.args[0].id for call in mocked.call_args_list} == expected
+        mocked_delete.assert_not_awaited()
+
+    async def test_workers_sized_to_slot(
+        self, mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tests that no more workers are started, than there are servers in the slot."""
+        monkeypatch.setattr(config.config, "ping_slots", 4)
+        for _ in range(20):
+            registry.servers.add(factories.ServerRecordFactory())
+        mocker.patch.object(scheduling, "handle_server", return_value=True)
+        worker = mocker.spy(scheduling, "ping_worker")
+
+        await scheduling.collect_info_for_statistic(cleanup=False, slots={1})
+
+        due = [server for server in registry.servers if scheduling.TimingWheel.phase(server.id, 4) == 1]
+        assert worker.call_count == min(len(due), config.config.ping_workers)
+
+    async def test_summary_once_per_rotation(
+        self, mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tests that the summary is logged once per rotation of the wheel, with counters of all its slots."""
+        monkeypatch.setattr(config.config, "ping_slots", 4)
+        for _ in range(20):
+            registry.servers.add(factories.ServerRecordFactory())
+        mocker.patch.object(scheduling, "handle_server", return_value=True)
+        mocker.patch.object(scheduling, "delete_old_pings")
+        summary = mocker.patch.object(scheduling, "_log_summary")
+
+        for slot in range(8):
+            await scheduling.collect_info_for_statistic(cleanup=False, slots={slot})
+
+        assert summary.call_count == 2
+        assert [call.args[0].pinged for call in summary.call_args_list] == [20, 20]
+
+
+class TestDueServers:
+    """Tests for :func:`pinger_bot.ext.scheduling.due_servers` and :class:`pinger_bot.ext.scheduling.Calendar`."""
+
+    @pytest.fixture(autouse=True)
+    def slots(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Use 10 slots."""
+        monkeypatch.setattr(config.config, "ping_slots", 10)
+
+    @pytest.mark.parametrize("period", (3, 10, 25))
+    def test_same_as_is_due(self, period: int) -> None:
+        """Tests that servers are taken exactly in slots, where they are due, with default and adapted periods."""
+        servers = [factories.ServerRecordFactory() for _ in range(30)]
+        for db_server in servers:
+            registry.servers.add(db_server)
+        for db_server in servers[::2]:
+            scheduling.sampling[db_server.id] = scheduling.Sampling(period=period, players=0)
+            scheduling.calendar.schedule(db_server.id, 99)
+
+        for slot in range(100, 160):
+            expected = {db_server.id for db_server in servers if scheduling.is_due(db_server.id, slot)}
+            assert {db_server.id for db_server in scheduling.due_servers(slots={slot})} == expected
+
+    def test_missed_slots(self) -> None:
+        """Tests that a server of the calendar, whose slot was missed, is taken in the next run."""
+        db_server = factories.ServerRecordFactory()
+        registry.servers.add(db_server)
+        scheduling.sampling[db_server.id] = scheduling.Sampling(period=3, players=0)
+        scheduling.calendar.schedule(db_server.id, 100)
+
+        assert scheduling.due_servers(slots={110}) == [db_server]
+        assert len(scheduling.calendar) == 1
+
+    def test_removed_server(self) -> None:
+        """Tests that a server, removed from the registry, is removed from the calendar too."""
+        db_server = factories.ServerRecordFactory()
+        registry.servers.add(db_server)
+        scheduling.sampling[db_server.id] = scheduling.Sampling(period=3, players=0)
+        scheduling.calendar.schedule(db_server.id, 100)
+        registry.servers.remove(db_server.id)
+
+        assert scheduling.due_servers(slots={110}) == []
+        assert len(scheduling.calendar) == 0
+
+
+class TestTimingWheel:
+    """Tests for :class:`pinger_bot.ext.scheduling.TimingWheel`."""
+
+    @staticmethod
+    def _wheel(mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch) -> scheduling.TimingWheel:
+        """Create a wheel with 10 slots of 30 seconds and mocked job."""
+        monkeypatch.setattr(config.config, "ping_interval", 5)
+        monkeypatch.setattr(config.config, "ping_slots", 10)
+        return scheduling.TimingWheel(mocker.AsyncMock())
+
+    def test_phases_are_spread(self) -> None:
+        """Tests that servers are spread evenly over slots, even when split between processes by ID."""
+        counts = [0] * 10
+        for server_id in range(0, 2000, 2):  # only even IDs, like in one of two collector's processes
+            counts[scheduling.TimingWheel.phase(server_id, 10)] += 1
+
+        assert min(counts) > 50
+
+    @pytest.mark.parametrize("offset", (0, 1, 29.5))
+    def test_start_date_is_next_slot(
+        self, mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch, offset: float
+    ) -> None:
+        """Tests that the wheel is scheduled on starts of slots, not at offset from the start of the bot."""
+        self._wheel(mocker, monkeypatch)
+        mocked_add_job = mocker.patch.object(scheduling.scheduler, "add_job")
+
+        with freezegun.freeze_time(datetime.datetime.fromtimestamp(30 * 103 + offset, tz=datetime.timezone.utc)):
+            scheduling.schedule_collector()
+
+        expected = datetime.datetime.fromtimestamp(30 * 104, tz=datetime.timezone.utc)
+        assert mocked_add_job.call_args_list[0].kwargs["start_date"] == expected
+
+    async def test_runs_current_slot(self, mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Tests that every call runs only the current slot, and a second call in the same slot does nothing."""
+        wheel = self._wheel(mocker, monkeypatch)
+        with freezegun.freeze_time(datetime.datetime.fromtimestamp(30 * 103, tz=datetime.timezone.utc)):
+            await wheel.advance()
+            await wheel.advance()
+        with freezegun.freeze_time(datetime.datetime.fromtimestamp(30 * 104 + 1, tz=datetime.timezone.utc)):
+            await wheel.advance()
+
+        assert wheel.job.await_args_list == [mocker.call(slots=frozenset({103})), mocker.call(slots=frozenset({104}))]
+        assert wheel.overruns == 0
+
+    async def test_missed_slots_are_caught_up(
+        self, mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tests that slots, missed because of a late call, are run with the current one and reported."""
+        wheel = self._wheel(mocker, monkeypatch)
+        with freezegun.freeze_time(datetime.datetime.fromtimestamp(30 * 108, tz=datetime.timezone.utc)):
+            await wheel.advance()
+        with freezegun.freeze_time(datetime.datetime.fromtimestamp(30 * 111, tz=datetime.timezone.utc)):
+            await wheel.advance()
+
+        wheel.job.assert_awaited_with(slots=frozenset({109, 110, 111}))
+        assert wheel.overruns == 1
+
+    async def test_overlapping_run_is_reported(
+        self, mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tests that a slot is still run, when the previous one didn't finish yet, but it is reported."""
+        wheel = self._wheel(mocker, monkeypatch)
+        release = asyncio.Event()
+
+        async def slow_job(**_: object) -> None:
+            await release.wait()
+
+        wheel.job.side_effect = slow_job
+
+        with freezegun.freeze_time(datetime.datetime.fromtimestamp(30 * 100, tz=datetime.timezone.utc)):
+            first = asyncio.create_task(wheel.advance())
+            await asyncio.sleep(0)
+        with freezegun.freeze_time(datetime.datetime.fromtimestamp(30 * 101, tz=datetime.timezone.utc)):
+            second = asyncio.create_task(wheel.advance())
+            await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(first, second)
+
+        assert wheel.job.await_count == 2
+        assert wheel.overruns == 1
+        assert wheel.running == 0
+
+
+class TestAdaptiveSampling:
+    """Tests for :func:`pinger_bot.ext.scheduling.update_sampling` and :func:`pinger_bot.ext.scheduling.is_due`."""
+
+    @pytest.fixture(autouse=True)
+    def bounds(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Use 10 slots of 30 seconds, and intervals from 1 to 20 minutes (2 to 40 slots)."""
+        monkeypatch.setattr(config.config, "adaptive_intervals", True)
+        monkeypatch.setattr(config.config, "ping_interval", 5)
+        monkeypatch.setattr(config.config, "ping_slots", 10)
+        monkeypatch.setattr(config.config, "ping_interval_min", 1.0)
+        monkeypatch.setattr(config.config, "ping_interval_max", 20.0)
+        monkeypatch.setattr(config.config, "adaptive_volatility", 0.1)
+        monkeypatch.setattr(config.config, "adaptive_popular_players", 100)
+
+    @pytest.mark.parametrize(
+        ("players", "period"),
+        (
+            ((0, 0, 0, 0, 0), 40),  # flat server, is pinged rarely, but not rarer than maximum
+            ((10, 20, 10, 20), 2),  # volatile server, is pinged often, but not more often than minimum
+            ((50, 52, 51), 10),  # small changes don't change anything
+            ((150, 150, 150), 10),  # popular server is never pinged rarer than `ping_interval`
+        ),
+    )
+    def test_period_adapts(self, players: typing.Sequence[int], period: int) -> None:
+        """Tests that period of the server adapts to how its online players change."""
+        for online in players:
+            scheduling.update_sampling(1, online)
+
+        assert scheduling.sampling[1].period == period
+
+    def test_disabled(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Tests that nothing is adapted, when :attr:`~pinger_bot.config.Config.adaptive_intervals` is disabled."""
+        monkeypatch.setattr(config.config, "adaptive_intervals", False)
+        for _ in range(5):
+            scheduling.update_sampling(1, 0)
+
+        assert scheduling.sampling == {}
+
+    @pytest.mark.parametrize("period", (2, 10, 40))
+    def test_is_due_every_period(self, period: int) -> None:
+        """Tests that server is due exactly every ``period`` slots, starting from its phase."""
+        scheduling.sampling[42] = scheduling.Sampling(period=period, players=0)
+
+        due = [slot for slot in range(200) if scheduling.is_due(42, slot)]
+
+        assert len(due) == 200 // period
+        assert due[0] == scheduling.TimingWheel.phase(42, 10) % period
+        assert {b - a for a, b in zip(due, due[1:])} == {period}
+
+
+class TestBackoff:
+    """Tests for :func:`pinger_bot.ext.scheduling.update_health` and skipping in \
+    :func:`pinger_bot.ext.scheduling.ping_worker`."""
+
+    async def test_offline_server_pinged_less_often(
+        self, mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tests that after some failures the server is pinged every 2nd, 4th... tick, but not rarer than maximum."""
+        monkeypatch.setattr(config.config, "backoff_after", 2)
+        monkeypatch.setattr(config.config, "backoff_max_ticks", 4)
+        mocked = mocker.patch.object(scheduling, "handle_server", return_value=False)
+        db_server = factories.ServerRecordFactory()
+
+        pinged_on: typing.List[int] = []
+        for tick in range(16):
+            queue: "asyncio.Queue[typing.Optional[registry.ServerRecord]]" = asyncio.Queue()
+            await queue.put(db_server)
+            await queue.put(None)
+            mocked.reset_mock()
+
+            await scheduling.ping_worker(queue, scheduling.TickStats())
+
+            if mocked.called:
+                pinged_on.append(tick)
+
+        assert pinged_on == [0, 1, 3, 7, 11, 15]
+
+    def test_success_resets_backoff(self) -> None:
+        """Tests that one successful ping resets failure state."""
+        for _ in range(10):
+            scheduling.update_health(1, online=False)
+        assert scheduling.health[1].skip > 0
+
+        scheduling.update_health(1, online=True)
+
+        assert 1 not in scheduling.health
+
+    async def test_skipped_servers_counted(self, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests that skipped servers are not pinged and counted in the statistic."""
+        mocked = mocker.patch.object(scheduling, "handle_server", return_value=True)
+        db_server = factories.ServerRecordFactory()
+        scheduling.health[db_server.id] = scheduling.ServerHealth(failures=5, skip=1)
+        stats = scheduling.TickStats()
+        queue: "asyncio.Queue[typing.Optional[registry.ServerRecord]]" = asyncio.Queue()
+        await queue.put(db_server)
+        await queue.put(None)
+
+        await scheduling.ping_worker(queue, stats)
+
+        mocked.assert_not_called()
+        assert stats == scheduling.TickStats(skipped=1)
+        assert scheduling.health[db_server.id].skip == 0
 
 
 class TestHandleServer:
@@ -64,96 +394,276 @@ class TestHandleServer:
 
     async def test_handle_server_offline(self, mocker: pytest_mock.MockerFixture) -> None:
         """Tests when server is offline."""
-        server: mc_api.FailedMCServer = mocker.patch.object(
-            mc_api.MCServer, "status", return_value=factories.FailedMCServerFactory()
-        ).return_value
+        mocker.patch.object(mc_api.PlayersProbe, "probe", return_value=None)
+        batch = scheduling.TickBatch()
 
-        session = mocker.stub()
-        session.add = mocker.stub()
+        assert await scheduling.handle_server(factories.ServerRecordFactory(), batch) is False
 
-        await scheduling.handle_server(
-            await factories.DBServerFactory(host=server.address.host, port=server.address.port), session
-        )
-
-        session.add.assert_not_called()
+        assert batch == scheduling.TickBatch()
 
     async def test_handle_server_online(self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker) -> None:
         """Tests when server is online."""
-        server: mc_api.MCServer = mocker.patch.object(
-            mc_api.MCServer, "status", return_value=factories.MCServerFactory()
+        probe: mc_api.PlayersProbe = mocker.patch.object(
+            mc_api.PlayersProbe, "probe", return_value=factories.PlayersProbeFactory()
         ).return_value
-        mocked_ping_model = mocker.patch("pinger_bot.models.Ping")
+        db_server = factories.ServerRecordFactory(max=faker.pyint(probe.players.online + 1), java=probe.java)
+        batch = scheduling.TickBatch()
 
-        session = mocker.stub()
-        session.add = mocker.stub()
-        session.execute = mocker.async_stub()
+        assert await scheduling.handle_server(db_server, batch) is True
 
-        await scheduling.handle_server(
-            await factories.DBServerFactory(
-                host=server.address.host, port=server.address.port, max=faker.pyint(server.players.online + 1)
-            ),
-            session,
+        assert batch == scheduling.TickBatch(
+            pings=[{"server_id": db_server.id, "time": probe.time, "players": probe.players.online}]
         )
 
-        session.add.assert_called_once_with(mocked_ping_model.return_value)
-        mocked_ping_model.assert_called_once_with(
-            host=server.address.host, port=server.address.port, players=server.players.online
-        )
-        session.execute.assert_not_called()
-
     async def test_handle_server_online_set_record(
         self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker
     ) -> None:
         """Tests that function add record."""
-        server: mc_api.MCServer = mocker.patch.object(
-            mc_api.MCServer, "status", return_value=factories.MCServerFactory()
+        probe: mc_api.PlayersProbe = mocker.patch.object(
+            mc_api.PlayersProbe, "probe", return_value=factories.PlayersProbeFactory()
+        ).return_value
+        db_server = factories.ServerRecordFactory(max=faker.pyint(max_value=probe.players.online - 1), java=probe.java)
+        batch = scheduling.TickBatch()
+
+        await scheduling.handle_server(db_server, batch)
+
+        assert batch.maxes == {db_server.id: probe.players.online}
+        assert batch.protocols == {}
+
+    async def test_handle_server_updates_registry(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker
+    ) -> None:
+        """Tests that new record of the players is also saved to the registry."""
+        probe: mc_api.PlayersProbe = mocker.patch.object(
+            mc_api.PlayersProbe, "probe", return_value=factories.PlayersProbeFactory()
         ).return_value
+        db_server = factories.ServerRecordFactory(max=faker.pyint(max_value=probe.players.online - 1), java=probe.java)
+        registry.servers.add(db_server)
+
+        await scheduling.handle_server(db_server, scheduling.TickBatch())
+
+        assert registry.servers.get(db_server.id).max == probe.players.online  # type: ignore[union-attr]
 
-        session = mocker.stub()
-        session.add = mocker.stub()
-        session.execute = mocker.async_stub()
+    async def test_handle_server_passes_known_protocol(self, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests that function pings exactly stored host and port, only with the protocol stored in database."""
+        probe = mocker.patch.object(mc_api.PlayersProbe, "probe", return_value=None)
+        db_server = factories.ServerRecordFactory(java=False)
 
-        await scheduling.handle_server(
-            await factories.DBServerFactory(
-                host=server.address.host, port=server.address.port, max=faker.pyint(max_value=server.players.online - 1)
-            ),
-            session,
+        await scheduling.handle_server(db_server, scheduling.TickBatch())
+
+        probe.assert_awaited_once_with(db_server.host, db_server.port, java=False)
+
+    async def test_handle_server_online_updates_protocol(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker
+    ) -> None:
+        """Tests that function saves detected protocol, if it differs from the stored one."""
+        probe: mc_api.PlayersProbe = mocker.patch.object(
+            mc_api.PlayersProbe, "probe", return_value=factories.PlayersProbeFactory()
+        ).return_value
+        db_server = factories.ServerRecordFactory(
+            max=faker.pyint(probe.players.online + 1), java=faker.random_element((None, not probe.java))
         )
+        batch = scheduling.TickBatch()
 
-        session.execute.assert_called_once()
-        assert session.execute.call_args.is_update
+        await scheduling.handle_server(db_server, batch)
 
+        assert batch.protocols == {db_server.id: probe.java}
+        assert batch.maxes == {}
 
-class TestDeleteOldPings:
-    """Tests for :func:`pinger_bot.ext.scheduling.delete_old_pings`."""
 
-    async def test_old_pings(self, faker: faker_package.Faker) -> None:
-        """Is it really deletes old pings?
+class TestTickBatch:
+    """Tests for :class:`pinger_bot.ext.scheduling.TickBatch`."""
+
+    async def test_write(self, faker: faker_package.Faker) -> None:
+        """Tests that pings and changes of the servers are written to the database."""
+        db_server = await factories.DBServerFactory(java=None, max=faker.pyint(max_value=1000))
+        players, new_max = faker.pyint(), faker.pyint(min_value=1001)
+        batch = scheduling.TickBatch(
+            pings=[{"server_id": db_server.id, "time": faker.date_time(), "players": players}],
+            maxes={db_server.id: new_max},
+            protocols={db_server.id: True},
+        )
 
-        .. note::
-            This test failed on some datetime, but when I tried to reproduce it,
-            I couldn't find the datetime, which blows up everything. I even run
-            it 1000 times, and no results. Hoping, this bug was fixed.
-        """
         async with models.db.session() as session:
-            await session.execute(sqlalchemy.delete(models.Ping))
+            await batch.write(session)
+            await session.commit()
 
-            now = faker.unique.date_time()
-            with freezegun.freeze_time(now):
-                for delay in range(20):
-                    time = now - datetime.timedelta(days=1, hours=delay)
+        async with models.db.session() as session:
+            pings = await ping_storage.storage.read(
+                session, db_server.id, since=datetime.datetime.min, until=datetime.datetime.max
+            )
+            server = (
+                await session.execute(
+                    sqlalchemy.select(models.Server.max, models.Server.java).where(models.Server.id == db_server.id)
+                )
+            ).one()
+        assert [ping.players for ping in pings] == [players]
+        assert tuple(server) == (new_max, True)
+
+    async def test_write_keeps_bigger_max(self, faker: faker_package.Faker) -> None:
+        """Tests that a record of players, which is already bigger in the database, is not overwritten."""
+        db_server = await factories.DBServerFactory(max=faker.pyint(min_value=1001))
 
-                    server = factories.DBServerFactory.build()
-                    session.add(server)
-                    await session.commit()
-                    session.add(factories.DBPingFactory.build(host=server.host, port=server.port, time=time))
+        async with models.db.session() as session:
+            await scheduling.TickBatch(maxes={db_server.id: faker.pyint(max_value=1000)}).write(session)
+            await session.commit()
 
-                await scheduling.delete_old_pings(session)
+        async with models.db.session() as session:
+            stored = await session.scalar(sqlalchemy.select(models.Server.max).where(models.Server.id == db_server.id))
+        assert stored == db_server.max
 
-                pings = (await session.scalars(sqlalchemy.select(models.Ping.time))).all()
-                assert len(pings) == 3
 
-                for ping in pings:
-                    first = now - datetime.timedelta(days=1, hours=2)
-                    second = now - datetime.timedelta(days=1)
-                    assert first <= ping <= second
+class TestWriteBehind:
+    """Tests for :class:`pinger_bot.ext.scheduling.WriteBehind`."""
+
+    @staticmethod
+    def _batch(players: int) -> scheduling.TickBatch:
+        return scheduling.TickBatch(pings=[{"players": players}])
+
+    async def test_written_in_batches(self, mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Tests that results are written every :attr:`~pinger_bot.config.Config.write_batch_size` servers."""
+        monkeypatch.setattr(config.config, "write_batch_size", 3)
+        write = mocker.patch.object(scheduling.TickBatch, "write", autospec=True)
+        writer = scheduling.WriteBehind()
+
+        for players in range(7):
+            await writer.put(self._batch(players))
+        await writer.flush()
+        await writer.close()
+
+        assert [[ping["players"] for ping in call.args[0].pings] for call in write.await_args_list] == [
+            [0, 1, 2],
+            [3, 4, 5],
+            [6],
+        ]
+
+    async def test_written_by_interval(
+        self, mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tests that results are written after :attr:`~pinger_bot.config.Config.write_flush_interval` without flush."""
+        monkeypatch.setattr(config.config, "write_flush_interval", 0.01)
+        write = mocker.patch.object(scheduling.TickBatch, "write", autospec=True)
+        writer = scheduling.WriteBehind()
+
+        await writer.put(self._batch(1))
+        await asyncio.sleep(0.1)
+
+        write.assert_awaited_once()
+        await writer.close()
+
+    async def test_backpressure(self, mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Tests that workers wait, when the database is slower than them and the queue is full."""
+        monkeypatch.setattr(config.config, "write_queue_size", 2)
+        monkeypatch.setattr(config.config, "write_batch_size", 1)
+        release = asyncio.Event()
+
+        async def slow_write(*_: object) -> None:
+            await release.wait()
+
+        mocker.patch.object(scheduling.TickBatch, "write", side_effect=slow_write, autospec=True)
+        writer = scheduling.WriteBehind()
+
+        for players in range(3):  # one is being written, two are in the queue
+            await writer.put(self._batch(players))
+        blocked = asyncio.create_task(writer.put(self._batch(3)))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+
+        release.set()
+        await asyncio.wait_for(blocked, 1)
+        await writer.close()
+
+    async def test_error_raised_on_flush(self, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests that failed write doesn't stop the writer, and the error is raised by the next flush."""
+        mocker.patch.object(scheduling.TickBatch, "write", side_effect=[NotImplementedError, None], autospec=True)
+        writer = scheduling.WriteBehind()
+
+        await writer.put(self._batch(1))
+        with pytest.raises(NotImplementedError):
+            await writer.flush()
+
+        await writer.put(self._batch(2))
+        await writer.flush()
+        await writer.close()
+
+
+class TestDeleteOldPings:
+    """Tests for :func:`pinger_bot.ext.scheduling.delete_old_pings`."""
+
+    async def test_old_pings(self, faker: faker_package.Faker) -> None:
+        """Is it really deletes old pings, and keeps all not expired ones?"""
+        server = await factories.DBServerFactory()
+        now = faker.unique.date_time()
+        cutoff = now - datetime.timedelta(hours=config.config.ping_retention_hours)
+        times = [now - datetime.timedelta(days=1, hours=delay) for delay in range(20)]
+
+        with freezegun.freeze_time(now):
+            async with models.db.session() as session:
+                await ping_storage.storage.write(
+                    session, [{"server_id": server.id, "time": time, "players": 1} for time in times]
+                )
+                await scheduling.delete_old_pings(session)
+                await session.commit()
+
+                pings = await ping_storage.storage.read(
+                    session, server.id, since=datetime.datetime.min, until=datetime.datetime.max
+                )
+
+        kept = {ping.time for ping in pings}
+        assert {time for time in times if time >= cutoff} <= kept
+        # only whole partitions are dropped, so some older pings can stay, but not older than one partition
+        assert all(time >= ping_storage.Partition.for_time(cutoff).start for time in kept)
+        assert len(kept) < len(times)
+
+
+class TestRecordPing:
+    """Tests for :func:`pinger_bot.ext.scheduling.record_ping`."""
+
+    @pytest.fixture(autouse=True)
+    def changes_only(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Enable :attr:`~pinger_bot.config.Config.ping_changes_only` with 30 minutes heartbeat."""
+        monkeypatch.setattr(config.config, "ping_changes_only", True)
+        monkeypatch.setattr(config.config, "ping_heartbeat", 30.0)
+
+    @staticmethod
+    def record(minute: int, players: int) -> typing.List[typing.Tuple[int, int]]:
+        """Record the ping and get ``(minute, players)`` of stored pings."""
+        batch = scheduling.TickBatch()
+        time = datetime.datetime(2024, 1, 1) + datetime.timedelta(minutes=minute)
+        scheduling.record_ping(batch, {"server_id": 1, "time": time, "players": players})
+        return [
+            (int((ping["time"] - datetime.datetime(2024, 1, 1)).total_seconds() // 60), ping["players"])
+            for ping in batch.pings
+        ]
+
+    def test_only_changes_stored(self) -> None:
+        """Test that the same online is skipped, and the last skipped ping is stored with the change."""
+        assert self.record(0, 5) == [(0, 5)]
+        assert self.record(1, 5) == []
+        assert self.record(2, 5) == []
+        assert self.record(3, 7) == [(2, 5), (3, 7)]
+        assert self.record(4, 8) == [(4, 8)]
+
+    def test_heartbeat(self) -> None:
+        """Test that the same online is stored again after the heartbeat."""
+        assert self.record(0, 5) == [(0, 5)]
+        assert self.record(29, 5) == []
+        assert self.record(30, 5) == [(30, 5)]
+
+    def test_pending_flushed_when_offline(self) -> None:
+        """Test that the last skipped ping is stored, when the server goes offline."""
+        self.record(0, 5)
+        self.record(1, 5)
+        batch = scheduling.TickBatch()
+
+        scheduling.flush_pending(1, batch)
+
+        assert [ping["players"] for ping in batch.pings] == [5]
+        assert self.record(10, 5) == [(10, 5)]  # after offline, the first ping is always stored
+
+    def test_disabled(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that every ping is stored by default."""
+        monkeypatch.setattr(config.config, "ping_changes_only", False)
+
+        assert self.record(0, 5) == [(0, 5)]
+        assert self.record(1, 5) == [(1, 5)]
@@ -0,0 +1,88 @@
+"""Some tests for the :mod:`pinger_bot.ext.commands.statistic` module."""
+import dataclasses
+import datetime
+import typing
+
+import freezegun
+import pytest
+import pytest_mock
+import sqlalchemy
+
+from pinger_bot import models, ping_storage, plots, registry
+from pinger_bot.ext.commands import statistic
+from tests import factories
+
+NOW = datetime.datetime(2024, 1, 2, 12)
+
+
+@pytest.mark.parametrize(
+    "pings,expected",
+    [
+        ({26: 1, 24.5: 5, 23.9: 7, 20: 9}, 5),  # the step before 24h ago
+        ({26: 1, 23.5: 7}, 7),  # nothing in the hour before, the first ping after
+        ({30: 1, 20: 9}, None),
+        ({}, None),
+    ],
+)
+async def test_get_yesterday_online(pings: typing.Dict[float, int], expected: typing.Optional[int]) -> None:
+    """Test that yesterday's online is taken from the step function of pings."""
+    server = await factories.DBServerFactory()
+    async with models.db.session() as session:
+        await ping_storage.storage.drop_expired(session, before=datetime.datetime.max)
+        await ping_storage.storage.write(
+            session,
+            [
+                {"server_id": server.id, "time": NOW - datetime.timedelta(hours=hours), "players": players}
+                for hours, players in pings.items()
+            ],
+        )
+        await session.commit()
+
+        with freezegun.freeze_time(NOW):
+            assert await statistic.get_yesterday_online(session, server.id) == expected
+
+
+async def test_get_max_online() -> None:
+    """Test that the record is taken from the database, even if the registry has an old one."""
+    server = await factories.DBServerFactory(max=5)
+    record = registry.ServerRecord.from_model(server)
+    registry.servers.add(record)
+    async with models.db.session() as session:
+        # the collector in another process sets a new record
+        await session.execute(sqlalchemy.update(models.Server).where(models.Server.id == server.id).values(max=42))
+        await session.commit()
+
+        assert await statistic.get_max_online(session, record) == 42
+    assert registry.servers.get(server.id) == dataclasses.replace(record, max=42)
+
+
+async def test_prerender(mocker: pytest_mock.MockerFixture) -> None:
+    """Test that popular plots are rendered into the cache, and only again after new pings."""
+    server = await factories.DBServerFactory()
+    render = mocker.patch.object(plots.renderer, "render", return_value=b"png")
+    mocker.patch.object(plots, "cache", plots.PlotCache())
+    mocker.patch.object(statistic.registry.servers, "get", return_value=server)
+    plots.cache.requests[server.id, "example.com", "24h"] += 1
+
+    async def write(minutes: typing.Iterable[int]) -> None:
+        async with models.db.session() as session:
+            await ping_storage.storage.write(
+                session,
+                [
+                    {"server_id": server.id, "time": NOW - datetime.timedelta(minutes=minute), "players": 1}
+                    for minute in minutes
+                ],
+            )
+            await session.commit()
+
+    with freezegun.freeze_time(NOW):
+        await write(range(30, 300, 10))
+        await statistic.prerender(10)
+        await statistic.prerender(10)
+        await statistic.prerender(10, due=lambda server_id: False)
+        assert render.await_count == 1
+
+        await write([5])
+        await statistic.prerender(10)
+    assert render.await_count == 2
+    assert plots.cache.stats.hits == 1
@@ -0,0 +1,215 @@
+"""Some tests for the :mod:`pinger_bot.leases` module."""
+import asyncio
+import collections
+import datetime
+import functools
+import pathlib
+import socket
+import sys
+import typing
+
+import alembic.command
+import alembic.config
+import freezegun
+import pytest
+import pytest_mock
+import sqlalchemy
+
+from pinger_bot import collector, config, leases, models, ping_storage, registry
+from pinger_bot.ext import scheduling
+from tests import factories, fake_servers
+
+
+@pytest.fixture(autouse=True)
+def few_partitions(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Use only 8 partitions and 90 seconds TTL, so tests are easy to reason about."""
+    monkeypatch.setattr(config.config, "lease_partitions", 8)
+    monkeypatch.setattr(config.config, "lease_ttl", 90)
+
+
+@pytest.fixture(autouse=True)
+async def clear_leases() -> None:
+    """Forget collectors and leases from previous tests."""
+    async with models.db.session() as session:
+        await session.execute(sqlalchemy.delete(models.Lease))
+        await session.execute(sqlalchemy.delete(models.Collector))
+        await session.commit()
+
+
+class TestLeaseManager:
+    """Tests for the :class:`~pinger_bot.leases.LeaseManager` class."""
+
+    async def test_single_collector_owns_everything(self) -> None:
+        """Test that the only collector claims all partitions, and keeps them on the next sync."""
+        manager = leases.LeaseManager("first")
+
+        assert await manager.sync() == frozenset(range(8))
+        assert await manager.sync() == frozenset(range(8))
+
+    async def test_fair_share(self) -> None:
+        """Test that the second collector gets half of the partitions, after the first one gives them away."""
+        first, second = leases.LeaseManager("first"), leases.LeaseManager("second")
+
+        await first.sync()
+        assert await second.sync() == frozenset()  # everything is leased by the first one yet
+
+        await first.sync()
+        await second.sync()
+
+        assert len(first.partitions) == len(second.partitions) == 4
+        assert first.partitions | second.partitions == frozenset(range(8))
+
+    async def test_max_partitions(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that the collector doesn't claim more than the limit, even if nobody else owns the rest."""
+        monkeypatch.setattr(config.config, "lease_max_partitions", 3)
+        first, second = leases.LeaseManager("first"), leases.LeaseManager("second")
+
+        assert await first.sync() == frozenset(range(3))
+        assert await second.sync() == frozenset(range(3, 6))
+
+    async def test_release(self) -> None:
+        """Test that released partitions can be claimed right away."""
+        first, second = leases.LeaseManager("first"), leases.LeaseManager("second")
+        await first.sync()
+
+        await first.release()
+
+        assert first.partitions == frozenset()
+        assert await second.sync() == frozenset(range(8))
+
+    async def test_expired_leases_taken_over(self) -> None:
+        """Test that leases of the dead collector are claimed by others after they expire."""
+        first, second = leases.LeaseManager("first"), leases.LeaseManager("second")
+        now = datetime.datetime.utcnow()
+        with freezegun.freeze_time(now):
+            await first.sync()
+
+        with freezegun.freeze_time(now + datetime.timedelta(seconds=30)):
+            assert await second.sync() == frozenset()
+        with freezegun.freeze_time(now + datetime.timedelta(seconds=91)):
+            assert await second.sync() == frozenset(range(8))
+
+        async with models.db.session() as session:
+            collectors = (await session.scalars(sqlalchemy.select(models.Collector.owner))).all()
+        assert collectors == ["second"]
+
+    async def test_concurrent_syncs_dont_overlap(self) -> None:
+        """Test that partitions are never owned by two collectors at the same time."""
+        managers = [leases.LeaseManager(f"collector-{i}") for i in range(3)]
+
+        for _ in range(3):
+            await asyncio.gather(*(manager.sync() for manager in managers))
+            owned = [manager.partitions for manager in managers]
+            assert sum(len(partitions) for partitions in owned) == len(frozenset().union(*owned))
+
+
+async def _die(owner: str) -> None:
+    """Expire leases and heartbeat of the collector, like it died long ago."""
+    past = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+    async with models.db.session() as session:
+        await session.execute(sqlalchemy.update(models.Lease).where(models.Lease.owner == owner).values(expires=past))
+        await session.execute(
+            sqlalchemy.update(models.Collector).where(models.Collector.owner == owner).values(expires=past)
+        )
+        await session.commit()
+
+
+async def _pinged(
+    mocker: pytest_mock.MockerFixture, partitions: typing.Collection[int]
+) -> typing.Set[typing.Tuple[str, int]]:
+    """Run the collector for the partitions, and get addresses of pinged servers."""
+    probe = mocker.patch("pinger_bot.mc_api.PlayersProbe.probe", return_value=None)
+    await scheduling.collect_info_for_statistic(cleanup=False, partitions=(partitions, 8))
+    return {call.args[:2] for call in probe.call_args_list}
+
+
+async def test_partitions_of_dead_collector_taken_over(
+    mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the second collector pings servers of the dead one, right after it takes over their partitions."""
+    monkeypatch.setattr(config.config, "collector_leases", True)
+    servers = [await factories.DBServerFactory() for _ in range(8)]
+    first, second = leases.LeaseManager("first"), leases.LeaseManager("second")
+    monkeypatch.setattr(leases, "manager", second)
+    await first.sync()
+    await collector.load(0, 1)
+    assert second.partitions == frozenset()
+    assert all(registry.servers.get(server.id) is None for server in servers)
+
+    await _die("first")
+    await collector.renew(0, 1)
+
+    assert second.partitions == frozenset(range(8))
+    assert {(server.host, server.port) for server in servers} <= await _pinged(mocker, second.partitions)
+
+
+async def test_server_added_after_startup(mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the server, added by another replica after startup, is pinged by the owner of its partition."""
+    monkeypatch.setattr(config.config, "collector_leases", True)
+    first, second = leases.LeaseManager("first"), leases.LeaseManager("second")
+    for _ in range(2):
+        await first.sync()
+        await second.sync()
+    await registry.servers.load()  # startup of this replica
+
+    server = await factories.DBServerFactory()  # `/add` on another replica writes only to the database
+    owner = first if server.id % 8 in first.partitions else second
+    assert registry.servers.get(server.id) is None
+
+    await scheduling.reload_servers()
+
+    assert (server.host, server.port) in await _pinged(mocker, owner.partitions)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="Fake servers work only on Linux.")
+async def test_processes_ping_every_server_once(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that several collector's processes split partitions through leases, and ping every server exactly once.
+
+    Without the limit, the first process to sync would own everything, so coordination between them wouldn't be tested.
+    """
+    loop = asyncio.get_running_loop()
+    db_uri = f"sqlite+aiosqlite:///{tmp_path / 'db.sqlite3'}"
+    monkeypatch.setattr(config.config, "db_uri", db_uri)
+    alembic_cfg = alembic.config.Config("pinger_bot/migrations/alembic.ini")
+    alembic_cfg.set_section_option("logger_alembic", "level", "ERROR")
+    # in another thread, because alembic runs its own event loop
+    await loop.run_in_executor(None, alembic.command.upgrade, alembic_cfg, "head")
+
+    port, hosts = _free_port(), fake_servers.hosts(40)
+    engine = sqlalchemy.create_engine(db_uri.replace("+aiosqlite", ""))
+    with engine.begin() as connection:
+        connection.execute(
+            sqlalchemy.insert(models.Server),
+            [{"host": host, "port": port, "max": 0, "owner": 1, "java": True} for host in hosts],
+        )
+
+    env = {"DB_URI": db_uri, "COLLECTOR_LEASES": "true", "LEASE_PARTITIONS": "8", "LEASE_MAX_PARTITIONS": "3"}
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    fake = fake_servers.start(1, port)
+    try:
+        await loop.run_in_executor(None, functools.partial(collector.run, 3, once=True))
+    finally:
+        collector.stop(fake)
+
+    counts: typing.Dict[int, int] = {}
+    with engine.begin() as connection:
+        for name in sqlalchemy.inspect(connection).get_table_names():
+            partition = ping_storage.Partition.from_name(name)
+            if partition is None:
+                continue
+            for server_id in connection.execute(sqlalchemy.select(partition.table.c.server_id)).scalars():
+                counts[server_id] = counts.get(server_id, 0) + 1
+        server_ids = connection.execute(sqlalchemy.select(models.Server.id)).scalars().all()
+        owners = dict(connection.execute(sqlalchemy.select(models.Lease.partition, models.Lease.owner)).all())
+    engine.dispose()
+    # 3 + 3 + 2, so every process owns something and together they own everything
+    assert sorted(owners) == list(range(8))
+    assert sorted(collections.Counter(owners.values()).values()) == [2, 3, 3]
+    assert counts == {server_id: 1 for server_id in server_ids}
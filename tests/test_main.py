@@ -1,4 +1,11 @@
 """Some tests for the :mod:`pinger_bot.__main__` module."""
+import os
+import pathlib
+import subprocess
+import sys
+import typing
+
+import pytest
 import pytest_mock
 
 from pinger_bot import __main__
@@ -7,5 +14,39 @@ from pinger_bot import __main__
 def test_running_the_bot(mocker: pytest_mock.MockerFixture) -> None:
     """Test that the main function run the bot."""
     mocked = mocker.patch("pinger_bot.bot.PingerBot.run")
-    __main__.main()
+    __main__.main([])
     mocked.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    ("argv", "processes", "once"),
+    ((["collector"], 1, False), (["collector", "--processes", "4"], 4, False), (["collector", "--once"], 1, True)),
+)
+def test_running_the_collector(
+    mocker: pytest_mock.MockerFixture, argv: typing.List[str], processes: int, once: bool
+) -> None:
+    """Test that ``collector`` command runs only the collector, without the bot."""
+    mocked_bot = mocker.patch("pinger_bot.bot.PingerBot.run")
+    mocked_collector = mocker.patch("pinger_bot.collector.main")
+
+    __main__.main(argv)
+
+    mocked_collector.assert_called_once_with(processes, once=once)
+    mocked_bot.assert_not_called()
+
+
+def test_collector_does_not_import_hikari(tmp_path: pathlib.Path) -> None:
+    """Test that the collector's command and processes start without importing ``hikari``, it is slow to import."""
+    # the package is linked into a temporary directory, so the subprocess writes config.yml there, not into the repo
+    for name in ("pinger_bot", "locales"):
+        (tmp_path / name).symlink_to(pathlib.Path(__main__.__file__).parent.parent / name)
+    code = (
+        "import pathlib\n"
+        "import sys\n"
+        "from pinger_bot import __main__, collector, config\n"
+        "from pinger_bot.ext import scheduling\n"
+        f"assert config.BASE_DIR == pathlib.Path({str(tmp_path)!r})\n"
+        "assert 'hikari' not in sys.modules, 'hikari is imported'\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=tmp_path, env={**os.environ, "DISCORD_TOKEN": "token"})
+    assert (tmp_path / "config.yml").exists()
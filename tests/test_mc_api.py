@@ -1,5 +1,6 @@
 """Some tests for the :mod:`pinger_bot.mc_api` module."""
 import asyncio
+import datetime
 import typing
 
 import dns.exception
@@ -11,7 +12,7 @@ import pytest
 import pytest_mock
 from dns.rdatatype import RdataType as DNSRdataType
 
-from pinger_bot import mc_api
+from pinger_bot import config, mc_api, registry
 from tests import factories
 
 
@@ -30,7 +31,7 @@ class TestAddress:
         mocked_get_number_ip = mocker.patch(
             "pinger_bot.mc_api.Address._get_number_ip", return_value=address.num_ip.split(":")[0]
         )
-        mocker.patch("mcstatus.JavaServer.async_lookup", return_value=mcstatus.JavaServer(address.host))
+        mocker.patch("pinger_bot.mc_api.Address._java_lookup", return_value=mcstatus.JavaServer(address.host))
         mocker.patch("mcstatus.BedrockServer.lookup", return_value=mcstatus.BedrockServer(address.host))
 
         for java in (True, False):
@@ -38,9 +39,7 @@ class TestAddress:
 
             address.port = 25565 if java else 19132
             address.num_ip = address.num_ip.split(":")[0] + ":" + ("25565" if java else "19132")
-            address._server = (
-                (await mcstatus.JavaServer.async_lookup("")) if java else mcstatus.BedrockServer.lookup("")
-            )
+            address._server = (await mc_api.Address._java_lookup("")) if java else mcstatus.BedrockServer.lookup("")
 
             assert await mc_api.Address.resolve(address.alias, java=java) == address
 
@@ -65,7 +64,7 @@ class TestAddress:
         mocked_get_number_ip = mocker.patch(
             "pinger_bot.mc_api.Address._get_number_ip", return_value=address.num_ip.split(":")[0]
         )
-        mocker.patch("mcstatus.JavaServer.async_lookup", return_value=mcstatus.JavaServer(address.host))
+        mocker.patch("pinger_bot.mc_api.Address._java_lookup", return_value=mcstatus.JavaServer(address.host))
         mocker.patch("mcstatus.BedrockServer.lookup", return_value=mcstatus.BedrockServer(address.host))
 
         for java in (True, False):
@@ -73,9 +72,7 @@ class TestAddress:
 
             address.port = 25565 if java else 19132
             address.num_ip = address.num_ip.split(":")[0] + ":" + ("25565" if java else "19132")
-            address._server = (
-                (await mcstatus.JavaServer.async_lookup("")) if java else mcstatus.BedrockServer.lookup("")
-            )
+            address._server = (await mc_api.Address._java_lookup("")) if java else mcstatus.BedrockServer.lookup("")
 
             assert await mc_api.Address.resolve(address.host, java=java) == address
 
@@ -83,14 +80,15 @@ class TestAddress:
             mocked_get_number_ip.assert_called_with(address.host)
             mocked_get_alias_from_ip.assert_called_with(address.host, 25565 if java else 19132)
 
-    async def test_get_ip_from_alias_finds_alias(self) -> None:
+    def test_get_ip_from_alias_finds_alias(self) -> None:
         """Test that the :func:`~pinger_bot.mc_api.Address._get_ip_from_alias` finds the alias."""
-        server = await factories.DBServerFactory()
-        assert await mc_api.Address._get_ip_from_alias(server.alias) == server.host + ":" + str(server.port)
+        server = factories.ServerRecordFactory()
+        registry.servers.add(server)
+        assert mc_api.Address._get_ip_from_alias(server.alias) == server.host + ":" + str(server.port)
 
-    async def test_get_ip_from_alias_alias_not_found(self, faker: faker_package.Faker) -> None:
+    def test_get_ip_from_alias_alias_not_found(self, faker: faker_package.Faker) -> None:
         """Test :func:`~pinger_bot.mc_api.Address._get_ip_from_alias`'s result, when alias not found."""
-        assert await mc_api.Address._get_ip_from_alias(faker.unique.word()) is None
+        assert mc_api.Address._get_ip_from_alias(faker.unique.word()) is None
 
     @pytest.mark.parametrize("have_dots_in_end", (True, False))
     async def test_get_number_ip(
@@ -101,22 +99,34 @@ class TestAddress:
         intermediate = ip + (("." * faker.pyint()) if have_dots_in_end else "")
         random_list.insert(0, intermediate)
 
-        mocked = mocker.patch("dns.asyncresolver.resolve", return_value=random_list)
+        mocked = mocker.patch("pinger_bot.dns_cache.resolver.resolve", return_value=random_list)
         assert await mc_api.Address._get_number_ip(domain) == ip
         mocked.assert_called_once_with(domain, DNSRdataType.A)
 
     async def test_get_number_ip_raising(self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker) -> None:
         """Test :func:`~pinger_bot.mc_api.Address._get_number_ip`'s result, when there is an exception while querying to DNS."""
-        mocked = mocker.patch("dns.asyncresolver.resolve", side_effect=dns.exception.DNSException)
+        mocked = mocker.patch("pinger_bot.dns_cache.resolver.resolve", side_effect=dns.exception.DNSException)
         word = faker.word()
         assert await mc_api.Address._get_number_ip(word) == word
         mocked.assert_called_once_with(word, DNSRdataType.A)
 
+    @pytest.mark.parametrize("java", (True, False))
+    def test_java_property(self, java: bool) -> None:
+        """Test that the :attr:`~pinger_bot.mc_api.Address.java` reflects type of the server."""
+        address = factories.AddressFactory()
+        address._server = mcstatus.JavaServer(address.host) if java else mcstatus.BedrockServer(address.host)
+        assert address.java is java
+
     @pytest.mark.parametrize("alias", (True, False))
-    async def test_get_alias_from_ip(self, faker: faker_package.Faker, alias: bool) -> None:
+    def test_get_alias_from_ip(self, faker: faker_package.Faker, alias: bool) -> None:
         """Test :func:`~pinger_bot.mc_api.Address._get_alias_from_ip`'s result, when alias found."""
-        server = await factories.DBServerFactory(alias=faker.unique.word() if alias else None)
-        assert await mc_api.Address._get_alias_from_ip(server.host, server.port) == server.alias
+        server = factories.ServerRecordFactory(alias=faker.unique.word() if alias else None)
+        registry.servers.add(server)
+        assert mc_api.Address._get_alias_from_ip(server.host, server.port) == server.alias
+
+    def test_get_alias_from_ip_server_not_found(self, faker: faker_package.Faker) -> None:
+        """Test :func:`~pinger_bot.mc_api.Address._get_alias_from_ip`'s result, when server not found."""
+        assert mc_api.Address._get_alias_from_ip(faker.domain_name(3), faker.port_number()) is None
 
 
 class TestPlayers:
@@ -358,7 +368,443 @@ class TestMCServerAndFailedMCServer:
         address._server = mcstatus.BedrockServer(address.host)
         assert await mc_api.MCServer.handle_response(ip, java=False) == expected_bedrock
 
+    @pytest.mark.parametrize("java", (True, False))
+    async def test_mcserver_status_pings_only_known_protocol(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker, java: bool
+    ) -> None:
+        """Test that the :func:`~pinger_bot.mc_api.MCServer.status` pings only the known protocol."""
+        domain = faker.domain_name(3)
+        mocked_handler = mocker.patch("pinger_bot.mc_api.MCServer.handle_response")
+
+        assert await mc_api.MCServer.status(domain, java=java) == mocked_handler.return_value
+        mocked_handler.assert_called_once_with(domain, java=java)
+
+    async def test_mcserver_status_falls_back_to_race_after_failures(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that the :func:`~pinger_bot.mc_api.MCServer.status` races both protocols, \
+        only after :attr:`~pinger_bot.config.Config.protocol_fallback_after` failures in a row."""
+        monkeypatch.setattr(config.config, "protocol_fallback_after", 2)
+        domain = faker.domain_name(3)
+        mocked_handler = mocker.patch("pinger_bot.mc_api.MCServer.handle_response", side_effect=NotImplementedError)
+        mocked_failed = mocker.patch("pinger_bot.mc_api.FailedMCServer.handle_failed")
+
+        for _ in range(2):
+            assert await mc_api.MCServer.status(domain, java=True) == mocked_failed.return_value
+            mc_api._failed_cache.clear()
+        assert mocked_handler.call_args_list == [mocker.call(domain, java=True)] * 2
+
+        mocked_handler.reset_mock()
+        await mc_api.MCServer.status(domain, java=True)
+        mocked_handler.assert_has_calls([mocker.call(domain, java=True), mocker.call(domain, java=False)])
+
+    async def test_mcserver_status_uses_learned_protocol(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker
+    ) -> None:
+        """Test that the :func:`~pinger_bot.mc_api.MCServer.status` uses protocol, learned from the previous ping."""
+        domain = faker.domain_name(3)
+        mc_api._protocol_hints[domain] = mc_api.ProtocolHint(java=False)
+        mocked_handler = mocker.patch("pinger_bot.mc_api.MCServer.handle_response")
+
+        await mc_api.MCServer.status(domain)
+
+        mocked_handler.assert_called_once_with(domain, java=False)
+
+    @pytest.mark.parametrize("port", tuple(mc_api.BEDROCK_PORTS))
+    async def test_mcserver_status_pings_bedrock_first_on_bedrock_ports(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker, port: int
+    ) -> None:
+        """Test that the :func:`~pinger_bot.mc_api.MCServer.status` doesn't ping Java on Bedrock ports, \
+        if Bedrock answered in time."""
+        host = f"{faker.domain_name(3)}:{port}"
+        mocked_handler = mocker.patch("pinger_bot.mc_api.MCServer.handle_response")
+
+        assert await mc_api.MCServer.status(host) == mocked_handler.return_value
+        mocked_handler.assert_called_once_with(host, java=False)
+
+    async def test_mcserver_status_pings_java_if_bedrock_is_slow(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that the :func:`~pinger_bot.mc_api.MCServer.status` also pings Java, \
+        if Bedrock didn't answer during head start."""
+        monkeypatch.setattr(config.config, "protocol_head_start", 0.01)
+        host, java = f"{faker.domain_name(3)}:19132", faker.word()
+
+        async def do_side_effect(*_, java: bool) -> str:
+            if not java:
+                await asyncio.sleep(1)
+            return typing.cast(str, java_result)
+
+        java_result = java
+        mocked_handler = mocker.patch("pinger_bot.mc_api.MCServer.handle_response", side_effect=do_side_effect)
+
+        assert await mc_api.MCServer.status(host) == java
+        assert mocked_handler.call_args_list == [mocker.call(host, java=False), mocker.call(host, java=True)]
+
+    async def test_failed_ping_is_cached(self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker) -> None:
+        """Test that the :func:`~pinger_bot.mc_api.MCServer.status` doesn't ping recently failed host again."""
+        domain = faker.domain_name(3)
+        mocked_handler = mocker.patch("pinger_bot.mc_api.MCServer.handle_response", side_effect=NotImplementedError)
+        mocker.patch("pinger_bot.mc_api.Address.resolve", return_value=factories.AddressFactory())
+
+        failed = await mc_api.MCServer.status(domain)
+        assert isinstance(failed, mc_api.FailedMCServer)
+        mocked_handler.reset_mock()
+
+        assert await mc_api.MCServer.status(domain) is failed
+        mocked_handler.assert_not_called()
+
+    @pytest.mark.parametrize("java", (True, False))
+    async def test_handle_response_remembers_protocol(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker, java: bool
+    ) -> None:
+        """Test that the :func:`~pinger_bot.mc_api.MCServer.handle_response` remembers protocol on success."""
+        domain = faker.domain_name(3)
+        address: mc_api.Address = factories.AddressFactory()
+        address._server = mcstatus.JavaServer(address.host) if java else mcstatus.BedrockServer(address.host)
+        mocker.patch("pinger_bot.mc_api.Address.resolve", return_value=address)
+        mocker.patch.object(
+            address._server,
+            "async_status",
+            return_value=(
+                factories.MCStatusJavaResponseFactory() if java else factories.MCStatusBedrockResponseFactory()
+            ),
+        )
+
+        await mc_api.MCServer.handle_response(domain, java=java)
+
+        assert domain not in mc_api._protocol_hints
+        assert mc_api._protocol_hints[f"{address.host}:{address.port}".lower()] == mc_api.ProtocolHint(java=java)
+
     async def test_handle_exceptions_raising_on_empty_done_set(self, faker: faker_package.Faker) -> None:
         """Test that :func:`~pinger_bot.mc_api.MCServer._handle_exceptions` raises an exception if the done set is empty."""
         with pytest.raises(ValueError):
             await mc_api.MCServer._handle_exceptions(set(), faker.pyset())
+
+
+class TestStatusCoalescing:
+    """Tests for sharing one ping between concurrent :func:`~pinger_bot.mc_api.MCServer.status` calls."""
+
+    async def test_concurrent_calls_share_one_ping(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker
+    ) -> None:
+        """Test that concurrent calls for the same host (in any case) ping the server only once."""
+        domain, release = faker.domain_name(3), asyncio.Event()
+
+        async def slow_status(*_, **__) -> object:
+            await release.wait()
+            return mocked_status.return_value
+
+        mocked_status = mocker.patch("pinger_bot.mc_api.MCServer._status", side_effect=slow_status)
+
+        tasks = [asyncio.create_task(mc_api.MCServer.status(host)) for host in (domain, domain.upper(), domain + ".")]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*tasks) == [mocked_status.return_value] * 3
+        mocked_status.assert_called_once_with(domain, java=None)
+        assert mc_api._statuses_in_flight == {}
+
+    async def test_alias_shares_ping_with_ip(self, mocker: pytest_mock.MockerFixture) -> None:
+        """Test that ping by alias shares the ping by IP of the same server (e.g. from the collector)."""
+        record, release = factories.ServerRecordFactory(), asyncio.Event()
+        registry.servers.add(record)
+
+        async def slow_status(*_, **__) -> object:
+            await release.wait()
+            return mocked_status.return_value
+
+        mocked_status = mocker.patch("pinger_bot.mc_api.MCServer._status", side_effect=slow_status)
+
+        tasks = [asyncio.create_task(mc_api.MCServer.status(host)) for host in (record.ip, record.alias)]
+        await asyncio.sleep(0)
+        release.set()
+
+        await asyncio.gather(*tasks)
+        mocked_status.assert_called_once_with(record.ip, java=None)
+
+    async def test_cancelled_caller_doesnt_cancel_ping(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker
+    ) -> None:
+        """Test that if one of the callers is cancelled, others still get the result."""
+        domain, release = faker.domain_name(3), asyncio.Event()
+
+        async def slow_status(*_, **__) -> object:
+            await release.wait()
+            return mocked_status.return_value
+
+        mocked_status = mocker.patch("pinger_bot.mc_api.MCServer._status", side_effect=slow_status)
+
+        cancelled = asyncio.create_task(mc_api.MCServer.status(domain))
+        waiting = asyncio.create_task(mc_api.MCServer.status(domain))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        release.set()
+
+        assert await waiting == mocked_status.return_value
+        assert cancelled.cancelled()
+
+    @pytest.mark.parametrize("fresh_for", (0.0, 60.0))
+    async def test_fresh_result_reused(
+        self,
+        mocker: pytest_mock.MockerFixture,
+        faker: faker_package.Faker,
+        monkeypatch: pytest.MonkeyPatch,
+        fresh_for: float,
+    ) -> None:
+        """Test that successful result is reused only during :attr:`~pinger_bot.config.Config.status_fresh_for`."""
+        monkeypatch.setattr(config.config, "status_fresh_for", fresh_for)
+        domain, server = faker.domain_name(3), factories.MCServerFactory()
+        mocked_status = mocker.patch("pinger_bot.mc_api.MCServer._status", return_value=server)
+
+        for _ in range(2):
+            assert await mc_api.MCServer.status(domain) is server
+        assert mocked_status.call_count == (1 if fresh_for else 2)
+
+
+class TestResolveCache:
+    """Tests for the :class:`~pinger_bot.mc_api.ResolveCache` class."""
+
+    def test_tracked_and_other_servers_in_different_parts(
+        self, faker: faker_package.Faker, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that caching many tracked servers doesn't evict other servers, and evictions are counted."""
+        monkeypatch.setattr(config.config, "resolve_cache_size", 2)
+        cache, records = mc_api.ResolveCache(), [factories.ServerRecordFactory() for _ in range(5)]
+        for record in records:
+            registry.servers.add(record)
+
+        other = (faker.domain_name(3), True)
+        cache[other] = faker.word()
+        for record in records:
+            cache[(record.ip, True)] = faker.word()
+
+        assert other in cache
+        assert (records[0].ip, True) not in cache
+        assert cache.fleet_stats.evictions == 3
+        assert cache.hot_stats.evictions == 0
+
+    def test_alias_of_tracked_server_is_tracked(self, faker: faker_package.Faker) -> None:
+        """Test that alias of the tracked server goes to the tracked servers' part."""
+        cache, record = mc_api.ResolveCache(), factories.ServerRecordFactory()
+        registry.servers.add(record)
+
+        cache[(typing.cast(str, record.alias), False)] = faker.word()
+
+        assert cache.summary()["fleet"]["size"] == 1
+        assert cache.summary()["hot"]["size"] == 0
+
+    def test_sized_from_number_of_tracked_servers(self, faker: faker_package.Faker) -> None:
+        """Test that the tracked servers' part grows with number of the servers, and keeps cached values."""
+        cache, first = mc_api.ResolveCache(), factories.ServerRecordFactory()
+        registry.servers.add(first)
+        cache[(first.ip, True)] = value = faker.word()
+        assert cache._fleet is not None and cache._fleet.maxsize == mc_api.ResolveCache.MIN_FLEET_SIZE
+
+        for _ in range(mc_api.ResolveCache.MIN_FLEET_SIZE):
+            registry.servers.add(factories.ServerRecordFactory())
+
+        assert cache[(first.ip, True)] == value
+        assert cache._fleet.maxsize >= 2 * len(registry.servers)
+
+    async def test_resolve_counts_hits_and_misses(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker
+    ) -> None:
+        """Test that :func:`~pinger_bot.mc_api.Address.resolve` is cached, and hits and misses are counted."""
+        domain = faker.domain_name(3)
+        mocked_lookup = mocker.patch("pinger_bot.mc_api.Address._java_lookup", return_value=mcstatus.JavaServer(domain))
+        mocker.patch("pinger_bot.mc_api.Address._get_number_ip", return_value=faker.ipv4())
+
+        first = await mc_api.Address.resolve(domain, java=True)
+        assert await mc_api.Address.resolve(domain, java=True) is first
+
+        mocked_lookup.assert_called_once()
+        stats = mc_api._Address_resolve_cache.hot_stats
+        assert (stats.hits, stats.misses, stats.hit_rate) == (1, 1, 0.5)
+
+
+class TestPlayersProbe:
+    """Tests for the :class:`~pinger_bot.mc_api.PlayersProbe` class."""
+
+    @pytest.mark.parametrize("java", (True, False))
+    async def test_probe_once_pings_exact_address(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker, java: bool
+    ) -> None:
+        """Test that the :func:`~pinger_bot.mc_api.PlayersProbe.probe_once` doesn't resolve anything."""
+        host, port = faker.domain_name(3), faker.port_number()
+        response = factories.MCStatusJavaResponseFactory() if java else factories.MCStatusBedrockResponseFactory()
+        mocked_status = mocker.patch.object(
+            mcstatus.JavaServer if java else mcstatus.BedrockServer, "async_status", return_value=response
+        )
+        mocked_resolve = mocker.patch("pinger_bot.mc_api.Address.resolve")
+        mocked_dns = mocker.patch("pinger_bot.dns_cache.resolver.resolve")
+
+        probe = await mc_api.PlayersProbe.probe_once(f"{host}:{port}", java=java)
+
+        assert probe.players == mc_api.Players(online=response.players.online, max=response.players.max)
+        assert probe.java is java
+        mocked_status.assert_awaited_once()
+        mocked_resolve.assert_not_called()
+        mocked_dns.assert_not_called()
+        assert mc_api._protocol_hints[f"{host}:{port}"] == mc_api.ProtocolHint(java=java)
+
+    async def test_probe_known_protocol(self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker) -> None:
+        """Test that the :func:`~pinger_bot.mc_api.PlayersProbe.probe` pings only the known protocol."""
+        host, port = faker.domain_name(3), faker.port_number()
+        mocked_probe = mocker.patch("pinger_bot.mc_api.PlayersProbe.probe_once")
+
+        assert await mc_api.PlayersProbe.probe(host, port, java=False) == mocked_probe.return_value
+        mocked_probe.assert_called_once_with(f"{host}:{port}", java=False)
+
+    async def test_probe_failed(self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker) -> None:
+        """Test that the :func:`~pinger_bot.mc_api.PlayersProbe.probe` returns :obj:`None` and counts failures."""
+        host, port = faker.domain_name(3), faker.port_number()
+        mocker.patch("pinger_bot.mc_api.PlayersProbe.probe_once", side_effect=OSError)
+
+        assert await mc_api.PlayersProbe.probe(host, port, java=True) is None
+        assert mc_api._protocol_hints[f"{host}:{port}"] == mc_api.ProtocolHint(java=True, failures=1)
+
+    async def test_probe_unknown_protocol_races(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker
+    ) -> None:
+        """Test that the :func:`~pinger_bot.mc_api.PlayersProbe.probe` tries both protocols, if it is unknown."""
+        host, port, probe = faker.domain_name(3), faker.port_number(), factories.PlayersProbeFactory()
+
+        async def do_side_effect(_: str, *, java: bool) -> mc_api.PlayersProbe:
+            if java:
+                raise OSError
+            return probe
+
+        mocked_probe = mocker.patch("pinger_bot.mc_api.PlayersProbe.probe_once", side_effect=do_side_effect)
+
+        assert await mc_api.PlayersProbe.probe(host, port) is probe
+        assert mocked_probe.call_count == 2
+
+    async def test_probe_shares_status_in_flight(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker
+    ) -> None:
+        """Test that the :func:`~pinger_bot.mc_api.PlayersProbe.probe` reuses the same server's ping by a command."""
+        server, release = factories.MCServerFactory(), asyncio.Event()
+        server.address._server = mcstatus.JavaServer(server.address.host, server.address.port)
+        ip = f"{server.address.host}:{server.address.port}"
+
+        async def slow_status(*_, **__) -> mc_api.MCServer:
+            await release.wait()
+            return server
+
+        mocker.patch("pinger_bot.mc_api.MCServer._status", side_effect=slow_status)
+        mocked_probe = mocker.patch("pinger_bot.mc_api.PlayersProbe.probe_once")
+
+        command = asyncio.create_task(mc_api.MCServer.status(ip))
+        await asyncio.sleep(0)
+        collector = asyncio.create_task(mc_api.PlayersProbe.probe(server.address.host, server.address.port))
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await command is server
+        probe = await collector
+        assert probe is not None and (probe.players, probe.java) == (server.players, True)
+        mocked_probe.assert_not_called()
+
+    async def test_probe_keeps_time_of_answer(
+        self, mocker: pytest_mock.MockerFixture, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that the :func:`~pinger_bot.mc_api.PlayersProbe.probe` of a reused status has time of its answer."""
+        monkeypatch.setattr(config.config, "status_fresh_for", 60)
+        server = factories.MCServerFactory(time=datetime.datetime.now() - datetime.timedelta(seconds=30))
+        mocker.patch("pinger_bot.mc_api.MCServer._status", return_value=server)
+        mocked_probe = mocker.patch("pinger_bot.mc_api.PlayersProbe.probe_once")
+
+        await mc_api.MCServer.status(f"{server.address.host}:{server.address.port}")
+        probe = await mc_api.PlayersProbe.probe(server.address.host, server.address.port)
+
+        assert probe is not None and probe.time == server.time
+        mocked_probe.assert_not_called()
+
+    async def test_status_shares_probe_in_flight(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker
+    ) -> None:
+        """Test that the :func:`~pinger_bot.mc_api.MCServer.status` reuses the probe of the collector."""
+        record, release = factories.ServerRecordFactory(), asyncio.Event()
+        registry.servers.add(record)
+        response = factories.MCStatusJavaResponseFactory()
+        address = mocker.patch("pinger_bot.mc_api.Address.resolve", return_value=factories.AddressFactory())
+
+        async def slow_probe(*_, java: bool) -> mc_api.PlayersProbe:
+            await release.wait()
+            return mc_api.PlayersProbe(
+                players=mc_api.Players(online=response.players.online, max=response.players.max),
+                java=java,
+                time=faker.date_time(),
+                status=response,
+            )
+
+        mocked_probe = mocker.patch("pinger_bot.mc_api.PlayersProbe.probe_once", side_effect=slow_probe)
+        mocked_handler = mocker.patch("pinger_bot.mc_api.MCServer.handle_response")
+
+        collector = asyncio.create_task(mc_api.PlayersProbe.probe(record.host, record.port, java=True))
+        await asyncio.sleep(0)
+        command = asyncio.create_task(mc_api.MCServer.status(record.alias))  # type: ignore[arg-type]
+        await asyncio.sleep(0)
+        release.set()
+
+        server = await command
+        assert await collector is not None
+        assert isinstance(server, mc_api.MCServer)
+        assert (server.address, server.motd, server.latency) == (
+            address.return_value,
+            response.description,
+            response.latency,
+        )
+        mocked_probe.assert_awaited_once()
+        mocked_handler.assert_not_called()
+        address.assert_awaited_once_with(record.alias, java=True)
+        assert mc_api._statuses_in_flight == {}
+
+    async def test_status_shares_failed_probe(
+        self, mocker: pytest_mock.MockerFixture, faker: faker_package.Faker
+    ) -> None:
+        """Test that the :func:`~pinger_bot.mc_api.MCServer.status` doesn't ping again, if the shared probe failed."""
+        host, port, release = faker.domain_name(3), faker.port_number(), asyncio.Event()
+
+        async def slow_probe(*_, **__) -> None:
+            await release.wait()
+            raise OSError
+
+        mocker.patch("pinger_bot.mc_api.PlayersProbe.probe_once", side_effect=slow_probe)
+        mocked_handler = mocker.patch("pinger_bot.mc_api.MCServer.handle_response")
+        mocked_failed = mocker.patch("pinger_bot.mc_api.FailedMCServer.handle_failed")
+
+        collector = asyncio.create_task(mc_api.PlayersProbe.probe(host, port, java=False))
+        await asyncio.sleep(0)
+        command = asyncio.create_task(mc_api.MCServer.status(f"{host}:{port}"))
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await command == mocked_failed.return_value
+        assert await collector is None
+        mocked_handler.assert_not_called()
+        mocked_failed.assert_awaited_once_with(f"{host}:{port}")
+
+    async def test_protocol_hint_shared_with_status(self, mocker: pytest_mock.MockerFixture) -> None:
+        """Test that protocol, learned by a command for alias of the server, is used by the probe, and vice versa."""
+        record = factories.ServerRecordFactory()
+        registry.servers.add(record)
+        address: mc_api.Address = factories.AddressFactory(host=record.host.upper(), port=record.port)
+        address._server = mcstatus.BedrockServer(address.host, address.port)
+        mocker.patch("pinger_bot.mc_api.Address.resolve", return_value=address)
+        mocker.patch.object(address._server, "async_status", return_value=factories.MCStatusBedrockResponseFactory())
+        mocked_probe = mocker.patch("pinger_bot.mc_api.PlayersProbe.probe_once")
+
+        await mc_api.MCServer.handle_response(record.alias, java=False)  # type: ignore[arg-type]
+        await mc_api.PlayersProbe.probe(record.host, record.port)
+
+        mocked_probe.assert_called_once_with(record.ip, java=False)
+
+        mc_api._protocol_hints.clear()
+        mc_api._protocol_hints[record.ip.lower()] = mc_api.ProtocolHint(java=True)
+        mocked_handler = mocker.patch("pinger_bot.mc_api.MCServer.handle_response")
+
+        await mc_api.MCServer.status(record.alias)  # type: ignore[arg-type]
+
+        mocked_handler.assert_called_once_with(record.alias, java=True)
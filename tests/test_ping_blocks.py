@@ -0,0 +1,128 @@
+"""Some tests for the :mod:`pinger_bot.ping_blocks` module."""
+import datetime
+import typing
+
+import numpy
+import pytest
+import sqlalchemy
+
+from pinger_bot import models, ping_blocks, ping_storage
+from tests import factories
+
+START = datetime.datetime(2024, 1, 1)
+
+
+@pytest.mark.parametrize(
+    "times,players",
+    [
+        ([], []),
+        ([1000], [5]),
+        ([0, 60, 120, 180, 240], [1, 1, 1, 1, 1]),
+        ([10, 70, 125, 190, 3_600_000, 3_600_001], [0, 300, 300, 2**31 - 1, 0, 0]),
+        (list(range(-500, 500, 7)), list(range(0, 1430, 10))),
+    ],
+)
+def test_round_trip(times: typing.List[int], players: typing.List[int]) -> None:
+    """Test that decoded block is the same as encoded pings."""
+    decoded_times, decoded_players = ping_blocks.decode(ping_blocks.encode(numpy.array(times), numpy.array(players)))
+
+    assert decoded_times.tolist() == times
+    assert decoded_players.tolist() == players
+
+
+def test_regular_pings_are_small() -> None:
+    """Test that pings every minute with rare changes take about a byte per ping."""
+    times = numpy.arange(0, 360 * 60, 60) + 700_000_000
+    players = numpy.repeat([10, 12, 11], 120)
+
+    assert len(ping_blocks.encode(times, players)) < len(times) + 20
+
+
+class TestBlockStore:
+    """Tests for the :class:`~pinger_bot.ping_blocks.BlockStore` class."""
+
+    @pytest.fixture(autouse=True)
+    async def clear_blocks(self) -> None:
+        """Forget pings and blocks from previous tests."""
+        async with models.db.session() as session:
+            await ping_storage.storage.drop_expired(session, before=datetime.datetime.max)
+            await session.execute(sqlalchemy.delete(models.PingBlock))
+            await session.commit()
+
+    async def test_pack_and_read(self) -> None:
+        """Test that closed partitions are packed, and pings are read the same from blocks and partitions."""
+        servers = [await factories.DBServerFactory() for _ in range(2)]
+        times = [START + datetime.timedelta(minutes=25 * i) for i in range(20)]  # partitions 0-6h and 6-12h
+        async with models.db.session() as session:
+            await ping_storage.storage.write(
+                session,
+                [
+                    {"server_id": server.id, "time": time, "players": i // 3 + server.id}
+                    for server in servers
+                    for i, time in enumerate(times)
+                ],
+            )
+            await session.commit()
+
+            packed = await ping_blocks.store.pack_closed(session, now=START + datetime.timedelta(hours=7))
+            await session.commit()
+
+            left = await ping_storage.storage.partitions(session)
+            series = await ping_blocks.store.read(
+                session, servers[1].id, since=times[1], until=START + datetime.timedelta(hours=12)
+            )
+
+        assert [partition.start for partition in packed] == [START]
+        assert [partition.start for partition in left] == [START + datetime.timedelta(hours=6)]
+        assert series.times.tolist() == times[1:]
+        assert series.players.tolist() == [i // 3 + servers[1].id for i in range(1, 20)]
+
+    async def test_read_plot_and_nearest(self) -> None:
+        """Test that plot points and the nearest ping are found in blocks and partitions together."""
+        server = await factories.DBServerFactory()
+        times = [START + datetime.timedelta(minutes=30 * i) for i in range(20)]  # partitions 0-6h and 6-12h
+        async with models.db.session() as session:
+            await ping_storage.storage.write(
+                session, [{"server_id": server.id, "time": time, "players": i} for i, time in enumerate(times)]
+            )
+            await ping_blocks.store.pack_closed(session, now=START + datetime.timedelta(hours=7))
+            await session.commit()
+
+            series = await ping_blocks.store.read_plot(
+                session, server.id, since=START, until=START + datetime.timedelta(hours=10), points=10
+            )
+            in_block = await ping_blocks.store.nearest(
+                session,
+                server.id,
+                START + datetime.timedelta(hours=5, minutes=50),
+                tolerance=datetime.timedelta(hours=1),
+            )
+            on_border = await ping_blocks.store.nearest(
+                session,
+                server.id,
+                START + datetime.timedelta(hours=5, minutes=40),
+                tolerance=datetime.timedelta(minutes=15),
+            )
+
+        assert series.count.tolist() == [2] * 10
+        assert series.players.tolist() == [i + 0.5 for i in range(0, 20, 2)]
+        assert in_block == (START + datetime.timedelta(hours=5, minutes=30), 11)
+        assert on_border == (START + datetime.timedelta(hours=5, minutes=30), 11)
+
+    async def test_drop_expired(self) -> None:
+        """Test that only blocks, which end before the time, are deleted."""
+        server = await factories.DBServerFactory()
+        async with models.db.session() as session:
+            await ping_storage.storage.write(
+                session,
+                [
+                    {"server_id": server.id, "time": START + datetime.timedelta(hours=hours), "players": 1}
+                    for hours in (1, 7)
+                ],
+            )
+            await ping_blocks.store.pack_closed(session, now=START + datetime.timedelta(days=1))
+            await ping_blocks.store.drop_expired(session, before=START + datetime.timedelta(hours=8))
+            await session.commit()
+
+            starts = (await session.scalars(sqlalchemy.select(models.PingBlock.start))).all()
+        assert starts == [START + datetime.timedelta(hours=6)]
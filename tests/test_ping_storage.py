@@ -0,0 +1,265 @@
+"""Some tests for the :mod:`pinger_bot.ping_storage` module."""
+import asyncio
+import datetime
+import pathlib
+import typing
+
+import alembic.command
+import alembic.config
+import numpy
+import pytest
+import pytest_mock
+import sqlalchemy
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from pinger_bot import config, models, ping_storage
+from tests import factories
+
+
+class TestPartition:
+    """Tests for the :class:`~pinger_bot.ping_storage.Partition` class."""
+
+    @pytest.mark.parametrize(
+        "time,start",
+        [
+            (datetime.datetime(2024, 1, 1, 0, 0), datetime.datetime(2024, 1, 1, 0, 0)),
+            (datetime.datetime(2024, 1, 1, 5, 59, 59), datetime.datetime(2024, 1, 1, 0, 0)),
+            (datetime.datetime(2024, 1, 1, 6, 0), datetime.datetime(2024, 1, 1, 6, 0)),
+            (datetime.datetime(2024, 1, 2, 23, 30), datetime.datetime(2024, 1, 2, 18, 0)),
+        ],
+    )
+    def test_for_time(self, time: datetime.datetime, start: datetime.datetime) -> None:
+        """Test that partitions are aligned to the length."""
+        assert ping_storage.Partition.for_time(time, 6) == ping_storage.Partition(start=start, hours=6)
+
+    def test_name_round_trip(self) -> None:
+        """Test that the partition can be parsed back from its name."""
+        partition = ping_storage.Partition(start=datetime.datetime(2024, 3, 4, 12), hours=6)
+
+        assert partition.name == "pb_pings_2024030412_6h"
+        assert ping_storage.Partition.from_name(partition.name) == partition
+
+    def test_names_unique_per_partition(self) -> None:
+        """Test that indexes and foreign keys of partitions have own names, they must be unique in MySQL."""
+        tables = [ping_storage.Partition(start=datetime.datetime(2024, 3, 4, hour), hours=6).table for hour in (0, 6)]
+
+        names = [{item.name for item in (*table.indexes, *table.foreign_key_constraints)} for table in tables]
+        assert names[0].isdisjoint(names[1])
+        assert "pb_pings_2024030400_6h_to_server" in names[0]
+
+    @pytest.mark.parametrize("name", ["pb_pings", "pb_servers", "pb_pings_2024030412", "alembic_version"])
+    def test_from_name_not_partition(self, name: str) -> None:
+        """Test that other tables are not parsed as partitions."""
+        assert ping_storage.Partition.from_name(name) is None
+
+
+class TestPingStorage:
+    """Tests for the :class:`~pinger_bot.ping_storage.PingStorage` class."""
+
+    @pytest.fixture(autouse=True)
+    async def drop_partitions(self) -> None:
+        """Drop partitions of previous tests."""
+        async with models.db.session() as session:
+            await ping_storage.storage.drop_expired(session, before=datetime.datetime.max)
+            await session.commit()
+
+    async def test_read_across_partitions(self) -> None:
+        """Test that pings from several partitions are read in order, and only inside the window."""
+        server = await factories.DBServerFactory()
+        start = datetime.datetime(2024, 1, 1, 4)
+        times = [start + datetime.timedelta(hours=hours) for hours in range(6)]  # two 6h partitions
+        async with models.db.session() as session:
+            await ping_storage.storage.write(
+                session,
+                [{"server_id": server.id, "time": time, "players": i} for i, time in enumerate(times)],
+            )
+            await session.commit()
+
+            rows = await ping_storage.storage.read(session, server.id, since=times[1], until=times[-1])
+            partitions = await ping_storage.storage.partitions(session)
+
+        assert [row.time for row in rows] == times[1:-1]
+        assert [row.players for row in rows] == [1, 2, 3, 4]
+        assert [partition.start for partition in partitions] == [
+            datetime.datetime(2024, 1, 1, 0),
+            datetime.datetime(2024, 1, 1, 6),
+        ]
+
+    async def test_drop_expired(self) -> None:
+        """Test that only partitions, which end before the time, are dropped."""
+        server = await factories.DBServerFactory()
+        times = [datetime.datetime(2024, 1, 1, 1), datetime.datetime(2024, 1, 1, 7)]
+        async with models.db.session() as session:
+            await ping_storage.storage.write(
+                session, [{"server_id": server.id, "time": time, "players": 1} for time in times]
+            )
+            await session.commit()
+
+            dropped = await ping_storage.storage.drop_expired(session, before=datetime.datetime(2024, 1, 1, 8))
+            await session.commit()
+            left = await ping_storage.storage.partitions(session)
+
+        assert [partition.start for partition in dropped] == [datetime.datetime(2024, 1, 1, 0)]
+        assert [partition.start for partition in left] == [datetime.datetime(2024, 1, 1, 6)]
+
+    async def test_create_race(self, mocker: pytest_mock.MockerFixture) -> None:
+        """Test that the partition is remembered, if another process created it at the same time."""
+        storage, partition = ping_storage.PingStorage(), ping_storage.Partition(datetime.datetime(2024, 1, 1), 6)
+        async with models.db.engine.begin() as connection:  # created by "another process"
+            await connection.run_sync(partition.table.create)
+        mocker.patch.object(partition.table, "create", side_effect=sqlalchemy.exc.ProgrammingError("", {}, None))
+
+        await storage._create(partition)  # skipcq: PYL-W0212 # private method
+
+        assert partition.name in storage._created  # skipcq: PYL-W0212 # private attribute
+
+    async def test_create_failed(self, mocker: pytest_mock.MockerFixture) -> None:
+        """Test that other errors are raised, and the partition is not remembered, so it is created next time."""
+        storage, partition = ping_storage.PingStorage(), ping_storage.Partition(datetime.datetime(2024, 1, 1), 6)
+        error = sqlalchemy.exc.OperationalError("", {}, Exception("database is locked"))
+        mocker.patch.object(partition.table, "create", side_effect=error)
+
+        with pytest.raises(sqlalchemy.exc.OperationalError):
+            await storage._create(partition)  # skipcq: PYL-W0212 # private method
+
+        assert partition.name not in storage._created  # skipcq: PYL-W0212 # private attribute
+
+    async def test_read_plot(self) -> None:
+        """Test that pings are averaged into buckets in the database, across partitions."""
+        server = await factories.DBServerFactory()
+        start = datetime.datetime(2024, 1, 1, 5)
+        # a ping every 10 minutes for 2 hours, so partitions 0-6h and 6-12h
+        pings = [(start + datetime.timedelta(minutes=10 * i), i) for i in range(12)]
+        async with models.db.session() as session:
+            await ping_storage.storage.write(
+                session, [{"server_id": server.id, "time": time, "players": players} for time, players in pings]
+            )
+            await session.commit()
+
+            # 2 hours in 4 points is 30 minutes per point, 3 pings in every one
+            series = await ping_storage.storage.read_plot(
+                session, server.id, since=start, until=start + datetime.timedelta(hours=2), points=4
+            )
+
+        assert series.count.tolist() == [3, 3, 3, 3]
+        assert series.players.tolist() == [1, 4, 7, 10]
+        assert series.times.tolist() == [start + datetime.timedelta(minutes=10 + 30 * i) for i in range(4)]
+
+    async def test_read_plot_compiles_for_postgresql(self, mocker: pytest_mock.MockerFixture) -> None:
+        """Test that GROUP BY and ORDER BY of the plot query are the same expression on PostgreSQL.
+
+        PostgreSQL rejects the query, if they have different placeholders for the bucket length.
+        """
+        server = await factories.DBServerFactory()
+        start = datetime.datetime(2024, 1, 1, 5)
+        async with models.db.session() as session:
+            await ping_storage.storage.write(session, [{"server_id": server.id, "time": start, "players": 1}])
+            await session.commit()
+            execute = mocker.spy(session, "execute")
+            await ping_storage.storage.read_plot(
+                session, server.id, since=start, until=start + datetime.timedelta(hours=2), points=4
+            )
+
+        query = str(execute.call_args.args[0].compile(dialect=asyncpg.dialect()))
+        group_by = query.split("GROUP BY")[1].split("ORDER BY")[0].strip()
+        order_by = query.split("ORDER BY")[1].strip()
+        assert group_by == order_by
+        assert group_by.endswith("% 1800")
+
+    async def test_read_plot_same_as_downsample(self) -> None:
+        """Test that SQL and numpy split pings into the same buckets."""
+        server = await factories.DBServerFactory()
+        start = datetime.datetime(2024, 1, 1, 3, 7)
+        until = start + datetime.timedelta(hours=5)
+        times = [start + datetime.timedelta(minutes=7 * i) for i in range(40)]
+        async with models.db.session() as session:
+            await ping_storage.storage.write(
+                session, [{"server_id": server.id, "time": time, "players": i % 5} for i, time in enumerate(times)]
+            )
+            await session.commit()
+            series = await ping_storage.storage.read_plot(session, server.id, since=start, until=until, points=7)
+
+        seconds = numpy.array([(time - models.CompactTime.EPOCH).total_seconds() for time in times], dtype=numpy.int64)
+        expected = ping_storage.downsample(seconds, numpy.arange(40) % 5, ping_storage.bucket_length(start, until, 7))
+        assert series.times.tolist() == expected.times.tolist()
+        assert series.players.tolist() == pytest.approx(expected.players.tolist())
+        assert series.count.tolist() == expected.count.tolist()
+
+    @pytest.mark.parametrize(
+        "minutes,expected",
+        [
+            ([-90, -30, 10], -30),  # the last ping before
+            ([-90, 10, 30], 10),  # nothing close before, the first ping after
+            ([-90, 90], None),
+            ([0], 0),
+        ],
+    )
+    async def test_nearest(self, minutes: typing.List[int], expected: typing.Optional[int]) -> None:
+        """Test that the nearest ping follows the step function."""
+        server = await factories.DBServerFactory()
+        time = datetime.datetime(2024, 1, 1, 6)
+        async with models.db.session() as session:
+            await ping_storage.storage.write(
+                session,
+                [
+                    {"server_id": server.id, "time": time + datetime.timedelta(minutes=minute), "players": minute}
+                    for minute in minutes
+                ],
+            )
+            await session.commit()
+            found = await ping_storage.storage.nearest(session, server.id, time, tolerance=datetime.timedelta(hours=1))
+
+        if expected is None:
+            assert found is None
+        else:
+            assert found == (time + datetime.timedelta(minutes=expected), expected)
+
+
+async def test_compact_layout_migration(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that migration to the compact layout keeps pings of partitions, and downgrade brings them back."""
+    loop = asyncio.get_running_loop()
+    db_uri = f"sqlite+aiosqlite:///{tmp_path / 'db.sqlite3'}"
+    monkeypatch.setattr(config.config, "db_uri", db_uri)
+    alembic_cfg = alembic.config.Config("pinger_bot/migrations/alembic.ini")
+    alembic_cfg.set_section_option("logger_alembic", "level", "ERROR")
+    # in another thread, because alembic runs its own event loop
+    await loop.run_in_executor(None, alembic.command.upgrade, alembic_cfg, "c4a9e3f7d218")
+
+    time = datetime.datetime(2024, 1, 1, 7, 30, 15)
+    engine = sqlalchemy.create_engine(db_uri.replace("+aiosqlite", ""))
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO pb_servers (id, host, port, max, owner) VALUES (5, 'example.com', 25565, 0, 1)"
+        )
+        connection.exec_driver_sql(
+            "CREATE TABLE pb_pings_2024010106_6h (id INTEGER PRIMARY KEY, host VARCHAR(256) NOT NULL,"
+            " port INTEGER NOT NULL, time DATETIME NOT NULL, players INTEGER NOT NULL)"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO pb_pings_2024010106_6h (id, host, port, time, players) VALUES"
+            " (100, 'example.com', 25565, ?, 10), (101, 'removed.example.com', 25565, ?, 20)",
+            (str(time), str(time)),
+        )
+
+    await loop.run_in_executor(None, alembic.command.upgrade, alembic_cfg, "d8f1a6b3c920")
+    table = ping_storage.Partition.from_name("pb_pings_2024010106_6h").table  # type: ignore[union-attr]
+    with engine.begin() as connection:
+        # IDs are not copied, so they continue from the identity of the new table
+        assert [
+            tuple(row) for row in connection.execute(sqlalchemy.select(table.c.id, table.c.server_id, table.c.time))
+        ] == [(1, 5, time)]
+        inspector = sqlalchemy.inspect(connection)
+        indexes = inspector.get_indexes("pb_pings_2024010106_6h")
+        # names of foreign keys must be unique in MySQL, and they are the same, as of new partitions
+        foreign_keys = {name: inspector.get_foreign_keys(name)[0]["name"] for name in ("pb_pings", table.name)}
+    assert [index["name"] for index in indexes] == ["ix_pb_pings_2024010106_6h_server_time"]
+    assert foreign_keys == {
+        "pb_pings": "ping_to_server",
+        table.name: next(iter(table.foreign_key_constraints)).name,
+    }
+
+    await loop.run_in_executor(None, alembic.command.downgrade, alembic_cfg, "c4a9e3f7d218")
+    with engine.begin() as connection:
+        rows = connection.exec_driver_sql("SELECT host, port, players FROM pb_pings_2024010106_6h").all()
+    engine.dispose()
+    assert [tuple(row) for row in rows] == [("example.com", 25565, 10)]
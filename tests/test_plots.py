@@ -0,0 +1,182 @@
+"""Some tests for the :mod:`pinger_bot.plots` module."""
+import asyncio
+import datetime
+import threading
+import typing
+
+import numpy
+import pytest
+import pytest_mock
+
+from pinger_bot import config, plots
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _plot(points: int = 50, *, with_range: bool = False) -> plots.Plot:
+    players = numpy.arange(points) % 7
+    return plots.Plot(
+        times=numpy.datetime64("2024-01-01T00:00", "s") + numpy.arange(points).astype("timedelta64[m]") * 5,
+        players=players,
+        title="example.com statistic",
+        xlabel="Time",
+        ylabel="Players online",
+        date_format="%H:%M",
+        min=players - 1 if with_range else None,
+        max=players + 1 if with_range else None,
+    )
+
+
+@pytest.mark.parametrize("with_range", [False, True])
+@pytest.mark.parametrize("backend", list(plots.BACKENDS))
+def test_create_plot(backend: str, with_range: bool) -> None:
+    """Test that the plot is rendered to PNG by every backend."""
+    assert plots.create_plot(_plot(with_range=with_range), backend).startswith(PNG_SIGNATURE)
+
+
+def test_create_plot_default_backend(monkeypatch: pytest.MonkeyPatch, mocker: pytest_mock.MockerFixture) -> None:
+    """Test that the backend from the config is used by default."""
+    monkeypatch.setattr(config.config, "plot_backend", "matplotlib")
+    backend = mocker.patch.dict(plots.BACKENDS, {"matplotlib": mocker.Mock(return_value=b"png")})
+
+    assert plots.create_plot(_plot()) == b"png"
+    backend["matplotlib"].assert_called_once()
+
+
+class TestRenderer:
+    """Tests for the :class:`~pinger_bot.plots.Renderer` class."""
+
+    @pytest.fixture()
+    def renderer(self) -> typing.Iterator[plots.Renderer]:
+        """Renderer, which is closed after the test."""
+        renderer = plots.Renderer()
+        yield renderer
+        renderer.close()
+
+    async def test_render_in_process(self, renderer: plots.Renderer, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that the plot is rendered in a process of the pool."""
+        monkeypatch.setattr(config.config, "plot_processes", 1)
+        monkeypatch.setattr(config.config, "plot_timeout", 60.0)
+
+        assert (await renderer.render(_plot())).startswith(PNG_SIGNATURE)
+
+    async def test_render_in_thread(self, renderer: plots.Renderer, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that with ``plot_processes`` 0, the plot is rendered in a thread, not in the event loop."""
+        monkeypatch.setattr(config.config, "plot_processes", 0)
+        threads = []
+        original = plots.create_plot
+
+        def create_plot(plot: plots.Plot, backend: str) -> bytes:
+            threads.append(threading.current_thread())
+            return original(plot, backend)
+
+        monkeypatch.setattr(plots, "create_plot", create_plot)
+
+        assert (await renderer.render(_plot())).startswith(PNG_SIGNATURE)
+        assert threads and threading.main_thread() not in threads
+
+    async def test_timeout(
+        self, renderer: plots.Renderer, monkeypatch: pytest.MonkeyPatch, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        """Test that the plot, which is not rendered in time, raises timeout."""
+        monkeypatch.setattr(config.config, "plot_processes", 0)
+        monkeypatch.setattr(config.config, "plot_timeout", 0.1)
+        release = threading.Event()
+        mocker.patch.object(plots, "create_plot", side_effect=lambda plot, backend: release.wait(5) and b"")
+
+        with pytest.raises(asyncio.TimeoutError):
+            await renderer.render(_plot())
+        release.set()
+
+    async def test_timed_out_render_keeps_place(
+        self, renderer: plots.Renderer, monkeypatch: pytest.MonkeyPatch, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        """Test that the plot, which timed out, is counted in ``plot_processes`` until the pool finishes it."""
+        monkeypatch.setattr(config.config, "plot_processes", 0)
+        monkeypatch.setattr(config.config, "plot_timeout", 0.1)
+        mocker.patch.object(plots, "_warm_up")  # so the plot is rendered right away, not queued after the warm-up
+        release = threading.Event()
+        create_plot = mocker.patch.object(
+            plots, "create_plot", side_effect=lambda plot, backend: release.wait(5) and b""
+        )
+
+        for _ in range(2):
+            with pytest.raises(asyncio.TimeoutError):
+                await renderer.render(_plot())
+        assert create_plot.call_count == 1
+        assert renderer._semaphore is not None and renderer._semaphore.locked()  # the first plot is still rendered
+
+        release.set()
+        for _ in range(50):
+            if renderer._semaphore is not None and not renderer._semaphore.locked():
+                break
+            await asyncio.sleep(0.01)
+        assert renderer._semaphore is not None and not renderer._semaphore.locked()
+
+
+def _key(server_id: int = 1, samples: int = 100) -> plots.PlotKey:
+    return plots.PlotKey(server_id, "example.com", "24h", datetime.datetime(2024, 1, 1), samples)
+
+
+class TestPlotCache:
+    """Tests for the :class:`~pinger_bot.plots.PlotCache` class."""
+
+    @pytest.fixture()
+    def cache(self, monkeypatch: pytest.MonkeyPatch) -> plots.PlotCache:
+        """Cache with budget of 100 bytes."""
+        monkeypatch.setattr(config.config, "plot_cache_bytes", 100)
+        return plots.PlotCache()
+
+    async def test_hit(self, cache: plots.PlotCache, mocker: pytest_mock.MockerFixture) -> None:
+        """Test that the plot is rendered once, and then returned from the cache until the key changes."""
+        render = mocker.AsyncMock(return_value=b"png")
+
+        assert await cache.get(_key(), render) == b"png"
+        assert await cache.get(_key(), render) == b"png"
+        assert render.await_count == 1
+
+        await cache.get(_key(samples=101), render)
+        assert render.await_count == 2
+        assert (cache.stats.hits, cache.stats.misses, cache.stats.renders) == (1, 2, 2)
+        assert cache.summary()["bytes"] == 6
+
+    async def test_byte_budget(self, cache: plots.PlotCache, mocker: pytest_mock.MockerFixture) -> None:
+        """Test that the least recently used plots are evicted, when they don't fit into the budget."""
+        for server_id in range(1, 4):
+            await cache.get(_key(server_id), mocker.AsyncMock(return_value=bytes(40)))
+        too_big = mocker.AsyncMock(return_value=bytes(101))
+        await cache.get(_key(4), too_big)
+        await cache.get(_key(4), too_big)
+
+        assert cache.stats.evictions == 1
+        assert cache.summary()["plots"] == 2
+        assert too_big.await_count == 2
+
+    async def test_coalesced(self, cache: plots.PlotCache) -> None:
+        """Test that the same plot, which is requested while it is rendered, is rendered once."""
+        release = asyncio.Event()
+        renders = 0
+
+        async def render() -> bytes:
+            nonlocal renders
+            renders += 1
+            await release.wait()
+            return b"png"
+
+        waiting = [asyncio.create_task(cache.get(_key(), render)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*waiting) == [b"png"] * 3
+        assert renders == 1
+        assert cache.stats.coalesced == 2
+
+    async def test_popular(self, cache: plots.PlotCache, mocker: pytest_mock.MockerFixture) -> None:
+        """Test that only requests of users are counted."""
+        render = mocker.AsyncMock(return_value=b"png")
+        for server_id in (1, 2, 2, 3, 3, 3):
+            await cache.get(_key(server_id), render)
+        await cache.get(_key(1), render, request=False)
+        await cache.get(_key(1), render, request=False)
+
+        assert cache.popular(2) == [(3, "example.com", "24h"), (2, "example.com", "24h")]
@@ -0,0 +1,130 @@
+"""Some tests for the :mod:`pinger_bot.registry` module."""
+import dataclasses
+import typing
+
+import faker as faker_package
+import pytest
+import sqlalchemy
+
+from pinger_bot import config, models, registry
+from tests import factories
+
+
+async def test_iter_servers_yields_all_servers_in_order() -> None:
+    """Tests that all servers are yielded in order of their ID, regardless of chunk size."""
+    for _ in range(4):
+        await factories.DBServerFactory()
+    async with models.db.session() as session:
+        expected = (
+            await session.execute(
+                sqlalchemy.select(
+                    models.Server.id,
+                    models.Server.host,
+                    models.Server.port,
+                    models.Server.max,
+                    models.Server.alias,
+                    models.Server.owner,
+                    models.Server.java,
+                ).order_by(models.Server.id)
+            )
+        ).all()
+
+    for chunk_size in (1, 2, 3, len(expected), 1000):
+        assert [tuple(row) async for row in registry.iter_servers(chunk_size)] == [tuple(row) for row in expected]
+
+
+class TestRegistry:
+    """Tests for the :class:`pinger_bot.registry.Registry` class."""
+
+    async def test_load_reads_all_servers(self) -> None:
+        """Tests that :meth:`~pinger_bot.registry.Registry.load` reads every server from database."""
+        db_server = await factories.DBServerFactory()
+        servers = registry.Registry()
+        servers.add(factories.ServerRecordFactory())  # must be replaced
+
+        await servers.load()
+
+        async with models.db.session() as session:
+            count = (await session.execute(sqlalchemy.select(sqlalchemy.func.count(models.Server.id)))).scalar_one()
+        assert len(servers) == count
+        assert servers.get(db_server.id) == registry.ServerRecord.from_model(db_server)
+        assert servers.by_address(db_server.host, db_server.port) == servers.get(db_server.id)
+
+    @pytest.mark.parametrize("shards", (1, 2, 3))
+    async def test_load_shards_cover_all_servers(self, shards: int) -> None:
+        """Tests that every server is loaded by exactly one shard, chosen by its ID."""
+        for _ in range(4):
+            await factories.DBServerFactory()
+        everything = registry.Registry()
+        await everything.load()
+
+        loaded: typing.List[int] = []
+        for index in range(shards):
+            part = registry.Registry()
+            await part.load(shard=(index, shards))
+            assert all(record.id % shards == index for record in part)
+            loaded.extend(record.id for record in part)
+
+        assert sorted(loaded) == sorted(record.id for record in everything)
+
+    def test_lookups(self) -> None:
+        """Tests that server can be found by ID, alias and address."""
+        servers = registry.Registry()
+        record = factories.ServerRecordFactory()
+        servers.add(record)
+
+        assert servers.get(record.id) is record
+        assert servers.by_alias(record.alias) is record
+        assert servers.by_address(record.host, record.port) is record
+        assert list(servers) == [record]
+
+    def test_by_phase(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Tests that servers are indexed by their phase, and the index follows adding and removing."""
+        monkeypatch.setattr(config.config, "ping_slots", 4)
+        servers = registry.Registry()
+        records = [factories.ServerRecordFactory() for _ in range(12)]
+        for record in records:
+            servers.add(record)
+        servers.remove(records[0].id)
+
+        for phase in range(4):
+            expected = {record.id for record in records[1:] if registry.phase(record.id, 4) == phase}
+            assert {record.id for record in servers.by_phase(phase)} == expected
+
+    def test_update_changes_indexes(self, faker: faker_package.Faker) -> None:
+        """Tests that :meth:`~pinger_bot.registry.Registry.update` keeps alias index correct."""
+        servers = registry.Registry()
+        record = factories.ServerRecordFactory()
+        servers.add(record)
+        new_alias = faker.unique.word()
+
+        servers.update(record.id, alias=new_alias)
+
+        assert servers.by_alias(record.alias) is None
+        assert servers.by_alias(new_alias) == dataclasses.replace(record, alias=new_alias)
+
+    def test_update_unknown_server_does_nothing(self) -> None:
+        """Tests that :meth:`~pinger_bot.registry.Registry.update` ignores unknown servers."""
+        servers = registry.Registry()
+        servers.update(1, max=10)
+        assert len(servers) == 0
+
+    @pytest.mark.parametrize("alias", (True, False))
+    def test_remove(self, faker: faker_package.Faker, alias: bool) -> None:
+        """Tests that :meth:`~pinger_bot.registry.Registry.remove` removes server from every index."""
+        servers = registry.Registry()
+        record = factories.ServerRecordFactory(alias=faker.unique.word() if alias else None)
+        servers.add(record)
+
+        servers.remove(record.id)
+        servers.remove(record.id)  # second time does nothing
+
+        assert len(servers) == 0
+        assert servers.by_address(record.host, record.port) is None
+        if alias:
+            assert servers.by_alias(record.alias) is None
+
+    def test_ip_property(self) -> None:
+        """Tests :attr:`pinger_bot.registry.ServerRecord.ip` property."""
+        record = factories.ServerRecordFactory()
+        assert record.ip == f"{record.host}:{record.port}"
@@ -0,0 +1,133 @@
+"""Some tests for the :mod:`pinger_bot.rollups` module."""
+import datetime
+import typing
+
+import pytest
+import pytest_mock
+import sqlalchemy
+from sqlalchemy.dialects.postgresql import asyncpg
+from sqlalchemy.ext import asyncio as sqlalchemy_asyncio
+
+from pinger_bot import models, ping_storage, rollups
+from tests import factories
+
+START = datetime.datetime(2024, 1, 1)
+
+
+@pytest.fixture(autouse=True)
+async def clear_rollups() -> None:
+    """Forget pings and rollups from previous tests."""
+    async with models.db.session() as session:
+        await ping_storage.storage.drop_expired(session, before=datetime.datetime.max)
+        await session.execute(sqlalchemy.delete(models.HourlyRollup))
+        await session.execute(sqlalchemy.delete(models.DailyRollup))
+        await session.commit()
+
+
+async def write_pings(server_id: int, pings: typing.Dict[datetime.datetime, int]) -> None:
+    """Write raw pings (``time -> players``) of the server."""
+    async with models.db.session() as session:
+        await ping_storage.storage.write(
+            session, [{"server_id": server_id, "time": time, "players": players} for time, players in pings.items()]
+        )
+        await session.commit()
+
+
+async def roll_up(now: datetime.datetime) -> None:
+    """Run :func:`pinger_bot.rollups.roll_up` in its own session."""
+    async with models.db.session() as session:
+        await rollups.roll_up(session, now=now)
+        await session.commit()
+
+
+async def test_hourly() -> None:
+    """Test that finished hours are aggregated, and the current one isn't."""
+    server = await factories.DBServerFactory()
+    await write_pings(
+        server.id,
+        {
+            START + datetime.timedelta(minutes=10): 10,
+            START + datetime.timedelta(minutes=40): 20,
+            START + datetime.timedelta(hours=1, minutes=10): 30,
+            START + datetime.timedelta(hours=2, minutes=10): 40,  # the current hour
+        },
+    )
+
+    await roll_up(START + datetime.timedelta(hours=2, minutes=15))
+
+    async with models.db.session() as session:
+        rows = await rollups.read(
+            session, server.id, rollups.HOURLY, since=START, until=START + datetime.timedelta(days=1)
+        )
+    assert [tuple(row) for row in rows] == [
+        (START, 15.0, 10, 20),
+        (START + datetime.timedelta(hours=1), 30.0, 30, 30),
+    ]
+
+
+async def test_incremental() -> None:
+    """Test that already aggregated hours are not aggregated again."""
+    server = await factories.DBServerFactory()
+    await write_pings(server.id, {START + datetime.timedelta(minutes=10): 10})
+    await roll_up(START + datetime.timedelta(hours=1, minutes=30))
+
+    await write_pings(server.id, {START + datetime.timedelta(hours=1, minutes=10): 30})
+    await roll_up(START + datetime.timedelta(hours=2, minutes=30))
+
+    async with models.db.session() as session:
+        rows = (await session.execute(sqlalchemy.select(models.HourlyRollup.start, models.HourlyRollup.samples))).all()
+    assert sorted(tuple(row) for row in rows) == [(START, 1), (START + datetime.timedelta(hours=1), 1)]
+
+
+async def test_daily() -> None:
+    """Test that daily rollup is made from hourly ones, with the average weighted by number of pings."""
+    server = await factories.DBServerFactory()
+    await write_pings(
+        server.id,
+        {
+            START + datetime.timedelta(hours=1): 10,
+            START + datetime.timedelta(hours=1, minutes=30): 10,
+            START + datetime.timedelta(hours=5): 40,
+        },
+    )
+
+    await roll_up(START + datetime.timedelta(days=1, hours=1))
+
+    async with models.db.session() as session:
+        rows = await rollups.read(
+            session, server.id, rollups.DAILY, since=START, until=START + datetime.timedelta(days=2)
+        )
+    assert [tuple(row) for row in rows] == [(START, 20.0, 10, 40)]
+
+
+async def test_expired_deleted() -> None:
+    """Test that rollups older than their retention are deleted."""
+    server = await factories.DBServerFactory()
+    await write_pings(server.id, {START + datetime.timedelta(minutes=10): 10})
+    await roll_up(START + datetime.timedelta(days=1, hours=1))
+
+    await roll_up(START + rollups.HOURLY.retention + datetime.timedelta(days=1))
+
+    async with models.db.session() as session:
+        hourly = (
+            await session.execute(sqlalchemy.select(sqlalchemy.func.count()).select_from(models.HourlyRollup))
+        ).scalar_one()
+        daily = (
+            await session.execute(sqlalchemy.select(sqlalchemy.func.count()).select_from(models.DailyRollup))
+        ).scalar_one()
+    assert (hourly, daily) == (0, 1)
+
+
+async def test_compiles_for_postgresql(mocker: pytest_mock.MockerFixture) -> None:
+    """Test that length of the period is a literal, so SELECT and GROUP BY have the same expression on PostgreSQL."""
+    server = await factories.DBServerFactory()
+    await write_pings(server.id, {START + datetime.timedelta(minutes=10): 10})
+    execute = mocker.spy(sqlalchemy_asyncio.AsyncSession, "execute")
+
+    await roll_up(START + datetime.timedelta(days=1, hours=1))
+
+    queries = [str(call.args[1].compile(dialect=asyncpg.dialect())) for call in execute.call_args_list]
+    inserts = [query for query in queries if query.startswith("INSERT")]
+    assert len(inserts) == 2
+    for query, length in zip(inserts, (3600, 86400)):
+        assert query.count(f"% {length}") == 2  # in SELECT and in GROUP BY
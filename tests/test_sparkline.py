@@ -0,0 +1,112 @@
+"""Some tests for the :mod:`pinger_bot.sparkline` module."""
+import importlib.util
+import io
+import typing
+
+import numpy
+import pytest
+from PIL import Image
+
+from pinger_bot import config, plots, sparkline
+
+
+def _plot(times: typing.Sequence[str], players: typing.Sequence[float], **kwargs: typing.Any) -> plots.Plot:
+    return plots.Plot(
+        times=numpy.array(times, dtype="datetime64[s]"),
+        players=numpy.array(players, dtype=numpy.float64),
+        title="Статистика example.com",
+        xlabel="Время",
+        ylabel="Игроков онлайн",
+        date_format="%H:%M",
+        **kwargs,
+    )
+
+
+def _pixels(image: bytes) -> numpy.ndarray:
+    return numpy.asarray(Image.open(io.BytesIO(image)))
+
+
+def test_render_is_small_palette_png() -> None:
+    """Test that the image is a palette PNG of the default size, and it is a few KiB even for many points."""
+    points = 10_000
+    players = 50 + 30 * numpy.sin(numpy.linspace(0, 12, points))
+    plot = _plot(
+        numpy.datetime64("2024-01-01T00:00", "s") + numpy.linspace(0, 86400, points).astype("timedelta64[s]"),
+        players,
+        min=players - 5,
+        max=players + 5,
+    )
+    image = sparkline.render(plot)
+
+    with Image.open(io.BytesIO(image)) as opened:
+        assert opened.format == "PNG"
+        assert opened.mode == "P"
+        assert opened.size == (sparkline.WIDTH, sparkline.HEIGHT)
+    assert len(image) < 16 * 1024
+
+
+def test_line_and_band_are_drawn() -> None:
+    """Test that the line is drawn where the players are, with the band around it."""
+    plot = _plot(["2024-01-01T00:00", "2024-01-01T12:00"], [10, 10], min=[5, 5], max=[20, 20])
+    pixels = _pixels(sparkline.render(plot))
+    column = pixels[:, sparkline.WIDTH // 2]
+
+    line_rows = numpy.flatnonzero(column == sparkline.LINE)
+    band_rows = numpy.flatnonzero(column == sparkline.BAND)
+    assert len(line_rows) == 2
+    assert band_rows.min() < line_rows.min() and band_rows.max() > line_rows.max()
+
+
+@pytest.mark.parametrize(
+    "times,players",
+    [
+        ([], []),
+        (["2024-01-01T00:00"], [5]),
+        (["2024-01-01T00:00", "2024-01-01T00:00:30"], [0, 0]),
+    ],
+)
+def test_render_degenerate(times: typing.List[str], players: typing.List[float]) -> None:
+    """Test that plots without a range of time or players are drawn too."""
+    assert _pixels(sparkline.render(_plot(times, players))).shape == (sparkline.HEIGHT, sparkline.WIDTH)
+
+
+@pytest.mark.parametrize(
+    "span,ticks,expected",
+    [(100, 5, 20), (7, 5, 2), (1000, 5, 200), (3, 5, 1), (0.4, 5, 0.1)],
+)
+def test_nice_step(span: float, ticks: int, expected: float) -> None:
+    """Test that steps between ticks are round numbers."""
+    assert sparkline._nice_step(span, ticks) == pytest.approx(expected)  # skipcq: PYL-W0212 # private function
+
+
+class TestFont:
+    """Tests for the font of the text on the image."""
+
+    @pytest.fixture(autouse=True)
+    def clear_font_cache(self) -> typing.Iterator[None]:
+        """Forget loaded fonts before and after every test."""
+        sparkline._font.cache_clear()  # skipcq: PYL-W0212 # private function
+        yield
+        sparkline._font.cache_clear()  # skipcq: PYL-W0212 # private function
+
+    def test_default_is_dejavu_sans(self) -> None:
+        """Test that by default the text is drawn with DejaVu Sans from matplotlib, which has Cyrillic letters."""
+        font = sparkline._font(13)  # skipcq: PYL-W0212 # private function
+
+        assert font.getname() == ("DejaVu Sans", "Book")
+        assert font.getlength("Игроков онлайн") > 0
+
+    def test_font_from_config(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that :attr:`~pinger_bot.config.Config.plot_font` is used, if it is set."""
+        bold = sparkline._font_path().with_name("DejaVuSans-Bold.ttf")  # skipcq: PYL-W0212 # private function
+        monkeypatch.setattr(config.config, "plot_font", str(bold))
+
+        assert sparkline._font(13).getname() == ("DejaVu Sans", "Bold")  # skipcq: PYL-W0212 # private function
+
+    def test_no_silent_fallback(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that without matplotlib and :attr:`~pinger_bot.config.Config.plot_font`, \
+        Pillow's default font (without Cyrillic) is not used silently."""
+        monkeypatch.setattr(importlib.util, "find_spec", lambda _: None)
+
+        with pytest.raises(ModuleNotFoundError):
+            sparkline._font(13)  # skipcq: PYL-W0212 # private function